@@ -0,0 +1,159 @@
+import argparse
+import json
+import sys
+import os
+import time
+
+# Ensure project root is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+import numpy as np
+
+from src.batch import analyze_batch, collect_images
+from src.dedup import DuplicateIndex
+from src.export import EXPORT_FORMATS, open_exporter
+from src.models import ProcessingConfig
+from src.processors import EXTRACTION_BACKENDS, FOREGROUNDS
+from src.result_cache import ResultCache, default_cache_dir
+from src.templates import TemplateLibrary
+from src.tuning import CannyTuner
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Headless batch analysis of a directory or glob of images."
+    )
+    parser.add_argument("source", help="Directory or glob pattern (quote globs).")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Recurse into subdirectories / allow '**' globs.")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("-c", "--chunk-size", type=int, default=1, help="Images handed to a worker per dispatch.")
+    parser.add_argument("--include-contours", action="store_true", help="Emit contour points in the output.")
+    parser.add_argument("--compact-contours", action="store_true", help="Emit contours as base64 codec payloads instead of point lists.")
+    parser.add_argument("--export", metavar="PATH", help="Stream every shape to a JSONL, CSV or Parquet file; stdout then only carries per-image summaries.")
+    parser.add_argument("--export-format", choices=EXPORT_FORMATS, default=None, help="Export format (default: from the file extension).")
+    parser.add_argument("--export-chunk", type=int, default=10000, metavar="ROWS", help="Shapes buffered before each export flush.")
+    parser.add_argument("--templates", metavar="SOURCE", help="Label shapes by matching against reference images (directory or glob) or a saved .npz library.")
+    parser.add_argument("--template-distance", type=float, default=None, help="Largest descriptor distance accepted as a template match.")
+    parser.add_argument("--result-cache", nargs="?", const=default_cache_dir(), metavar="DIR", help="Reuse results of images analyzed before with the same settings, stored in DIR (default: %(const)s).")
+    parser.add_argument("--result-cache-size", type=int, default=1024, metavar="MB", help="Size limit of the result cache before least recently used entries are evicted.")
+    parser.add_argument("--skip-duplicates", nargs="?", type=int, const=4, default=None, metavar="BITS", help="Reuse the results of an earlier near-identical image (perceptual hashes at most BITS apart, default %(const)s) instead of analyzing it.")
+    parser.add_argument("--auto-tune", type=int, default=0, metavar="N", help="Pick Canny thresholds by sweeping N sampled images first (canny backend only).")
+
+    defaults = ProcessingConfig()
+    group = parser.add_argument_group("processing")
+    group.add_argument("--canny1", type=int, default=defaults.canny_threshold1, help="Lower Canny threshold.")
+    group.add_argument("--canny2", type=int, default=defaults.canny_threshold2, help="Upper Canny threshold.")
+    group.add_argument("--blur", type=int, default=defaults.gaussian_kernel, help="Gaussian kernel size.")
+    group.add_argument("--min-area", type=float, default=defaults.min_area, help="Minimum contour area (px).")
+    group.add_argument("--max-area", type=float, default=defaults.max_area, help="Maximum contour area (px).")
+    group.add_argument("--backend", choices=EXTRACTION_BACKENDS, default=defaults.backend, help="Contour extraction method.")
+    group.add_argument("--foreground", choices=FOREGROUNDS, default=defaults.foreground, help="Object polarity for the threshold backends.")
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    config = ProcessingConfig(
+        canny_threshold1=args.canny1,
+        canny_threshold2=args.canny2,
+        min_area=args.min_area,
+        max_area=args.max_area,
+        gaussian_kernel=args.blur,
+        backend=args.backend,
+        foreground=args.foreground
+    )
+
+    if args.auto_tune > 0 and config.backend != "canny":
+        print(f"--auto-tune sweeps Canny thresholds and does not apply to --backend {config.backend}", file=sys.stderr)
+        return 1
+
+    paths = collect_images(args.source, recursive=args.recursive)
+    if not paths:
+        print(f"No images found for '{args.source}'", file=sys.stderr)
+        return 1
+
+    if args.auto_tune > 0:
+        # Evenly spaced sample, tuned once for the whole batch
+        sample = [paths[i] for i in np.linspace(0, len(paths) - 1, min(args.auto_tune, len(paths))).astype(int)]
+        images = (cv2.imread(p, cv2.IMREAD_COLOR) for p in sample)
+        try:
+            config = CannyTuner(config).tune_many(img for img in images if img is not None).config
+        except ValueError as exc:
+            print(f"Cannot auto-tune: {exc}", file=sys.stderr)
+            return 1
+        print(
+            f"Auto-tuned Canny thresholds: {config.canny_threshold1} / {config.canny_threshold2}",
+            file=sys.stderr
+        )
+
+    templates = None
+    if args.templates:
+        try:
+            if args.templates.endswith(".npz"):
+                templates = TemplateLibrary.load(args.templates)
+            else:
+                templates = TemplateLibrary.from_directory(args.templates)
+        except (OSError, ValueError) as exc:
+            print(f"Cannot load templates from '{args.templates}': {exc}", file=sys.stderr)
+            return 1
+        if not len(templates):
+            print(f"No template images found for '{args.templates}'", file=sys.stderr)
+            return 1
+        if args.template_distance is not None:
+            templates.max_distance = args.template_distance
+
+    result_cache = None
+    if args.result_cache:
+        result_cache = ResultCache(args.result_cache, max_bytes=args.result_cache_size * 1024 * 1024)
+
+    duplicates = DuplicateIndex(max_distance=args.skip_duplicates) if args.skip_duplicates is not None else None
+
+    exporter = None
+    if args.export:
+        try:
+            exporter = open_exporter(
+                args.export, args.export_format, args.include_contours, args.export_chunk, args.compact_contours
+            )
+        except (ValueError, ImportError, OSError) as exc:
+            print(f"Cannot export to '{args.export}': {exc}", file=sys.stderr)
+            return 1
+
+    # One JSON object per image on stdout, in completion order
+    start = time.perf_counter()
+    failures = 0
+    cached = 0
+    reused = 0
+    try:
+        for result in analyze_batch(
+            paths, config, workers=args.workers, chunk_size=args.chunk_size,
+            templates=templates, result_cache=result_cache, duplicates=duplicates
+        ):
+            cached += result.cached
+            reused += result.duplicate_of is not None
+            record = {"path": result.path, "count": len(result.shapes)}
+            if result.duplicate_of is not None:
+                record["duplicate_of"] = result.duplicate_of
+            if not result.ok:
+                failures += 1
+                record["error"] = result.error
+            elif exporter is not None:
+                exporter.write(result.shapes, result.path)
+            else:
+                record["shapes"] = result.shapes.to_records(args.include_contours, args.compact_contours)
+            sys.stdout.write(json.dumps(record) + "\n")
+            sys.stdout.flush()
+    finally:
+        if exporter is not None:
+            exporter.close()
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"Analyzed {len(paths)} images in {elapsed:.2f}s "
+        f"({len(paths) / max(elapsed, 1e-9):.1f} img/s, {failures} failed"
+        + (f", {cached} from the result cache" if result_cache is not None else "")
+        + (f", {reused} near-duplicates reused" if duplicates is not None else "") + ")",
+        file=sys.stderr
+    )
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
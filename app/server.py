@@ -0,0 +1,346 @@
+import argparse
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import sys
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Ensure project root is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.analyzer import ImageAnalyzer
+from src.loader import decode_image
+from src.models import ProcessingConfig
+
+# Query parameters that override the server's default ProcessingConfig
+CONFIG_PARAMS = {
+    "canny1": ("canny_threshold1", int),
+    "canny2": ("canny_threshold2", int),
+    "blur": ("gaussian_kernel", int),
+    "min_area": ("min_area", float),
+    "max_area": ("max_area", float),
+}
+
+MAX_HEADER_BYTES = 16 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+    """Aborts a request with the given status and message."""
+
+    def __init__(self, status: HTTPStatus, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _analyze_encoded(
+    data: bytes, config: ProcessingConfig, include_contours: bool, compact: bool = False
+) -> Dict[str, Any]:
+    """
+    Worker task: decodes one encoded image and returns its JSON record. A
+    failure is recorded with ``error`` and the HTTP ``status`` it maps to.
+    """
+    try:
+        image = decode_image(data)
+    except ValueError as exc:
+        return {"error": str(exc), "status": HTTPStatus.BAD_REQUEST.value}
+    try:
+        shapes = ImageAnalyzer(config, instrument=True).analyze(image)
+    except Exception as exc:  # reported per image, like batch runs
+        return {"error": f"{type(exc).__name__}: {exc}", "status": HTTPStatus.INTERNAL_SERVER_ERROR.value}
+    return {
+        "count": len(shapes),
+        "shapes": shapes.to_records(include_contours, compact),
+        "stats": shapes.stats.to_dict(),
+    }
+
+
+class AnalysisServer:
+    """
+    Minimal HTTP/1.1 front end for ``ImageAnalyzer``.
+
+    Requests are parsed on an asyncio event loop and the analysis itself
+    runs on a bounded worker pool. At most ``max_pending`` images may be
+    queued or in flight; beyond that requests are rejected with 503 instead
+    of piling up (413 for a batch larger than the limit itself), and an image not finished within ``timeout`` seconds
+    answers 504. On a timeout images not started yet are cancelled; one
+    already running keeps its slot until the worker finishes it.
+
+    Endpoints:
+      - ``POST /analyze``: raw encoded image bytes as the body; 400 when
+        they do not decode.
+      - ``POST /batch``: JSON ``{"images": [<base64>, ...]}``; results keep
+        input order. The batch succeeds as a whole: an image that failed
+        has a result ``{"error": ..., "status": ...}`` instead, with the
+        status ``/analyze`` would have answered for it.
+      - ``GET /health``: pool size and current load.
+
+    Both POST endpoints accept ``include_contours=1`` (plus ``compact=1``
+    for base64 codec payloads instead of point lists) and the config
+    overrides in ``CONFIG_PARAMS`` as query parameters.
+    """
+
+    def __init__(
+        self,
+        config: ProcessingConfig,
+        workers: Optional[int] = None,
+        max_pending: int = 64,
+        timeout: float = 30.0,
+        max_body_bytes: int = 64 * 1024 * 1024,
+        executor: Optional[Executor] = None
+    ):
+        if max_pending < 1:
+            raise ValueError("max_pending must be at least 1")
+        self.config = config
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self.executor = executor or ProcessPoolExecutor(max_workers=self.workers)
+        self.pending = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._handle_connection, host, port, limit=MAX_HEADER_BYTES)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as exc:
+                    await self._respond(writer, exc.status, {"error": str(exc)}, exc.headers, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, payload = await self._dispatch(method, target, body)
+                    extra = {}
+                except HTTPError as exc:
+                    status, payload, extra = exc.status, {"error": str(exc)}, exc.headers
+                except Exception:  # e.g. a broken worker pool; the client still gets an answer
+                    logger.exception("Unhandled error serving %s %s", method, target)
+                    status, payload, extra = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}, {}
+                await self._respond(writer, status, payload, extra, keep_alive)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as exc:
+            if exc.partial.strip():
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Incomplete request head")
+            return None  # client closed an idle keep-alive connection
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request head too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(HTTPStatus.LENGTH_REQUIRED, "Chunked bodies are not supported")
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > self.max_body_bytes:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Body exceeds {self.max_body_bytes} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        payload: Dict[str, Any],
+        headers: Dict[str, str],
+        keep_alive: bool
+    ) -> None:
+        body = json.dumps(payload).encode()
+        head = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        url = urlsplit(target)
+        routes = {
+            ("GET", "/health"): self._health,
+            ("POST", "/analyze"): self._analyze,
+            ("POST", "/batch"): self._batch,
+        }
+        handler = routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in routes):
+                raise HTTPError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {url.path}")
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {url.path}")
+        return HTTPStatus.OK, await handler(parse_qs(url.query), body)
+
+    async def _health(self, query: Dict[str, List[str]], body: bytes) -> Dict[str, Any]:
+        return {"status": "ok", "workers": self.workers, "pending": self.pending, "max_pending": self.max_pending}
+
+    async def _analyze(self, query: Dict[str, List[str]], body: bytes) -> Dict[str, Any]:
+        if not body:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Empty body; send the encoded image bytes")
+        config, contours = self._options(query)
+        record = (await self._run([body], config, contours))[0]
+        if "error" in record:
+            raise HTTPError(HTTPStatus(record["status"]), record["error"])
+        return record
+
+    async def _batch(self, query: Dict[str, List[str]], body: bytes) -> Dict[str, Any]:
+        try:
+            images = [base64.b64decode(item, validate=True) for item in json.loads(body)["images"]]
+        except (ValueError, KeyError, TypeError, binascii.Error):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Body must be JSON {"images": [<base64>, ...]}')
+        config, contours = self._options(query)
+        return {"results": await self._run(images, config, contours)}
+
+    def _options(self, query: Dict[str, List[str]]) -> Tuple[ProcessingConfig, Tuple[bool, bool]]:
+        overrides = {}
+        for param, (field_name, cast) in CONFIG_PARAMS.items():
+            if param in query:
+                try:
+                    overrides[field_name] = cast(query[param][-1])
+                except ValueError:
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid value for {param}")
+        flag = lambda name: query.get(name, ["0"])[-1].lower() in ("1", "true", "yes")
+        return replace(self.config, **overrides), (flag("include_contours"), flag("compact"))
+
+    async def _run(
+        self, images: List[bytes], config: ProcessingConfig, contours: Tuple[bool, bool]
+    ) -> List[Dict[str, Any]]:
+        if len(images) > self.max_pending:
+            # Could never be admitted, so retrying is pointless
+            raise HTTPError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"Batch of {len(images)} images exceeds the limit of {self.max_pending}"
+            )
+        # Backpressure: reject up front rather than queueing without bound
+        if self.pending + len(images) > self.max_pending:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Server busy, retry later", {"Retry-After": "1"})
+        self.pending += len(images)
+        loop = asyncio.get_running_loop()
+        futures = []
+        try:
+            for data in images:
+                futures.append(self.executor.submit(_analyze_encoded, data, config, *contours))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            self.pending -= len(images) - len(futures)
+            raise
+        finally:
+            # A slot is freed when its image is done in the pool, not when the request gives up on it
+            for future in futures:
+                future.add_done_callback(lambda _: self._release(loop))
+        try:
+            return list(await asyncio.wait_for(
+                asyncio.gather(*(asyncio.wrap_future(future) for future in futures)), self.timeout
+            ))
+        except asyncio.TimeoutError:
+            for future in futures:
+                future.cancel()  # only succeeds for images still queued
+            raise HTTPError(HTTPStatus.GATEWAY_TIMEOUT, f"Analysis exceeded {self.timeout:.0f}s")
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Done callback of a pool future; runs on whichever thread completed it."""
+        def release():
+            self.pending -= 1
+        try:
+            loop.call_soon_threadsafe(release)
+        except RuntimeError:
+            pass  # loop already closed at shutdown
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Local HTTP analysis service.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind.")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument("--threads", action="store_true", help="Use a thread pool instead of processes.")
+    parser.add_argument("--max-pending", type=int, default=64, help="Images queued or in flight before answering 503.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds per request before answering 504.")
+
+    defaults = ProcessingConfig()
+    group = parser.add_argument_group("processing defaults")
+    group.add_argument("--canny1", type=int, default=defaults.canny_threshold1, help="Lower Canny threshold.")
+    group.add_argument("--canny2", type=int, default=defaults.canny_threshold2, help="Upper Canny threshold.")
+    group.add_argument("--blur", type=int, default=defaults.gaussian_kernel, help="Gaussian kernel size.")
+    group.add_argument("--min-area", type=float, default=defaults.min_area, help="Minimum contour area (px).")
+    group.add_argument("--max-area", type=float, default=defaults.max_area, help="Maximum contour area (px).")
+    return parser
+
+
+async def serve(server: AnalysisServer, host: str, port: int) -> None:
+    listener = await server.start(host, port)
+    bound = ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+    print(f"Listening on {bound} with {server.workers} workers", file=sys.stderr)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    config = ProcessingConfig(
+        canny_threshold1=args.canny1,
+        canny_threshold2=args.canny2,
+        min_area=args.min_area,
+        max_area=args.max_area,
+        gaussian_kernel=args.blur
+    )
+    workers = args.workers or os.cpu_count() or 1
+    executor = ThreadPoolExecutor(max_workers=workers) if args.threads else None
+    server = AnalysisServer(
+        config,
+        workers=workers,
+        max_pending=args.max_pending,
+        timeout=args.timeout,
+        executor=executor
+    )
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,177 @@
+import time
 import streamlit as st
 import numpy as np
+from dataclasses import astuple
+from typing import Callable, Optional, Tuple
 import pandas as pd
-from PIL import Image
-from typing import List
 from src.analyzer import ImageAnalyzer
-from src.models import ShapeInfo, ProcessingConfig
-from .visuals import draw_results
+from src.background import BackgroundRunner, CancelToken
+from src.cache import StageCache
+from src.loader import ImageLoader, reduction_for
+from src.models import PipelineStats, ShapeResultSet, ProcessingConfig
+from src.result_cache import ResultCache
+from src.spatial import ShapeIndex
+from src.tuning import CannyTuner
+from .visuals import OverlayRenderer
+
+# Widest overlay worth rendering; Streamlit columns display less than this
+DISPLAY_MAX_WIDTH = 1600
+
+# Uploads above this size get a fast preview before the full-resolution pass
+PREVIEW_MIN_PIXELS = 4_000_000
+
+# Slider drags rerun the script per value; a job starts once they pause this long
+DEBOUNCE_SECONDS = 0.2
+# How long a rerun waits for its job before showing progress instead
+FOREGROUND_WAIT_SECONDS = 0.4
+# Rerun interval while a job is in flight
+POLL_SECONDS = 0.25
+
+def _session_stage_cache() -> StageCache:
+    """Stage cache that survives reruns within one browser session."""
+    if "stage_cache" not in st.session_state:
+        st.session_state["stage_cache"] = StageCache(max_entries=16)
+    return st.session_state["stage_cache"]
+
+@st.cache_resource
+def _shared_result_cache() -> ResultCache:
+    """On-disk results shared by every session and by batch runs on the same directory."""
+    return ResultCache()
+
+def _session_loader() -> ImageLoader:
+    """Decoded uploads, kept across reruns within one browser session."""
+    if "image_loader" not in st.session_state:
+        st.session_state["image_loader"] = ImageLoader(max_bytes=512 * 1024 * 1024)
+    return st.session_state["image_loader"]
+
+def _session_renderer() -> OverlayRenderer:
+    """Overlay renderer whose output buffer is reused across reruns."""
+    if "overlay_renderer" not in st.session_state:
+        st.session_state["overlay_renderer"] = OverlayRenderer(max_width=DISPLAY_MAX_WIDTH, reuse_buffer=True)
+    return st.session_state["overlay_renderer"]
+
+def _session_runner() -> BackgroundRunner:
+    """Background analysis worker of this browser session."""
+    if "analysis_runner" not in st.session_state:
+        st.session_state["analysis_runner"] = BackgroundRunner(debounce=DEBOUNCE_SECONDS)
+    return st.session_state["analysis_runner"]
+
+def _analysis_job(
+    image_bgr: np.ndarray,
+    image_key: str,
+    config: ProcessingConfig,
+    auto_canny: bool,
+    cache: StageCache,
+    results_store: ResultCache
+) -> Callable[[CancelToken], Tuple[ProcessingConfig, ShapeResultSet]]:
+    """
+    The analysis for one parameter set, run off the script thread. It only
+    touches the caches it is given, never Streamlit, and checks for
+    cancellation between stages and between refined regions.
+    """
+    def job(token: CancelToken) -> Tuple[ProcessingConfig, ShapeResultSet]:
+        cfg = config
+        if auto_canny:
+            token.report(0.05, "Sweeping Canny thresholds…")
+            cfg = cache.get_or_compute(
+                ("tuning", image_key, cfg.gaussian_kernel, cfg.min_area, cfg.max_area),
+                # Each row of the sweep is a cancellation checkpoint
+                lambda: CannyTuner(cfg).tune(
+                    image_bgr, progress=lambda done: token.report(0.05 + 0.05 * done, token.message)
+                )
+            ).config
+        analyzer = ImageAnalyzer(cfg, cache=cache, instrument=True, result_cache=results_store)
+
+        # Small images are analyzed directly. Large ones first publish a preview
+        # from a downscaled level, then the full-resolution refinement.
+        token.report(0.1, "Detecting shapes…")
+        if image_bgr.shape[0] * image_bgr.shape[1] <= PREVIEW_MIN_PIXELS:
+            return cfg, analyzer.analyze(image_bgr, image_key=image_key)
+
+        def refine() -> ShapeResultSet:
+            preview = analyzer.preview(image_bgr, image_key=image_key)
+            token.report(0.3, "Preview — refining at full resolution…", partial=preview)
+            return analyzer.refine(
+                image_bgr, preview, progress=lambda done: token.report(0.3 + 0.7 * done, token.message)
+            )
+
+        def refined() -> ShapeResultSet:
+            # Another session may have refined this upload already; only a miss pays for the preview
+            results = analyzer.cached(image_key, kind="refined")
+            if results is None:
+                results = refine()
+                results_store.put(results_store.key(image_key, cfg, kind="refined"), results)
+            return results
+
+        return cfg, cache.get_or_compute(("refined", image_key) + astuple(cfg), refined)
+
+    return job
 
 def render_dashboard(uploaded_file, config: ProcessingConfig):
     """
     Main dashboard view.
+
+    Analysis runs on the session's background worker, so dragging a slider
+    never blocks the script: every rerun submits the current parameters,
+    superseding (and cancelling) any older job, and the page shows the
+    newest finished result with a progress bar until the current one lands.
     """
-    # Load Image
-    image_pil = Image.open(uploaded_file)
-    image_np = np.array(image_pil.convert('RGB')) 
-    # Convert RGB to BGR for OpenCV
-    image_bgr = image_np[:, :, ::-1].copy()
-
-    # Process
-    analyzer = ImageAnalyzer(config)
-    results: List[ShapeInfo] = analyzer.analyze(image_bgr)
-    
-    # Visualize
-    result_image_bgr = draw_results(image_bgr, results)
-    # Convert back to RGB for Streamlit
-    result_image_rgb = result_image_bgr[:, :, ::-1]
+    # Load Image: decoded straight to BGR once per upload, then served from
+    # the session cache; the original is shown from a reduced-size decode
+    loader = _session_loader()
+    data = uploaded_file.getvalue()
+    image_key, image_bgr = loader.load(data)
+    _, original_display = loader.load(data, reduce=reduction_for(image_bgr.shape, DISPLAY_MAX_WIDTH), key=image_key)
+
+    # Process (unchanged stages are served from the session cache)
+    # Auto-tuning sweeps Canny thresholds; other backends ignore them
+    auto_canny = bool(st.session_state.get("auto_canny")) and config.backend == "canny"
+    runner = _session_runner()
+    key = (image_key, auto_canny) + astuple(config)
+    runner.submit(
+        key, _analysis_job(image_bgr, image_key, config, auto_canny, _session_stage_cache(), _shared_result_cache())
+    )
+    # Fast jobs land within the wait, so small images render without flicker
+    runner.wait(timeout=FOREGROUND_WAIT_SECONDS)
+    status = runner.status()
+
+    if status.done_key == key:
+        if status.error is not None:
+            st.error(f"Analysis failed: {status.error}")
+            return
+        used_config, results = status.result
+        if auto_canny:
+            st.sidebar.caption(
+                f"Auto thresholds: {used_config.canny_threshold1} / {used_config.canny_threshold2}"
+            )
+        _render_results(results, original_display, image_bgr)
+        _render_inspector(results, image_bgr.shape)
+        return
+
+    # Still computing: show the freshest thing there is, then poll
+    st.progress(status.progress, text=status.message or "Waiting for the sliders to settle…")
+    shown = status.partial
+    note = status.message
+    if shown is None and status.done_key is not None and status.done_key[0] == image_key and status.error is None:
+        shown = status.result[1]
+        note = "Previous settings — updating…"
+    if shown is not None:
+        _render_results(shown, original_display, image_bgr, note=note)
+    time.sleep(POLL_SECONDS)
+    st.rerun()
+
+def _render_results(results: ShapeResultSet, original_display: np.ndarray, image_bgr: np.ndarray, note: Optional[str] = None):
+    """KPIs, overlay and statistics table for one result set."""
+    # Visualize at display resolution
+    result_image_bgr = _session_renderer().render(image_bgr, results)
 
     # Key Performance Indicators (KPIs) Display
     st.markdown("### Analysis Results")
+    if note:
+        st.caption(note)
     
-    unique_shapes = set(s.shape_type for s in results)
-    largest_shape = max(results, key=lambda x: x.area) if results else None
+    unique_shapes = set(results.shape_types)
+    largest_shape = results[int(np.argmax(results.area))] if len(results) else None
     largest_text = f"{largest_shape.shape_type}" if largest_shape else "N/A"
     
     # Aggregated Metrics Container
@@ -62,26 +203,70 @@ def render_dashboard(uploaded_file, config: ProcessingConfig):
     with col1:
         st.subheader("Original Image")
         # Render Images within styled container
-        st.image(image_pil, use_container_width=True)
+        st.image(original_display, channels="BGR", use_container_width=True)
         
     with col2:
         st.subheader("Detected Shapes")
-        st.image(result_image_rgb, use_container_width=True)
+        st.image(result_image_bgr, channels="BGR", use_container_width=True)
 
     # Detailed Stats Table
-    if results:
+    if len(results):
         st.markdown("### Detailed Statistics")
-        data = []
-        for i, r in enumerate(results):
-            data.append({
-                "ID": i+1,
-                "Type": r.shape_type,
-                "Area (px²)": f"{r.area:.1f}",
-                "Perimeter (px)": f"{r.perimeter:.1f}",
-                "Centroid (X,Y)": str(r.centroid)
-            })
-        
-        df = pd.DataFrame(data)
+        # Built column-wise from the result set instead of row by row
+        columns = results.to_dataframe()
+        df = pd.DataFrame({
+            "ID": np.arange(1, len(results) + 1),
+            "Type": columns["shape_type"],
+            "Area (px²)": columns["area"].map("{:.1f}".format),
+            "Perimeter (px)": columns["perimeter"].map("{:.1f}".format),
+            "Centroid (X,Y)": "(" + columns["centroid_x"].astype(str) + ", " + columns["centroid_y"].astype(str) + ")"
+        })
         st.dataframe(df, use_container_width=True)
     else:
         st.warning("No shapes detected. Try adjusting the thresholds in the sidebar.")
+
+    _render_performance(results.stats)
+
+def _render_inspector(results: ShapeResultSet, shape: Tuple[int, ...]):
+    """Point selection: the shape under a pixel and the shapes nearest to it."""
+    if not len(results):
+        return
+    with st.expander("Inspect Point"):
+        c1, c2, c3 = st.columns(3)
+        x = c1.number_input("X", min_value=0, max_value=shape[1] - 1, value=shape[1] // 2, key="inspect_x")
+        y = c2.number_input("Y", min_value=0, max_value=shape[0] - 1, value=shape[0] // 2, key="inspect_y")
+        k = c3.number_input("Nearest", min_value=1, max_value=min(20, len(results)), value=min(3, len(results)), key="inspect_k")
+
+        index = ShapeIndex(results)
+        under = index.at(int(x), int(y))
+        if len(under):
+            shape_info = results[int(under[0])]
+            st.success(f"Shape #{int(under[0]) + 1} at ({x}, {y}): {shape_info.shape_type}, area {shape_info.area:.1f} px²")
+        else:
+            st.info(f"No shape contains ({x}, {y}).")
+
+        nearest, distance = index.nearest(float(x), float(y), int(k))
+        st.dataframe(pd.DataFrame({
+            "ID": nearest + 1,
+            "Type": results.shape_types[nearest],
+            "Distance (px)": np.round(distance, 1),
+        }), use_container_width=True, hide_index=True)
+
+def _render_performance(stats: Optional[PipelineStats]):
+    """Collapsible per-stage timing breakdown of the last run."""
+    if stats is None:
+        return
+    with st.expander("Performance"):
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Total", f"{stats.total_ms:.1f} ms")
+        c2.metric("Contours kept / found", f"{stats.contours_kept} / {stats.contours_found}")
+        c3.metric("Megapixels", f"{stats.pixels / 1e6:.2f}")
+        if stats.stages_ms:
+            st.dataframe(pd.DataFrame({
+                "Stage": list(stats.stages_ms),
+                "Time (ms)": [f"{ms:.2f}" for ms in stats.stages_ms.values()],
+            }), use_container_width=True, hide_index=True)
+        if "result_cache" in stats.stages_ms:
+            st.caption("Served from the shared result cache.")
+        elif stats.cache_hits:
+            st.caption(f"{stats.cache_hits} stage(s) served from the session cache.")
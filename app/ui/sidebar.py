@@ -1,5 +1,6 @@
 import streamlit as st
 from src.models import ProcessingConfig
+from src.processors import EXTRACTION_BACKENDS, FOREGROUNDS
 
 def render_sidebar() -> ProcessingConfig:
     """
@@ -55,8 +56,23 @@ def render_sidebar() -> ProcessingConfig:
     st.sidebar.title("Parameters")
     
     st.sidebar.markdown("### Edge Detection Settings")
-    t1 = st.sidebar.slider("Lower Threshold (Hysteresis)", 0, 255, 50, help="Lower bound for edge detection.")
-    t2 = st.sidebar.slider("Upper Threshold (Hysteresis)", 0, 255, 150, help="Upper bound for edge detection.")
+    backend = st.sidebar.selectbox(
+        "Extraction Backend", EXTRACTION_BACKENDS,
+        index=EXTRACTION_BACKENDS.index(ProcessingConfig.backend),
+        help="Canny edges, or a binary object mask from Otsu, adaptive or connected-component thresholding."
+    )
+    canny = backend == "canny"
+    foreground = st.sidebar.selectbox(
+        "Foreground", FOREGROUNDS, disabled=canny,
+        help="Whether objects are brighter or darker than the background (threshold backends)."
+    )
+    # Read by render_dashboard, which sweeps the thresholds when enabled; the sweep only applies to Canny
+    auto = st.sidebar.checkbox(
+        "Auto", key="auto_canny", disabled=not canny,
+        help="Pick thresholds automatically with a one-pass sweep (Canny backend only)."
+    ) and canny
+    t1 = st.sidebar.slider("Lower Threshold (Hysteresis)", 0, 255, 50, disabled=auto or not canny, help="Lower bound for edge detection.")
+    t2 = st.sidebar.slider("Upper Threshold (Hysteresis)", 0, 255, 150, disabled=auto or not canny, help="Upper bound for edge detection.")
     
     st.sidebar.markdown("### Noise Reduction")
     k_size = st.sidebar.slider("Blur Kernel Size", 1, 15, 5, step=2, help="Smoothing kernel size to reduce noise.")
@@ -100,5 +116,9 @@ def render_sidebar() -> ProcessingConfig:
         canny_threshold2=t2,
         min_area=min_area,
         max_area=max_area,
-        gaussian_kernel=k_size
+        gaussian_kernel=k_size,
+        backend=backend,
+        foreground=foreground,
+        # Interactive latency: spread the per-contour stages over every core
+        threads=0
     )
@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, asdict, replace
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+# Ensure project root is in path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.analyzer import ContourTable, ImageAnalyzer
+from src.models import ProcessingConfig
+from src.processors import EXTRACTION_BACKENDS
+from benchmarks.scenes import generate_scene, score_detections
+
+STAGES = ("grayscale", "blur", "canny", "find_contours", "measure", "classify")
+
+@dataclass
+class BenchmarkCase:
+    """One synthetic workload."""
+    width: int
+    height: int
+    n_shapes: int
+    noise: float
+    clutter: int = 0
+
+    @property
+    def name(self) -> str:
+        name = f"{self.width}x{self.height}_s{self.n_shapes}_n{self.noise:g}"
+        return name + f"_c{self.clutter}" if self.clutter else name
+
+DEFAULT_CASES = [
+    BenchmarkCase(w, h, n, noise)
+    for w, h in ((640, 480), (1920, 1080), (4000, 3000))
+    for n in (20, 200)
+    for noise in (0.0, 0.08)
+] + [BenchmarkCase(1920, 1080, 50, 0.0, clutter=20000)]
+
+QUICK_CASES = [
+    BenchmarkCase(640, 480, 20, 0.0),
+    BenchmarkCase(1280, 720, 100, 0.08),
+]
+
+def _median_ms(fn: Callable, repeat: int, setup: Optional[Callable[[], object]] = None) -> float:
+    """Median wall time of ``fn``; with ``setup``, ``fn`` receives its untimed result."""
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        fn(arg) if setup is not None else fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(samples)
+
+def time_stages(image: np.ndarray, config: ProcessingConfig, repeat: int) -> Dict[str, float]:
+    """Median wall time in milliseconds of every pipeline stage."""
+    analyzer = ImageAnalyzer(config)
+    p, d = analyzer.processor, analyzer.detector
+
+    gray = p.to_grayscale(image)
+    blur = p.apply_blur(gray, config.gaussian_kernel)
+    edges = p.detect_edges(blur, config.canny_threshold1, config.canny_threshold2)
+    contours = p.get_contours(edges)
+
+    return {
+        "grayscale": _median_ms(lambda: p.to_grayscale(image), repeat),
+        "blur": _median_ms(lambda: p.apply_blur(gray, config.gaussian_kernel), repeat),
+        "canny": _median_ms(lambda: p.detect_edges(blur, config.canny_threshold1, config.canny_threshold2), repeat),
+        "find_contours": _median_ms(lambda: p.get_contours(edges), repeat),
+        "measure": _median_ms(lambda: ContourTable(contours, d), repeat),
+        # A fresh table each time, so classification is never served from its memo
+        "classify": _median_ms(
+            lambda table: table.select(config.min_area, config.max_area), repeat,
+            setup=lambda: ContourTable(contours, d)
+        ),
+    }
+
+def run_case(case: BenchmarkCase, config: ProcessingConfig, repeat: int) -> Dict[str, object]:
+    scene = generate_scene(case.width, case.height, case.n_shapes, case.noise, seed=0, clutter=case.clutter)
+    analyzer = ImageAnalyzer(config)
+    results = analyzer.analyze(scene.image)
+    recall, accuracy = score_detections(scene, results)
+    end_to_end = _median_ms(lambda: analyzer.analyze(scene.image), repeat)
+    return {
+        "case": asdict(case),
+        "stages_ms": time_stages(scene.image, config, repeat),
+        "end_to_end_ms": end_to_end,
+        "images_per_s": 1000.0 / end_to_end if end_to_end > 0 else float("inf"),
+        "megapixels_per_s": case.width * case.height / 1e3 / end_to_end if end_to_end > 0 else float("inf"),
+        "shapes_expected": len(scene.shapes),
+        "shapes_detected": len(results),
+        "recall": recall,
+        "accuracy": accuracy,
+    }
+
+def run_benchmarks(cases: List[BenchmarkCase], config: ProcessingConfig, repeat: int) -> Dict[str, object]:
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "config": asdict(config),
+        },
+        "cases": {case.name: run_case(case, config, repeat) for case in cases},
+    }
+
+def pick_backend(
+    cases: List[BenchmarkCase],
+    config: ProcessingConfig,
+    repeat: int,
+    min_recall: float = 0.95,
+    min_accuracy: float = 0.9,
+    backends=EXTRACTION_BACKENDS
+) -> Dict[str, object]:
+    """
+    Times every extraction backend end to end over ``cases`` and selects
+    the fastest one whose worst recall and accuracy across the cases meet
+    the targets (``None`` when none does).
+    """
+    scenes = [
+        generate_scene(c.width, c.height, c.n_shapes, c.noise, seed=0, clutter=c.clutter) for c in cases
+    ]
+    report = {}
+    for backend in backends:
+        analyzer = ImageAnalyzer(replace(config, backend=backend))
+        scores = [score_detections(scene, analyzer.analyze(scene.image)) for scene in scenes]
+        recall = min(r for r, _ in scores)
+        accuracy = min(a for _, a in scores)
+        report[backend] = {
+            "total_ms": sum(_median_ms(lambda: analyzer.analyze(scene.image), repeat) for scene in scenes),
+            "recall": recall,
+            "accuracy": accuracy,
+            "eligible": recall >= min_recall and accuracy >= min_accuracy,
+        }
+    eligible = [name for name, entry in report.items() if entry["eligible"]]
+    selected = min(eligible, key=lambda name: report[name]["total_ms"]) if eligible else None
+    return {"backends": report, "selected": selected}
+
+def compare_to_baseline(
+    current: Dict[str, object],
+    baseline: Dict[str, object],
+    tolerance: float = 0.25,
+    min_delta_ms: float = 1.0
+) -> List[str]:
+    """
+    Lists every stage or end-to-end time that regressed by more than
+    ``tolerance`` (relative) and ``min_delta_ms`` (absolute) against the
+    baseline. Cases missing from either side are skipped.
+    """
+    regressions = []
+    for name, base in baseline["cases"].items():
+        cur = current["cases"].get(name)
+        if cur is None:
+            continue
+        metrics = [(f"stage {s}", base["stages_ms"].get(s), cur["stages_ms"].get(s)) for s in STAGES]
+        metrics.append(("end-to-end", base["end_to_end_ms"], cur["end_to_end_ms"]))
+        for label, before, after in metrics:
+            if before is None or after is None:
+                continue
+            if after - before > max(tolerance * before, min_delta_ms):
+                regressions.append(
+                    f"{name}: {label} {before:.2f}ms -> {after:.2f}ms (+{(after / before - 1) * 100 if before else float('inf'):.0f}%)"
+                )
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pipeline benchmarks on synthetic scenes.")
+    parser.add_argument("--quick", action="store_true", help="Run the small case set.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement (median is kept).")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout).")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown per metric.")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore slowdowns smaller than this.")
+    parser.add_argument("--pick-backend", action="store_true",
+                        help="Select the fastest extraction backend meeting the accuracy targets instead.")
+    parser.add_argument("--min-recall", type=float, default=0.95, help="Recall target for --pick-backend.")
+    parser.add_argument("--min-accuracy", type=float, default=0.9, help="Accuracy target for --pick-backend.")
+    args = parser.parse_args(argv)
+
+    cases = QUICK_CASES if args.quick else DEFAULT_CASES
+    if args.pick_backend:
+        choice = pick_backend(cases, ProcessingConfig(max_area=1e7), args.repeat, args.min_recall, args.min_accuracy)
+        print(json.dumps(choice, indent=2))
+        return 0 if choice["selected"] else 1
+    results = run_benchmarks(cases, ProcessingConfig(max_area=1e7), args.repeat)
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(payload + "\n")
+    else:
+        print(payload)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        regressions = compare_to_baseline(results, baseline, args.tolerance, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.baseline}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
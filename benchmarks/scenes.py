@@ -0,0 +1,116 @@
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+SHAPE_TYPES = ("Triangle", "Square", "Rectangle", "Pentagon", "Circle")
+
+@dataclass
+class SceneShape:
+    """Ground truth for one drawn shape."""
+    shape_type: str
+    center: Tuple[int, int]
+    contour: np.ndarray
+
+@dataclass
+class Scene:
+    """Synthetic BGR image with the shapes drawn into it."""
+    image: np.ndarray
+    shapes: List[SceneShape] = field(default_factory=list)
+
+def regular_polygon_contour(sides: int, radius: int, center: Tuple[int, int], rotation: float = 0.0) -> np.ndarray:
+    """Regular polygon in OpenCV's (N, 1, 2) contour layout."""
+    angles = rotation + 2 * np.pi * np.arange(sides) / sides
+    points = np.stack([center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)], axis=1)
+    return np.round(points).astype(np.int32).reshape((-1, 1, 2))
+
+def rectangle_contour(w: int, h: int, origin: Tuple[int, int] = (0, 0)) -> np.ndarray:
+    x, y = origin
+    return np.array([
+        [x, y], [x + w, y], [x + w, y + h], [x, y + h]
+    ], dtype=np.int32).reshape((-1, 1, 2))
+
+def _shape_contour(shape_type: str, center: Tuple[int, int], radius: int, rng: np.random.Generator) -> np.ndarray:
+    cx, cy = center
+    if shape_type == "Triangle":
+        return regular_polygon_contour(3, radius, center, rotation=-np.pi / 2)
+    if shape_type == "Pentagon":
+        return regular_polygon_contour(5, radius, center, rotation=-np.pi / 2)
+    if shape_type == "Circle":
+        return regular_polygon_contour(48, radius, center)
+    if shape_type == "Square":
+        side = int(radius * 1.4)
+        return rectangle_contour(side, side, (cx - side // 2, cy - side // 2))
+    # Rectangle: clearly outside the 5% square tolerance
+    w = int(radius * 1.8)
+    h = int(w * rng.uniform(0.35, 0.7))
+    return rectangle_contour(w, h, (cx - w // 2, cy - h // 2))
+
+def generate_scene(
+    width: int,
+    height: int,
+    n_shapes: int,
+    noise: float = 0.0,
+    seed: int = 0,
+    clutter: int = 0
+) -> Scene:
+    """
+    Draws up to ``n_shapes`` non-overlapping filled shapes on a dark
+    background, one per cell of a regular grid, then adds Gaussian noise
+    with standard deviation ``noise * 255``. ``clutter`` scatters that many
+    specks of at most 3x3 pixels first, all well below any useful
+    ``min_area``; shapes are drawn over the ones they cover.
+    """
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), 20, dtype=np.uint8)
+    scene = Scene(image=image)
+
+    cols = max(1, int(np.ceil(np.sqrt(n_shapes * width / height))))
+    rows = max(1, int(np.ceil(n_shapes / cols)))
+    cell_w, cell_h = width // cols, height // rows
+    radius = int(min(cell_w, cell_h) * 0.35)
+    if radius < 6:
+        raise ValueError("too many shapes for the requested resolution")
+
+    if clutter:
+        xs = rng.integers(0, width - 3, clutter)
+        ys = rng.integers(0, height - 3, clutter)
+        sizes = rng.integers(1, 4, clutter)
+        for x, y, size in zip(xs.tolist(), ys.tolist(), sizes.tolist()):
+            image[y:y + size, x:x + size] = 200
+
+    for index in range(min(n_shapes, rows * cols)):
+        row, col = divmod(index, cols)
+        center = (col * cell_w + cell_w // 2, row * cell_h + cell_h // 2)
+        shape_type = SHAPE_TYPES[int(rng.integers(len(SHAPE_TYPES)))]
+        contour = _shape_contour(shape_type, center, radius, rng)
+        color = tuple(int(c) for c in rng.integers(120, 256, 3))
+        cv2.fillPoly(image, [contour], color)
+        scene.shapes.append(SceneShape(shape_type=shape_type, center=center, contour=contour))
+
+    if noise > 0:
+        noisy = image.astype(np.float32) + rng.normal(0, noise * 255, image.shape).astype(np.float32)
+        scene.image = np.clip(noisy, 0, 255).astype(np.uint8)
+    return scene
+
+def score_detections(scene: Scene, results, max_distance: float = 10.0) -> Tuple[float, float]:
+    """
+    (recall, accuracy) of detected shapes against the scene's ground truth.
+
+    A truth shape is recalled when a detection's centroid lies within
+    ``max_distance`` of its center, and counted accurate when that
+    detection also has the right type.
+    """
+    if not scene.shapes:
+        return 1.0, 1.0
+    centers = np.array([s.center for s in scene.shapes], dtype=np.float64)
+    centroids = np.asarray(results.centroid, dtype=np.float64).reshape(-1, 2)
+    if not len(centroids):
+        return 0.0, 0.0
+    dist = np.linalg.norm(centers[:, None, :] - centroids[None, :, :], axis=2)
+    nearest = dist.argmin(axis=1)
+    found = dist[np.arange(len(centers)), nearest] <= max_distance
+    types = results.shape_types
+    correct = found & np.array([types[j] == s.shape_type for j, s in zip(nearest, scene.shapes)])
+    return float(found.mean()), float(correct.mean())
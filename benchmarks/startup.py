@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Sequence
+
+# Ensure project root is in path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+# Modules analysis workers and headless entry points load
+CORE_MODULES = ("src.analyzer", "src.batch", "src.video", "src.tiling", "src.export", "src.result_cache")
+HEADLESS_ENTRY_POINTS = ("app.cli", "app.server")
+# Third-party packages the headless paths may load at import time
+ALLOWED_PACKAGES = ("numpy", "cv2")
+
+# Runs in a fresh interpreter: imports the modules, then optionally analyzes
+# one small image, and reports timings and the third-party packages loaded
+_PROBE = r"""
+import json, sys, time
+preloaded = set(sys.modules)  # e.g. by site hooks; not the probed modules' doing
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+imported = time.perf_counter()
+first_ms = None
+if {analyze!r}:
+    import numpy as np, cv2
+    from src.analyzer import ImageAnalyzer
+    from src.models import ProcessingConfig
+    image = np.zeros((240, 320, 3), dtype=np.uint8)
+    cv2.rectangle(image, (40, 40), (140, 140), (255, 255, 255), -1)
+    ImageAnalyzer(ProcessingConfig()).analyze(image)
+    first_ms = (time.perf_counter() - imported) * 1000.0
+packages = set()
+for name, module in list(sys.modules.items()):
+    if name in preloaded:
+        continue
+    origin = getattr(module, "__file__", None) or ""
+    if "site-packages" in origin or "dist-packages" in origin:
+        packages.add(name.partition(".")[0])
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000.0,
+    "first_analysis_ms": first_ms,
+    "packages": sorted(packages),
+}}))
+"""
+
+def probe(modules: Sequence[str], analyze: bool = False) -> Dict[str, object]:
+    """
+    Imports ``modules`` in a fresh interpreter and reports the import time,
+    the wall time of the whole process (interpreter start included), the
+    first analysis time when ``analyze`` is set, and every third-party
+    top-level package that ended up loaded.
+    """
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(modules=tuple(modules), analyze=analyze)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    report["process_ms"] = (time.perf_counter() - start) * 1000.0
+    return report
+
+def measure_startup(modules: Sequence[str], repeat: int) -> Dict[str, object]:
+    """Median import, first-analysis and process times over ``repeat`` cold starts."""
+    runs = [probe(modules, analyze=True) for _ in range(repeat)]
+    return {
+        "import_ms": statistics.median(r["import_ms"] for r in runs),
+        "first_analysis_ms": statistics.median(r["first_analysis_ms"] for r in runs),
+        "process_ms": statistics.median(r["process_ms"] for r in runs),
+        "packages": runs[-1]["packages"],
+        "unexpected_packages": sorted(set(runs[-1]["packages"]) - set(ALLOWED_PACKAGES)),
+    }
+
+def check_startup(report: Dict[str, object], max_import_ms: float) -> List[str]:
+    """Every way ``report`` breaks the startup budget."""
+    problems = []
+    if report["unexpected_packages"]:
+        problems.append(f"heavy imports on the headless path: {', '.join(report['unexpected_packages'])}")
+    if report["import_ms"] > max_import_ms:
+        problems.append(f"import took {report['import_ms']:.0f}ms (budget {max_import_ms:.0f}ms)")
+    return problems
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time and cold-start benchmark of the headless core.")
+    parser.add_argument("--repeat", type=int, default=5, help="Cold starts measured (median is kept).")
+    parser.add_argument("--max-import-ms", type=float, default=1000.0, help="Fail when importing takes longer.")
+    args = parser.parse_args(argv)
+
+    report = measure_startup(CORE_MODULES + HEADLESS_ENTRY_POINTS, args.repeat)
+    print(json.dumps(report, indent=2))
+    problems = check_startup(report, args.max_import_ms)
+    for line in problems:
+        print(f"STARTUP {line}", file=sys.stderr)
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
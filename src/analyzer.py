@@ -1,63 +1,625 @@
+import os
+import time
 import cv2
 import numpy as np
-from typing import List
-from .models import ShapeInfo, ProcessingConfig
-from .processors import ImageProcessor
+from dataclasses import replace
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+from .models import RESULT_COLUMNS, LazyShapeResultSet, PipelineStats, ShapeResultSet, ProcessingConfig
+from .processors import EXTRACTION_BACKENDS, FOREGROUNDS, GLOBAL_THRESHOLD_BACKENDS, ImageProcessor
 from .detectors import ShapeDetector
+from .cache import StageCache, content_hash
+from .buffers import BufferPool
+from .geometry import (
+    ContourBatch, ContourFeatures, approximate_contours, bounding_boxes, boxes_inside, boxes_intersect,
+    clean_zone, contour_areas, contour_blocks, contour_centroids, contour_perimeters, merge_boxes, pad_box
+)
+
+if TYPE_CHECKING:
+    # Only needed by callers that attach one; kept off the import path of the core
+    from concurrent.futures import Executor, ThreadPoolExecutor
+    from .result_cache import ResultCache
+    from .templates import TemplateLibrary
+
+# Below this many contour points the per-contour stages stay on the calling thread
+PARALLEL_MIN_POINTS = 1 << 16
+
+@lru_cache(maxsize=None)
+def _thread_pool(threads: int) -> "ThreadPoolExecutor":
+    """Process-wide pool per size, shared by every analyzer that asks for it."""
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=threads, thread_name_prefix="contours")
+
+class ContourTable:
+    """
+    All contours found in an edge map, packed into one point buffer.
+
+    Nothing is measured up front: area, perimeter, centroid and bounding
+    box are computed in vectorized passes for just the contours a caller
+    asks about, and memoized per contour. Polygon approximation and
+    classification likewise run only for selected contours, so
+    re-filtering with a different area range only measures and classifies
+    contours not seen before.
+
+    With a thread pool, measurement and polygon approximation are split
+    into contiguous contour ranges; NumPy and ``approxPolyDP`` release the
+    GIL while they work, and results are joined in contour order, so
+    output is identical to a single-threaded run.
+    """
+
+    # name -> (vectorized measurement, per-contour shape, dtype)
+    MEASURES: Dict[str, Tuple[Callable[[ContourBatch], np.ndarray], Tuple[int, ...], type]] = {
+        "area": (contour_areas, (), np.float64),
+        "perimeter": (contour_perimeters, (), np.float64),
+        "centroid": (contour_centroids, (2,), np.int64),
+        "bbox": (bounding_boxes, (4,), np.int64),
+    }
+
+    def __init__(
+        self,
+        contours: Sequence[np.ndarray],
+        detector: ShapeDetector,
+        pool: Optional["Executor"] = None,
+        parts: int = 1
+    ):
+        self.batch = ContourBatch.from_contours(contours)
+        self.detector = detector
+        if pool is None or parts < 2 or len(self.batch.points) < PARALLEL_MIN_POINTS:
+            self.pool, self.parts = None, 1
+        else:
+            self.pool, self.parts = pool, parts
+        # Memoized measurements, valid where the matching mask is set
+        self._values: Dict[str, np.ndarray] = {}
+        self._known: Dict[str, np.ndarray] = {}
+        # -1 marks contours that have not been classified yet
+        self._codes = np.full(len(self.batch), -1, dtype=np.int16)
+        self._approx: List[Optional[np.ndarray]] = [None] * len(self.batch)
+
+    def __len__(self) -> int:
+        return len(self.batch)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Bytes held by the packed points and per-contour columns, counting
+        every measurement column as allocated (they fill in after a stage
+        cache has sized the table) and the polygons approximated so far.
+        """
+        total = self.batch.points.nbytes + self.batch.offsets.nbytes + self._codes.nbytes
+        for _, shape, dtype in self.MEASURES.values():
+            # Values plus the bool mask of which contours are known
+            total += len(self) * (int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize + 1)
+        return total + sum(approx.nbytes for approx in self._approx if approx is not None)
+
+    @property
+    def areas(self) -> np.ndarray:
+        return self.measure("area")
+
+    @property
+    def bbox(self) -> np.ndarray:
+        return self.measure("bbox")
+
+    @property
+    def features(self) -> ContourFeatures:
+        """Every measurement of every contour."""
+        return ContourFeatures(
+            area=self.areas,
+            perimeter=self.measure("perimeter"),
+            centroid=self.measure("centroid"),
+            bbox=self.bbox
+        )
+
+    def measure(self, name: str, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Measurement ``name`` (a key of ``MEASURES``) of the given contours,
+        or of all of them; only contours not measured before are computed.
+        """
+        function, shape, dtype = self.MEASURES[name]
+        known = self._known.get(name)
+        if known is None:
+            self._values[name] = np.zeros((len(self),) + shape, dtype=dtype)
+            known = self._known[name] = np.zeros(len(self), dtype=bool)
+        todo = np.flatnonzero(~known) if indices is None else np.asarray(indices, dtype=np.int64)
+        if indices is not None and len(todo):
+            todo = todo[~known[todo]]
+        if len(todo):
+            first, last = int(todo.min()), int(todo.max()) + 1
+            offsets = self.batch.offsets
+            if 2 * self.batch.counts[todo].sum() >= offsets[last] - offsets[first]:
+                # Gathering scattered points costs about as much as measuring
+                # them, so a dense selection measures its whole span (a view)
+                todo = np.arange(first, last)
+            self._values[name][todo] = self._blockwise(function, todo)
+            known[todo] = True
+        return self._values[name] if indices is None else self._values[name][indices]
+
+    def candidates(self, min_area: float, max_area: float) -> np.ndarray:
+        """
+        Indices of the contours whose area lies within [min_area, max_area].
+
+        Contours of fewer than three points enclose no area and are
+        rejected from their point counts alone, before any point is read.
+        """
+        indices = np.arange(len(self))
+        if min_area > 0:
+            indices = indices[self.batch.counts >= 3]
+        areas = self.measure("area", indices)
+        return indices[(areas >= min_area) & (areas <= max_area)]
+
+    def select(
+        self,
+        min_area: float,
+        max_area: float,
+        fields: Optional[Sequence[str]] = None
+    ) -> ShapeResultSet:
+        """Returns the shapes whose area lies within [min_area, max_area]."""
+        return self.shapes(self.candidates(min_area, max_area), fields)
+
+    def shapes(self, keep: np.ndarray, fields: Optional[Sequence[str]] = None) -> ShapeResultSet:
+        """
+        Builds the result set for the given contour indices, in order.
+
+        With ``fields`` only those columns (and ``area``) are measured now;
+        a ``LazyShapeResultSet`` measures the others when first read.
+        """
+        keep = np.asarray(keep, dtype=np.int64)
+        labels = tuple(self.detector.SHAPE_LABELS.tolist())
+        if fields is None:
+            return ShapeResultSet(labels, **{name: self.column(name, keep) for name in RESULT_COLUMNS})
+        wanted = dict.fromkeys(("area",) + tuple(fields))
+        return LazyShapeResultSet(labels, keep, self.column, {name: self.column(name, keep) for name in wanted})
+
+    def column(self, name: str, indices: np.ndarray) -> Any:
+        """One ``ShapeResultSet`` column for the given contour indices."""
+        if name in ("shape_codes", "approx"):
+            self._classify(indices[self._codes[indices] < 0])
+            if name == "shape_codes":
+                return self._codes[indices]
+            return ContourBatch.from_contours([self._approx[i] for i in indices])
+        if name == "contours":
+            return self.batch.take(indices)
+        if name in ("centroid", "bbox"):
+            return self.measure(name, indices).astype(np.int32)
+        if name in ("area", "perimeter"):
+            return self.measure(name, indices)
+        raise ValueError(f"Unknown result column '{name}'")
+
+    def _blockwise(self, measure: Callable[[ContourBatch], np.ndarray], indices: np.ndarray) -> np.ndarray:
+        batch = self.batch.take(indices)
+        if self.pool is None or len(batch.points) < PARALLEL_MIN_POINTS:
+            return measure(batch)
+        # Several ranges per thread even out contours of very different lengths
+        blocks = contour_blocks(batch, -(-len(batch.points) // (4 * self.parts)))
+        return np.concatenate(list(self.pool.map(
+            lambda block: measure(batch.take(np.arange(*block))), blocks
+        )))
+
+    def _classify(self, indices: np.ndarray) -> None:
+        if not len(indices):
+            return
+        # One approxPolyDP per contour, reusing the measured perimeter
+        self.measure("perimeter", indices)
+        perimeters = self._values["perimeter"]
+        if self.pool is None or len(indices) < 4 * self.parts:
+            approx = approximate_contours(self.batch, perimeters, indices)
+        else:
+            chunks = np.array_split(indices, 4 * self.parts)
+            approx = [
+                cnt for part in self.pool.map(
+                    lambda chunk: approximate_contours(self.batch, perimeters, chunk), chunks
+                ) for cnt in part
+            ]
+        self._codes[indices] = self.detector.polygon_codes(approx)
+        for i, approx_cnt in zip(indices, approx):
+            self._approx[i] = approx_cnt
+
+StatsHook = Callable[[PipelineStats], None]
+
+# Relative widening of the area range on preview levels, so shapes near the
+# limits are not lost to downscaling before refinement re-checks them
+PREVIEW_AREA_SLACK = 0.25
 
 class ImageAnalyzer:
-    """Orchestrator for the analysis pipeline."""
+    """
+    Orchestrator for the analysis pipeline.
 
-    def __init__(self, config: ProcessingConfig):
+    With ``instrument=True`` (implied by passing ``hooks``) every result
+    carries a ``PipelineStats`` with per-stage wall times and counts, and
+    each hook is called with it, e.g. to forward metrics to an external
+    sink. Uninstrumented runs only pay a ``None`` check per stage.
+
+    With a ``TemplateLibrary`` attached, shapes close enough to a template
+    are labelled with its name; the rest keep their polygon label.
+
+    With a ``ResultCache`` attached, repeat analyses of an image under an
+    equivalent config (and template library) are read back from disk.
+
+    With a ``BufferPool`` attached and no stage cache, the grayscale, blur,
+    mask and label images are written into pooled arrays, so a long-lived
+    analyzer fed same-size frames stops allocating them after the first.
+    Such an analyzer must not run two analyses at once.
+    """
+
+    def __init__(
+        self,
+        config: ProcessingConfig,
+        cache: Optional[StageCache] = None,
+        instrument: bool = False,
+        hooks: Sequence[StatsHook] = (),
+        templates: Optional["TemplateLibrary"] = None,
+        result_cache: Optional["ResultCache"] = None,
+        buffers: Optional[BufferPool] = None
+    ):
+        unknown = set(config.fields or ()) - set(RESULT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown result fields: {sorted(unknown)}")
+        if config.backend not in EXTRACTION_BACKENDS:
+            raise ValueError(f"backend must be one of {EXTRACTION_BACKENDS}")
+        if config.foreground not in FOREGROUNDS:
+            raise ValueError(f"foreground must be one of {FOREGROUNDS}")
         self.config = config
+        self.cache = cache
+        self.hooks = list(hooks)
+        self.instrument = instrument or bool(self.hooks)
+        self.templates = templates if templates is not None and len(templates) else None
+        self.result_cache = result_cache
+        # Cached stage outputs must own their memory, so a stage cache wins
+        self.buffers = buffers if cache is None else None
         self.processor = ImageProcessor()
         self.detector = ShapeDetector()
+        self.threads = config.threads if config.threads > 0 else (os.cpu_count() or 1)
+        if config.opencv_threads is not None and cv2.getNumThreads() != config.opencv_threads:
+            cv2.setNumThreads(config.opencv_threads)
+
+    def _stage(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(key, compute)
+
+    @staticmethod
+    def _timed(stats: Optional[PipelineStats], name: str, compute: Callable[[], Any]) -> Any:
+        if stats is None:
+            return compute()
+        start = time.perf_counter()
+        value = compute()
+        stats.record(name, (time.perf_counter() - start) * 1000.0)
+        return value
+
+    def _publish(self, results: ShapeResultSet, stats: PipelineStats) -> None:
+        results.stats = stats
+        for hook in self.hooks:
+            hook(stats)
+
+    def cached(self, image_key: str, kind: str = "analyze") -> Optional[ShapeResultSet]:
+        """
+        Results of an earlier run on the image ``image_key`` identifies,
+        from the attached result cache; ``None`` on a miss or without one.
+        ``kind`` selects the pipeline, as in ``ResultCache.key``.
+        """
+        if self.result_cache is None:
+            return None
+        start = time.perf_counter()
+        results = self.result_cache.get(self.result_cache.key(image_key, self.config, self.templates, kind))
+        if results is not None and self.instrument:
+            elapsed = (time.perf_counter() - start) * 1000.0
+            stats = PipelineStats(contours_kept=len(results), cache_hits=1, total_ms=elapsed)
+            stats.record("result_cache", elapsed)
+            self._publish(results, stats)
+        return results
 
-    def analyze(self, image: np.ndarray) -> List[ShapeInfo]:
+    def analyze(self, image: np.ndarray, image_key: Optional[str] = None) -> ShapeResultSet:
         """
         Full pipeline: Preprocess -> Find Contours -> Filter -> Identify -> Return Results.
+
+        When a stage or result cache is attached, ``image_key`` identifies
+        the image (e.g. a hash of the uploaded file); it is derived from the
+        pixels if omitted.
         """
-        # 1. Preprocessing
-        gray = self.processor.to_grayscale(image)
-        blur = self.processor.apply_blur(gray, self.config.gaussian_kernel)
-        edges = self.processor.detect_edges(
-            blur, self.config.canny_threshold1, self.config.canny_threshold2
+        if self.result_cache is None:
+            return self._analyze(image, image_key)
+        if image_key is None:
+            image_key = content_hash(image)
+        results = self.cached(image_key)
+        if results is None:
+            results = self._analyze(image, image_key)
+            self.result_cache.put(self.result_cache.key(image_key, self.config, self.templates), results)
+        return results
+
+    def _analyze(self, image: np.ndarray, image_key: Optional[str]) -> ShapeResultSet:
+        if not self.instrument:
+            table = self.extract(image, image_key)
+            # 3. Filtering, 4. Geometry and 5. Identification (memoized per contour)
+            results = table.select(self.config.min_area, self.config.max_area, self.config.fields)
+            # 6. Template matching
+            return self.templates.classify(results) if self.templates is not None else results
+
+        stats = PipelineStats(pixels=int(image.shape[0] * image.shape[1]))
+        hits_before = self.cache.hits if self.cache is not None else 0
+        start = time.perf_counter()
+
+        table = self.extract(image, image_key, stats)
+        results = self._timed(
+            stats, "classify",
+            lambda: table.select(self.config.min_area, self.config.max_area, self.config.fields)
         )
+        if self.templates is not None:
+            results = self._timed(stats, "match", lambda: self.templates.classify(results))
+
+        stats.total_ms = (time.perf_counter() - start) * 1000.0
+        stats.contours_found = len(table)
+        stats.contours_kept = len(results)
+        if self.cache is not None:
+            stats.cache_hits = self.cache.hits - hits_before
+        self._publish(results, stats)
+        return results
+
+    def extract(
+        self,
+        image: np.ndarray,
+        image_key: Optional[str] = None,
+        stats: Optional[PipelineStats] = None
+    ) -> ContourTable:
+        """
+        Preprocessing and contour extraction, before any area filtering.
+        Stages that actually run are timed into ``stats`` when given.
+        """
+        cfg = self.config
+        if self.cache is not None and image_key is None:
+            image_key = content_hash(image)
+
+        # Each stage is keyed only by the config fields it depends on, and
+        # earlier stages are only evaluated when a later one misses the cache.
+        blur_params = (image_key, cfg.gaussian_kernel)
+        mask_params = blur_params + self._extraction_params()
+        plane = image.shape[:2]
+
+        def dst(name: str, dtype=np.uint8) -> Optional[np.ndarray]:
+            return self.buffers.get(name, plane, dtype) if self.buffers is not None else None
+
+        # 1. Preprocessing
+        def gray():
+            return self._stage(
+                ("gray", image_key),
+                lambda: self._timed(stats, "grayscale", lambda: self.processor.to_grayscale(image, dst("gray")))
+            )
+
+        def blur():
+            def compute():
+                gray_image = gray()
+                return self._timed(stats, "blur", lambda: self.processor.apply_blur(gray_image, cfg.gaussian_kernel, dst("blur")))
+            return self._stage(("blur",) + blur_params, compute)
+
+        def mask():
+            # Only consumed by the contour stage, which shares its key
+            blurred = blur()
+            if cfg.backend == "canny":
+                return self._timed(
+                    stats, "canny",
+                    lambda: self.processor.detect_edges(
+                        blurred, cfg.canny_threshold1, cfg.canny_threshold2, dst("mask")
+                    )
+                )
+            if cfg.backend == "adaptive":
+                return self._timed(
+                    stats, "threshold",
+                    lambda: self.processor.threshold_adaptive(
+                        blurred, cfg.adaptive_block, cfg.adaptive_offset, cfg.foreground, dst("mask")
+                    )
+                )
+            return self._timed(
+                stats, "threshold",
+                lambda: self.processor.threshold_global(blurred, cfg.threshold, cfg.foreground, dst("mask"))
+            )
 
         # 2. Contour Extraction
-        contours = self.processor.get_contours(edges)
-
-        results = []
-        for cnt in contours:
-            # 3. Filtering
-            area = cv2.contourArea(cnt)
-            if area < self.config.min_area or area > self.config.max_area:
-                continue
-
-            # 4. Geometry Calculations
-            perimeter = cv2.arcLength(cnt, True)
-            M = cv2.moments(cnt)
-            
-            # Use small epsilon to avoid division by zero
-            if M['m00'] != 0:
-                cx = int(M['m10'] / M['m00'])
-                cy = int(M['m01'] / M['m00'])
+        def table():
+            binary = mask()
+            if cfg.backend == "components":
+                contours = self._timed(
+                    stats, "components",
+                    lambda: self.processor.get_component_contours(
+                        binary, cfg.min_area, cfg.max_area, dst("labels", np.int32)
+                    )
+                )
             else:
-                cx, cy = 0, 0
-            
-            centroid = (cx, cy)
-            
-            # 5. Identification
-            shape_type = self.detector.identify_shape(cnt)
-            approx = self.detector.get_contour_approx(cnt)
-
-            results.append(ShapeInfo(
-                shape_type=shape_type,
-                area=area,
-                perimeter=perimeter,
-                centroid=centroid,
-                contour=cnt,
-                approx_contour=approx
+                contours = self._timed(stats, "find_contours", lambda: self.processor.get_contours(binary))
+            pool = _thread_pool(self.threads) if self.threads > 1 else None
+            return self._timed(
+                stats, "measure", lambda: ContourTable(contours, self.detector, pool, self.threads)
+            )
+
+        return self._stage(("contours",) + mask_params, table)
+
+    def _extraction_params(self) -> tuple:
+        """Config fields the contour stage depends on beyond the blur."""
+        cfg = self.config
+        if cfg.backend == "canny":
+            return (cfg.canny_threshold1, cfg.canny_threshold2)
+        if cfg.backend == "adaptive":
+            return (cfg.backend, cfg.foreground, cfg.adaptive_block, cfg.adaptive_offset)
+        params = (cfg.backend, cfg.foreground, cfg.threshold)
+        if cfg.backend == "components":
+            # Components outside the area range are never traced
+            params += (cfg.min_area, cfg.max_area)
+        return params
+
+    @property
+    def margin(self) -> int:
+        """
+        Width of the border around a crop within which outside pixels can
+        change what extraction sees: the blur radius plus the backend's reach.
+        """
+        cfg = self.config
+        if cfg.backend == "canny":
+            reach = 4  # Sobel, non-maximum suppression and 8-connectivity
+        elif cfg.backend == "adaptive":
+            reach = (max(3, cfg.adaptive_block | 1) // 2) + 1  # mean window and 8-connectivity
+        else:
+            reach = 1  # 8-connectivity
+        return cfg.gaussian_kernel // 2 + reach
+
+    def region_config(self, image: Optional[np.ndarray] = None) -> ProcessingConfig:
+        """
+        Config under which crops of ``image`` are extracted exactly as in a
+        whole-image run: a global threshold and an "auto" polarity are
+        resolved once on the whole image, and the components backend
+        traces every component so that ones cut by a crop edge are seen.
+        Without ``image`` those values must already be fixed in the config.
+        """
+        cfg = self.config
+        if cfg.backend == "canny":
+            return cfg
+        changes = {}
+        if cfg.backend == "components":
+            changes.update(min_area=0.0, max_area=float("inf"))
+        unresolved = cfg.foreground == "auto" or (cfg.backend in GLOBAL_THRESHOLD_BACKENDS and cfg.threshold is None)
+        if unresolved:
+            if image is None:
+                raise ValueError(
+                    f"The {cfg.backend} backend needs a fixed foreground (and threshold) for region-wise analysis"
+                )
+            blurred = self.processor.apply_blur(self.processor.to_grayscale(image), cfg.gaussian_kernel)
+            threshold, foreground = self.processor.resolve_threshold(
+                blurred, cfg.threshold if cfg.backend in GLOBAL_THRESHOLD_BACKENDS else None, cfg.foreground
+            )
+            changes["foreground"] = foreground
+            if cfg.backend in GLOBAL_THRESHOLD_BACKENDS:
+                changes["threshold"] = threshold
+        return replace(cfg, **changes)
+
+    # -- multi-resolution -------------------------------------------------
+
+    @staticmethod
+    def pyramid_levels(shape: Sequence[int], max_side: int) -> int:
+        """Number of ``pyrDown`` halvings until the longer side fits ``max_side``."""
+        levels, side = 0, max(shape[0], shape[1])
+        while side > max_side:
+            side = (side + 1) // 2
+            levels += 1
+        return levels
+
+    def preview(self, image: np.ndarray, max_side: int = 1024, image_key: Optional[str] = None) -> ShapeResultSet:
+        """
+        Fast approximate pass on a Gaussian pyramid level whose longer side
+        is at most ``max_side``, with results mapped back to full-resolution
+        coordinates and units. The area range is widened by
+        ``PREVIEW_AREA_SLACK``, so borderline shapes may appear here that
+        ``refine`` drops. Images already small enough get a full analysis.
+        """
+        levels = self.pyramid_levels(image.shape, max_side)
+        if levels == 0:
+            return self.analyze(image, image_key)
+        if (self.cache is not None or self.result_cache is not None) and image_key is None:
+            image_key = content_hash(image)
+        start = time.perf_counter()
+
+        def downscale():
+            small = image
+            for _ in range(levels):
+                small = cv2.pyrDown(small)
+            return small
+
+        factor = 2 ** levels
+        cfg = self.config
+        level_config = replace(
+            cfg,
+            # pyrDown already low-passes, so the blur shrinks with the image
+            gaussian_kernel=max(1, cfg.gaussian_kernel // factor) | 1,
+            adaptive_block=max(3, cfg.adaptive_block // factor) | 1,
+            min_area=cfg.min_area / factor ** 2 * (1 - PREVIEW_AREA_SLACK),
+            max_area=cfg.max_area / factor ** 2 * (1 + PREVIEW_AREA_SLACK)
+        )
+        small = self._stage(("pyramid", image_key, levels), downscale)
+        pyramid_ms = (time.perf_counter() - start) * 1000.0
+        level_key = f"{image_key}/level{levels}" if image_key is not None else None
+        # Hooks see the preview's stats once, with the downscale included, not the level's
+        level = ImageAnalyzer(
+            level_config, cache=self.cache, instrument=self.instrument,
+            templates=self.templates, result_cache=self.result_cache
+        )
+        found = level.analyze(small, level_key)
+        results = found.scale(factor)
+        if self.instrument:
+            stats = found.stats
+            stats.record("pyramid", pyramid_ms)
+            stats.total_ms += pyramid_ms
+            self._publish(results, stats)
+        return results
+
+    def refine(
+        self,
+        image: np.ndarray,
+        preview: ShapeResultSet,
+        padding: int = 8,
+        progress: Optional[Callable[[float], None]] = None
+    ) -> ShapeResultSet:
+        """
+        Re-detects the shapes of a ``preview`` at full resolution, analyzing
+        only padded regions around their bounding boxes.
+
+        Regions grow until no contour touching a preview box is cut by the
+        region edge, so every refined shape is measured exactly as in a
+        full-resolution ``analyze``; the result is that run's output
+        restricted to the neighbourhood of the preview shapes.
+
+        ``progress`` is called with the fraction of regions done after each
+        one; an exception it raises (e.g. to cancel) aborts the refinement.
+        With ``instrument`` the stats add up the stages of every region.
+        Results are not looked up in the result cache, since they depend on
+        ``preview``; callers cache them with ``kind="refined"``.
+        """
+        labels = tuple(self.detector.SHAPE_LABELS.tolist())
+        stats = PipelineStats() if self.instrument else None
+        start = time.perf_counter()
+        if not len(preview):
+            results = ShapeResultSet.empty(labels)
+            if stats is not None:
+                self._publish(results, stats)
+            return results
+        height, width = image.shape[:2]
+        margin = self.margin
+        regions = ImageAnalyzer(self.region_config(image))  # crops are one-off, not worth caching
+
+        refined = []
+        groups = merge_boxes(preview.bbox, padding + margin)
+        for done, group in enumerate(groups):
+            if progress is not None:
+                progress(done / len(groups))
+            region = pad_box(group, padding + margin, height, width)
+            while True:
+                x0, y0, x1, y1 = region
+                table = regions.extract(np.ascontiguousarray(image[y0:y1, x0:x1]), stats=stats)
+                bbox = table.bbox + np.array([x0, y0, 0, 0])
+                relevant = boxes_intersect(bbox, group)
+                cut = relevant & ~boxes_inside(bbox, clean_zone(region, margin, height, width))
+                if not cut.any():
+                    break
+                grown = (
+                    min(x0, int(bbox[cut, 0].min())), min(y0, int(bbox[cut, 1].min())),
+                    max(x1, int((bbox[cut, 0] + bbox[cut, 2]).max())),
+                    max(y1, int((bbox[cut, 1] + bbox[cut, 3]).max())),
+                )
+                region = pad_box(grown, padding + margin, height, width)
+
+            in_range = (table.areas >= self.config.min_area) & (table.areas <= self.config.max_area)
+            refined.append(self._timed(
+                stats, "classify", lambda: table.shapes(np.flatnonzero(relevant & in_range)).translate(x0, y0)
             ))
-            
+            if stats is not None:
+                stats.pixels += (y1 - y0) * (x1 - x0)
+                stats.contours_found += int(relevant.sum())
+
+        results = ShapeResultSet.concat(refined)
+        # A contour reaching into a neighbouring group's box is found twice
+        _, first = np.unique(
+            np.column_stack([results.bbox, results.area]), axis=0, return_index=True
+        )
+        if len(first) < len(results):
+            results = results.take(np.sort(first))
+        if self.templates is not None:
+            results = self._timed(stats, "match", lambda: self.templates.classify(results))
+        if stats is not None:
+            stats.total_ms = (time.perf_counter() - start) * 1000.0
+            stats.contours_kept = len(results)
+            self._publish(results, stats)
         return results
@@ -0,0 +1,154 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+class Cancelled(Exception):
+    """Raised at a checkpoint of a job whose result is no longer wanted."""
+
+class CancelToken:
+    """
+    Handed to every job: ``report`` publishes progress (and optionally a
+    partial result) and doubles as the job's cancellation checkpoint.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.progress = 0.0
+        self.message = ""
+        self.partial: Any = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    def check(self) -> None:
+        if self._event.is_set():
+            raise Cancelled()
+
+    def report(self, progress: float, message: str = "", partial: Any = None) -> None:
+        self.check()
+        self.progress = min(max(progress, 0.0), 1.0)
+        self.message = message
+        if partial is not None:
+            self.partial = partial
+
+@dataclass
+class JobStatus:
+    """Snapshot of a runner: the newest finished job and the one in flight, if any."""
+    done_key: Optional[Hashable] = None
+    result: Any = None
+    error: Optional[BaseException] = None
+    pending_key: Optional[Hashable] = None
+    running: bool = False
+    progress: float = 0.0
+    message: str = ""
+    partial: Any = None
+
+    @property
+    def busy(self) -> bool:
+        return self.pending_key is not None
+
+class BackgroundRunner:
+    """
+    Runs jobs one at a time on a background thread, only ever for the most
+    recently submitted key.
+
+    ``submit`` supersedes whatever was submitted before: a job still
+    waiting out its ``debounce`` delay is dropped, and a running one is
+    cancelled at its next checkpoint. A superseded job's result is never
+    published, so ``status().result`` only changes to results of the key
+    that was current when they finished. Resubmitting the current key is
+    a no-op. The thread exits when idle and is restarted on demand.
+    """
+
+    def __init__(self, debounce: float = 0.2):
+        self.debounce = debounce
+        self._lock = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        # Newest submission: (key, job, due time), until the thread takes it
+        self._pending: Optional[tuple] = None
+        self._current_key: Optional[Hashable] = None
+        self._token: Optional[CancelToken] = None
+        self._status = JobStatus()
+
+    def submit(self, key: Hashable, job: Callable[[CancelToken], Any]) -> None:
+        with self._lock:
+            if key == self._current_key:
+                return
+            if self._token is not None:
+                # Detached so status() stops showing its progress; _run still holds it
+                self._token.cancel()
+                self._token = None
+            self._current_key = key
+            self._pending = (key, job, time.monotonic() + self.debounce)
+            self._status.pending_key = key
+            self._status.progress, self._status.message, self._status.partial = 0.0, "", None
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="background-runner", daemon=True)
+                self._thread.start()
+            self._lock.notify_all()
+
+    def status(self) -> JobStatus:
+        with self._lock:
+            status = JobStatus(**vars(self._status))
+            if self._token is not None and status.running:
+                status.progress = self._token.progress
+                status.message = self._token.message
+                status.partial = self._token.partial
+            return status
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the current key's job is done; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._status.busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+            return True
+
+    def cancel(self) -> None:
+        """Drops the pending job and cancels the running one; nothing is published."""
+        with self._lock:
+            if self._token is not None:
+                self._token.cancel()
+                self._token = None
+            self._pending = None
+            self._current_key = self._status.done_key
+            self._status.pending_key = None
+            self._lock.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                # Debounce: wait until the newest submission has been left alone long enough
+                while self._pending is not None and self._pending[2] > time.monotonic():
+                    self._lock.wait(self._pending[2] - time.monotonic())
+                if self._pending is None:
+                    self._thread = None
+                    return
+                key, job, _ = self._pending
+                self._pending = None
+                token = self._token = CancelToken()
+                self._status.running = True
+
+            result, error = None, None
+            try:
+                result = job(token)
+            except Cancelled:
+                pass
+            except Exception as exc:  # surfaced through status(), never raised on the thread
+                error = exc
+
+            with self._lock:
+                self._token = None
+                self._status.running = False
+                if not token.cancelled and key == self._current_key:
+                    self._status.done_key, self._status.result, self._status.error = key, result, error
+                    self._status.pending_key = None
+                self._lock.notify_all()
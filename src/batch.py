@@ -0,0 +1,247 @@
+import glob
+import os
+import queue
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .models import BatchResult, ProcessingConfig
+from .analyzer import ImageAnalyzer
+from .buffers import BufferPool
+from .cache import content_hash
+from .dedup import DuplicateIndex
+
+if TYPE_CHECKING:
+    from .result_cache import ResultCache
+    from .templates import TemplateLibrary
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+# Near-duplicates reuse the results of this many most recent distinct images;
+# one of an older image is analyzed on its own, keeping memory bounded
+DUPLICATE_RESULTS_KEPT = 1024
+
+# Per-process analyzer, created once by the pool initializer
+_worker_analyzer: Optional[ImageAnalyzer] = None
+
+
+def collect_images(source: str, recursive: bool = False) -> List[str]:
+    """
+    Resolves a directory or glob pattern into a sorted list of image paths.
+    """
+    if os.path.isdir(source):
+        if recursive:
+            candidates = [
+                os.path.join(root, name)
+                for root, _, names in os.walk(source)
+                for name in names
+            ]
+        else:
+            candidates = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        candidates = glob.glob(source, recursive=recursive)
+
+    return sorted(
+        path for path in candidates
+        if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def _init_worker(
+    config: ProcessingConfig,
+    templates: Optional["TemplateLibrary"] = None,
+    result_cache: Optional["ResultCache"] = None
+) -> None:
+    global _worker_analyzer
+    if config.opencv_threads is None:
+        # The pool already runs one image per core; OpenCV threads on top would oversubscribe
+        cv2.setNumThreads(1)
+    # Each worker analyzes one image at a time, so same-size images share buffers
+    _worker_analyzer = ImageAnalyzer(config, templates=templates, result_cache=result_cache, buffers=BufferPool())
+
+
+def _read_signature(path: str) -> Tuple[str, Optional[tuple]]:
+    return path, DuplicateIndex.read_signature(path)
+
+
+def _analyze_path(path: str, analyzer: Optional[ImageAnalyzer] = None) -> BatchResult:
+    """Loads and analyzes one image; errors are reported, never raised."""
+    if analyzer is None:
+        analyzer = _worker_analyzer
+    image_key = None
+    if analyzer.result_cache is None:
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+    else:
+        # Keyed by the file's bytes, so a cache hit skips decoding altogether
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+        except OSError as exc:
+            return BatchResult(path=path, error=f"{type(exc).__name__}: {exc}")
+        image_key = content_hash(data)
+        shapes = analyzer.cached(image_key)
+        if shapes is not None:
+            return BatchResult(path=path, shapes=shapes, cached=True)
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return BatchResult(path=path, error="Unable to decode image")
+    try:
+        shapes = analyzer.analyze(image, image_key)
+    except Exception as exc:  # keep the batch alive on a single bad input
+        return BatchResult(path=path, error=f"{type(exc).__name__}: {exc}")
+    return BatchResult(path=path, shapes=shapes)
+
+
+# Result slot of an original that is still being analyzed
+_PENDING = object()
+
+
+class _ReuseTracker:
+    """
+    Near-duplicate decisions of one batch, taken in input order so the
+    inline and pooled paths reuse the same images.
+
+    The index only stores paths; results are kept here for the ``keep``
+    most recently indexed originals. A near-duplicate of an older original,
+    or of one that failed, is analyzed on its own. In a pool an original
+    may still be running when its copies show up: they wait for it.
+    """
+
+    def __init__(self, index: DuplicateIndex, keep: int):
+        self.index = index
+        self.keep = keep
+        # original path -> its shapes, _PENDING, or None when it failed
+        self._recent: "OrderedDict[str, Any]" = OrderedDict()
+        self._waiting: Dict[str, List[str]] = {}
+
+    def original_of(self, path: str, signature: Optional[tuple]) -> Optional[str]:
+        """The original ``path`` can reuse, or ``None`` when it has to be analyzed."""
+        if signature is None:
+            return None  # undecodable; the analysis reports it
+        original = self.index.find(signature)
+        if original is None:
+            self.index.add(signature, path)
+            self._recent[path] = _PENDING
+            if len(self._recent) > self.keep:
+                self._recent.popitem(last=False)
+            return None
+        if self._recent.get(original) is None:
+            return None
+        return original
+
+    def follow(self, path: str, original: str) -> List[BatchResult]:
+        """``path``'s result when its original is done; otherwise it waits for ``finished``."""
+        shapes = self._recent[original]
+        if shapes is _PENDING:
+            self._waiting.setdefault(original, []).append(path)
+            return []
+        return [BatchResult(path=path, shapes=shapes, duplicate_of=original)]
+
+    def finished(self, result: BatchResult) -> Tuple[List[BatchResult], List[str]]:
+        """Results of the copies waiting on ``result``, and those to analyze after all."""
+        if result.path in self._recent:
+            self._recent[result.path] = result.shapes if result.ok else None
+        copies = self._waiting.pop(result.path, [])
+        if not result.ok:
+            return [], copies
+        return [BatchResult(path=path, shapes=result.shapes, duplicate_of=result.path) for path in copies], []
+
+
+def analyze_batch(
+    paths: Iterable[str],
+    config: ProcessingConfig,
+    workers: Optional[int] = None,
+    chunk_size: int = 1,
+    templates: Optional["TemplateLibrary"] = None,
+    result_cache: Optional["ResultCache"] = None,
+    duplicates: Optional[DuplicateIndex] = None
+) -> Iterator[BatchResult]:
+    """
+    Analyzes many images over a process pool.
+
+    Results are yielded in completion order, not input order. With
+    ``workers=1`` the images are processed inline in the calling process.
+    A template library is shipped to every worker once, at start-up.
+    With a ``result_cache``, images already analyzed under an equivalent
+    config (by any process using the same directory) are read back
+    instead, marked ``cached``.
+
+    With a ``DuplicateIndex``, an image that nearly duplicates one earlier
+    in the input reuses its results and names it in ``duplicate_of``.
+    Images are matched by ``DuplicateIndex.read_signature``, in input
+    order, so which ones are reused does not depend on ``workers`` or
+    ``chunk_size``; a pool computes the signatures in its workers first.
+    The index keeps the counters.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    if workers == 1:
+        analyzer = ImageAnalyzer(config, templates=templates, result_cache=result_cache, buffers=BufferPool())
+        tracker = _ReuseTracker(duplicates, DUPLICATE_RESULTS_KEPT) if duplicates is not None else None
+        for path in paths:
+            if tracker is not None:
+                original = tracker.original_of(path, DuplicateIndex.read_signature(path))
+                if original is not None:
+                    yield from tracker.follow(path, original)  # done already: inline runs in order
+                    continue
+            result = _analyze_path(path, analyzer)
+            if tracker is not None:
+                tracker.finished(result)
+            yield result
+        return
+
+    import multiprocessing  # only the pooled path needs it; kept off the import path
+    with multiprocessing.Pool(
+        processes=workers, initializer=_init_worker, initargs=(config, templates, result_cache)
+    ) as pool:
+        if duplicates is None:
+            yield from pool.imap_unordered(_analyze_path, paths, chunksize=chunk_size)
+            return
+        yield from _analyze_unique(pool, paths, chunk_size, _ReuseTracker(duplicates, DUPLICATE_RESULTS_KEPT))
+
+
+def _analyze_unique(pool, paths: Iterable[str], chunk_size: int, tracker: _ReuseTracker) -> Iterator[BatchResult]:
+    """
+    Pooled near-duplicate skipping: signatures stream back in input order,
+    originals are analyzed as they are found, and each copy is yielded as
+    soon as its original's result is in.
+    """
+    finished: "queue.Queue[BatchResult]" = queue.Queue()
+    running = 0
+
+    def dispatch(path: str) -> None:
+        nonlocal running
+        running += 1
+        pool.apply_async(
+            _analyze_path, (path,), callback=finished.put,
+            error_callback=lambda exc: finished.put(BatchResult(path=path, error=f"{type(exc).__name__}: {exc}"))
+        )
+
+    def collect(block: bool) -> Iterator[BatchResult]:
+        nonlocal running
+        while running:
+            try:
+                result = finished.get(block=block)
+            except queue.Empty:
+                return
+            running -= 1
+            yield result
+            copies, retry = tracker.finished(result)
+            yield from copies
+            for path in retry:
+                dispatch(path)
+
+    for path, signature in pool.imap(_read_signature, paths, chunksize=chunk_size):
+        original = tracker.original_of(path, signature)
+        if original is None:
+            dispatch(path)
+        else:
+            yield from tracker.follow(path, original)
+        yield from collect(block=False)
+    yield from collect(block=True)
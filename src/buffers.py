@@ -0,0 +1,32 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+class BufferPool:
+    """
+    Named, reusable output arrays for OpenCV ``dst`` arguments.
+
+    ``get`` hands back the same array for a name as long as the requested
+    shape and dtype stay the same, so a stream of same-size frames
+    allocates its intermediate images once. Every array is overwritten by
+    the next call that asks for it: a pool serves one analysis at a time,
+    and nothing handed out may be kept past it.
+    """
+
+    def __init__(self):
+        self._buffers: Dict[str, np.ndarray] = {}
+        self.allocations = 0
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != dtype:
+            buffer = self._buffers[name] = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+        return buffer
+
+    @property
+    def nbytes(self) -> int:
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def clear(self) -> None:
+        self._buffers.clear()
@@ -0,0 +1,68 @@
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Union
+
+import numpy as np
+
+def content_hash(data: Union[bytes, bytearray, memoryview, np.ndarray]) -> str:
+    """
+    Stable digest of raw bytes or of an array's pixels, shape and dtype.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(data, np.ndarray):
+        digest.update(str((data.shape, data.dtype.str)).encode())
+        data = np.ascontiguousarray(data)
+    digest.update(memoryview(data).cast('B'))
+    return digest.hexdigest()
+
+class StageCache:
+    """
+    Bounded LRU store for intermediate pipeline outputs.
+
+    Keys are tuples of the image hash plus only the config fields a stage
+    depends on, so changing a late-stage parameter reuses earlier stages.
+    With ``max_bytes`` set, entries are also evicted once the values'
+    ``nbytes`` add up to more than that; the newest entry is always kept.
+    """
+
+    def __init__(self, max_entries: int = 32, max_bytes: Optional[int] = None):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Returns the cached value for ``key``, computing and storing it on a miss."""
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        value = compute()
+        self._entries[key] = value
+        self._sizes[key] = int(getattr(value, "nbytes", 0))
+        self.nbytes += self._sizes[key]
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            evicted, _ = self._entries.popitem(last=False)
+            self.nbytes -= self._sizes.pop(evicted)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
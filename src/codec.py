@@ -0,0 +1,268 @@
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from .geometry import ContourBatch
+
+# Tokens carry at most 35 bits: a zigzagged int32 delta (33 bits) and a flag
+_MAX_VARINT_BYTES = 5
+
+def _varint_encode(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    LEB128 varints of non-negative integers: 7 bits per byte, low bits
+    first, high bit set on every byte but the last of a value.
+    Returns the encoded bytes and the byte length of every value.
+    """
+    values = values.astype(np.uint64, copy=False)
+    lengths = np.ones(len(values), dtype=np.int64)
+    for shift in range(7, 7 * _MAX_VARINT_BYTES, 7):
+        lengths += values >= np.uint64(1 << shift)
+    owner = np.repeat(np.arange(len(values)), lengths)
+    position = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    data = ((values[owner] >> (7 * position).astype(np.uint64)) & np.uint64(0x7F)).astype(np.uint8)
+    data[position < lengths[owner] - 1] |= 0x80
+    return data, lengths
+
+def _varint_decode(data: np.ndarray) -> np.ndarray:
+    """Inverse of ``_varint_encode``."""
+    if not len(data):
+        return np.empty(0, dtype=np.uint64)
+    if data[-1] & 0x80:
+        raise ValueError("Truncated varint payload")
+    ends = np.flatnonzero((data & 0x80) == 0)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    position = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    if position.max() >= _MAX_VARINT_BYTES:
+        raise ValueError("Varint longer than a contour coordinate allows")
+    parts = (data & 0x7F).astype(np.uint64) << (7 * position).astype(np.uint64)
+    return np.add.reduceat(parts, starts)
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int64, copy=False)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64, copy=False)
+    return ((values >> np.uint64(1)).astype(np.int64)) ^ -((values & np.uint64(1)).astype(np.int64))
+
+# Freeman directions; _DIRECTION_INDEX maps (sign(dx) + 1) * 3 + sign(dy) + 1 to them
+_DIRECTIONS = np.array([(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)], dtype=np.int64)
+_DIRECTION_INDEX = np.array([5, 4, 3, 6, 0, 2, 7, 0, 1], dtype=np.int64)
+
+# Longest run stored as a chain token; longer steps fall back to deltas
+_MAX_RUN = 1 << 28
+
+def _counts_to_offsets(counts: np.ndarray) -> np.ndarray:
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+
+@dataclass
+class EncodedContours:
+    """
+    Lossless compact form of a ``ContourBatch``.
+
+    ``CHAIN_APPROX_SIMPLE`` contours step from point to point along one of
+    the eight Freeman directions, so each step is stored as a chain token
+    (direction and run length, one byte for runs up to 8 px). Any other
+    step, including each contour's absolute first point, is stored as a
+    zigzag delta pair instead. Tokens and deltas are written as varints
+    in per-contour byte ranges, so ``contour(i)`` and ``take`` never
+    inflate more than they return.
+
+    Payload layout per contour: one token per point, then the y deltas of
+    the points whose token is a delta (low bit set, x delta in the rest).
+    """
+    data: np.ndarray          # (B,) uint8 varint payload
+    offsets: np.ndarray       # (n + 1,) int64 point offsets, as in ContourBatch
+    byte_offsets: np.ndarray  # (n + 1,) int64 payload offsets
+
+    @classmethod
+    def encode(cls, batch: ContourBatch) -> "EncodedContours":
+        points = batch.points.astype(np.int64)
+        counts = batch.counts
+        steps = points.copy()
+        steps[1:] -= points[:-1]
+        first = np.zeros(len(points), dtype=bool)
+        first[batch.offsets[:-1][counts > 0]] = True
+        steps[first] = points[first]  # each contour restarts from an absolute point
+
+        # 1. One token per point: chain step or x delta
+        dx, dy = steps[:, 0], steps[:, 1]
+        run = np.maximum(np.abs(dx), np.abs(dy))
+        chain = ~first & (run > 0) & (run <= _MAX_RUN) & ((dx == 0) | (dy == 0) | (np.abs(dx) == np.abs(dy)))
+        general = ~chain
+        direction = _DIRECTION_INDEX[(np.sign(dx[chain]) + 1) * 3 + np.sign(dy[chain]) + 1]
+        tokens = np.empty(len(points), dtype=np.uint64)
+        tokens[chain] = ((((run[chain] - 1) << 3) | direction) << 1).astype(np.uint64)
+        tokens[general] = (_zigzag(dx[general]) << np.uint64(1)) | np.uint64(1)
+
+        # 2. Lay out each contour's tokens followed by its y deltas
+        owner = np.repeat(np.arange(len(counts)), counts)
+        general_counts = np.bincount(owner[general], minlength=len(counts))
+        value_offsets = _counts_to_offsets(counts + general_counts)
+        values = np.empty(value_offsets[-1], dtype=np.uint64)
+        values[value_offsets[owner] + np.arange(len(points)) - batch.offsets[owner]] = tokens
+        general_owner = owner[general]
+        rank = np.arange(len(general_owner)) - np.repeat(_counts_to_offsets(general_counts)[:-1], general_counts)
+        values[value_offsets[general_owner] + counts[general_owner] + rank] = _zigzag(dy[general])
+
+        # 3. Varints
+        data, lengths = _varint_encode(values)
+        value_ends = _counts_to_offsets(lengths)
+        offsets = batch.offsets.astype(np.int64, copy=False)
+        return cls(data=data, offsets=offsets, byte_offsets=value_ends[value_offsets])
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + self.offsets.nbytes + self.byte_offsets.nbytes
+
+    @staticmethod
+    def _inflate(data: np.ndarray, offsets: np.ndarray, byte_offsets: np.ndarray) -> np.ndarray:
+        """Points of a contiguous run of encoded contours."""
+        values = _varint_decode(data)
+        counts = np.diff(offsets)
+        ends = np.zeros(len(data) + 1, dtype=np.int64)
+        np.cumsum((data & 0x80) == 0, out=ends[1:])
+        value_offsets = ends[byte_offsets - byte_offsets[0]]
+        value_counts = np.diff(value_offsets)
+        if np.any(value_counts < counts):
+            raise ValueError("Contour payload does not match its point count")
+
+        owner = np.repeat(np.arange(len(counts)), value_counts)
+        is_token = np.arange(len(values)) - value_offsets[owner] < counts[owner]
+        tokens, deltas_y = values[is_token], values[~is_token]
+        general = (tokens & np.uint64(1)).astype(bool)
+        if np.count_nonzero(general) != len(deltas_y):
+            raise ValueError("Contour payload does not match its point count")
+
+        code = tokens >> np.uint64(1)
+        steps = np.empty((len(tokens), 2), dtype=np.int64)
+        steps[general, 0] = _unzigzag(code[general])
+        steps[general, 1] = _unzigzag(deltas_y)
+        chain = code[~general]
+        run = (chain >> np.uint64(3)).astype(np.int64) + 1
+        steps[~general] = run[:, None] * _DIRECTIONS[(chain & np.uint64(7)).astype(np.int64)]
+
+        points = np.cumsum(steps, axis=0)
+        # Segmented running sum: drop everything accumulated before each contour
+        starts = (offsets[:-1] - offsets[0])[counts > 0]
+        before = np.zeros((len(starts), 2), dtype=np.int64)
+        before[1:] = points[starts[1:] - 1]
+        points -= np.repeat(before, counts[counts > 0], axis=0)
+        return points.astype(np.int32)
+
+    def decode(self) -> ContourBatch:
+        return ContourBatch(points=self._inflate(self.data, self.offsets, self.byte_offsets), offsets=self.offsets)
+
+    def contour(self, index: int) -> np.ndarray:
+        """One contour in OpenCV's (N, 1, 2) layout, decoded on its own."""
+        data = self.data[self.byte_offsets[index]:self.byte_offsets[index + 1]]
+        return self._inflate(
+            data, self.offsets[index:index + 2], self.byte_offsets[index:index + 2]
+        ).reshape(-1, 1, 2)
+
+    def take(self, indices: Sequence[int]) -> "EncodedContours":
+        """Selected contours in the given order, gathered as encoded bytes."""
+        indices = np.asarray(indices, dtype=np.int64)
+        byte_counts = np.diff(self.byte_offsets)[indices]
+        byte_offsets = _counts_to_offsets(byte_counts)
+        gather = np.arange(byte_offsets[-1], dtype=np.int64)
+        gather += np.repeat(self.byte_offsets[:-1][indices] - byte_offsets[:-1], byte_counts)
+        return EncodedContours(
+            data=self.data[gather],
+            offsets=_counts_to_offsets(np.diff(self.offsets)[indices]),
+            byte_offsets=byte_offsets
+        )
+
+    def payloads(self) -> List[bytes]:
+        """Per-contour wire forms, each readable with ``decode_contour``."""
+        counts = np.diff(self.offsets)
+        byte_counts = np.diff(self.byte_offsets)
+        header, lengths = _varint_encode(
+            np.column_stack((np.ones(len(self), dtype=np.int64), counts, byte_counts)).reshape(-1)
+        )
+        header_offsets = _counts_to_offsets(lengths.reshape(-1, 3).sum(axis=1)).tolist()
+        header, data = header.tobytes(), self.data.tobytes()
+        byte_offsets = self.byte_offsets.tolist()
+        return [
+            header[header_offsets[i]:header_offsets[i + 1]] + data[byte_offsets[i]:byte_offsets[i + 1]]
+            for i in range(len(self))
+        ]
+
+    def to_bytes(self) -> bytes:
+        """Self-describing wire form: contour count, point counts, byte counts, payload."""
+        header, _ = _varint_encode(
+            np.concatenate(([len(self)], np.diff(self.offsets), np.diff(self.byte_offsets)))
+        )
+        return header.tobytes() + self.data.tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "EncodedContours":
+        raw = np.frombuffer(blob, dtype=np.uint8)
+        ends = np.flatnonzero((raw & 0x80) == 0)
+        if not len(ends):
+            raise ValueError("Empty contour payload")
+        n = int(_varint_decode(raw[:ends[0] + 1])[0])
+        if len(ends) < 2 * n + 1:
+            raise ValueError("Truncated contour header")
+        header_end = ends[2 * n] + 1
+        counts = _varint_decode(raw[ends[0] + 1:header_end]).astype(np.int64)
+        byte_offsets = _counts_to_offsets(counts[n:])
+        data = raw[header_end:]
+        if byte_offsets[-1] != len(data):
+            raise ValueError("Contour payload does not match its byte counts")
+        return cls(data=data, offsets=_counts_to_offsets(counts[:n]), byte_offsets=byte_offsets)
+
+class LazyContourBatch(ContourBatch):
+    """
+    ``ContourBatch`` backed by ``EncodedContours``. Single contours are
+    decoded on demand; the whole point buffer is inflated (once) only
+    when ``points`` is touched, e.g. by drawing or measuring the batch.
+    """
+
+    def __init__(self, encoded: EncodedContours):
+        self.encoded = encoded
+        self.offsets = encoded.offsets
+        self._points = None
+
+    @property
+    def points(self) -> np.ndarray:
+        if self._points is None:
+            self._points = self.encoded.decode().points
+        return self._points
+
+    @property
+    def inflated(self) -> bool:
+        return self._points is not None
+
+    def contour(self, index: int) -> np.ndarray:
+        if self._points is None:
+            return self.encoded.contour(index)
+        return super().contour(index)
+
+    def take(self, indices: np.ndarray) -> ContourBatch:
+        if self._points is None:
+            return LazyContourBatch(self.encoded.take(indices))
+        return super().take(indices)
+
+def encode_contours(batch: ContourBatch) -> EncodedContours:
+    """Encoded form of a batch, reusing it when the batch is already lazy."""
+    if isinstance(batch, LazyContourBatch):
+        return batch.encoded
+    return EncodedContours.encode(batch)
+
+def encode_contour(contour: np.ndarray) -> bytes:
+    """Compact, self-describing bytes of one OpenCV contour."""
+    return EncodedContours.encode(ContourBatch.from_contours([contour])).to_bytes()
+
+def decode_contour(payload: bytes) -> np.ndarray:
+    """Inverse of ``encode_contour``, in OpenCV's (N, 1, 2) int32 layout."""
+    encoded = EncodedContours.from_bytes(payload)
+    if len(encoded) != 1:
+        raise ValueError("Payload does not hold exactly one contour")
+    return encoded.contour(0)
@@ -0,0 +1,124 @@
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .processors import ImageProcessor
+
+# Thumbnail side the hash and the verification are computed from
+THUMBNAIL_SIDE = 32
+# Files are signed from a decode at this fraction of their size
+SIGNATURE_REDUCTION = 4
+
+def perceptual_hash(thumbnail: np.ndarray) -> int:
+    """
+    64-bit DCT hash of a grayscale thumbnail: one bit per low-frequency
+    coefficient, set when it is above their median. Recompression and
+    sensor noise flip few bits; different content flips many.
+    """
+    coeffs = cv2.dct(thumbnail.astype(np.float32))[:8, :8].ravel()
+    # The DC term only tracks overall brightness and would skew the median
+    bits = coeffs > np.median(coeffs[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+class _Bucket:
+    """Entries of one image size: hashes in a growable array, thumbnails and values alongside."""
+
+    def __init__(self):
+        self.hashes = np.empty(16, dtype=np.uint64)
+        self.thumbnails: List[np.ndarray] = []
+        self.values: List[Any] = []
+
+    def add(self, code: int, thumbnail: np.ndarray, value: Any) -> None:
+        n = len(self.values)
+        if n == len(self.hashes):
+            self.hashes = np.concatenate([self.hashes, np.empty(n, dtype=np.uint64)])
+        self.hashes[n] = code
+        self.thumbnails.append(thumbnail)
+        self.values.append(value)
+
+class DuplicateIndex:
+    """
+    Recognizes near-duplicate images, e.g. frames of a static camera or the
+    same capture re-encoded, so their analysis can be reused.
+
+    An image matches an earlier one of the same size when their perceptual
+    hashes differ in at most ``max_distance`` bits and no pixel of their
+    thumbnails differs by more than ``max_pixel_delta`` grey levels. The
+    hash finds candidates in one vectorized scan; the thumbnail check then
+    rejects images whose small local changes (an object moved or added)
+    the hash is too coarse to see.
+
+    ``lookups``, ``hits`` and ``skipped_pixels`` count how much work the
+    index saved.
+    """
+
+    def __init__(self, max_distance: int = 4, max_pixel_delta: float = 8.0):
+        if not 0 <= max_distance <= 64:
+            raise ValueError("max_distance must be between 0 and 64")
+        self.max_distance = max_distance
+        self.max_pixel_delta = max_pixel_delta
+        self._buckets: Dict[Hashable, _Bucket] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.skipped_pixels = 0
+
+    def __len__(self) -> int:
+        return sum(len(bucket.values) for bucket in self._buckets.values())
+
+    @staticmethod
+    def signature(image: np.ndarray) -> Tuple[Tuple[int, ...], int, np.ndarray]:
+        """(size, hash, thumbnail) of a BGR image, as ``find`` and ``add`` take them."""
+        thumbnail = ImageProcessor.thumbnail(image, THUMBNAIL_SIDE)
+        return image.shape[:2], perceptual_hash(thumbnail), thumbnail
+
+    @staticmethod
+    def read_signature(path: str) -> Optional[Tuple[Tuple[int, ...], int, np.ndarray]]:
+        """
+        Signature of an image file, or ``None`` when it cannot be decoded.
+
+        Reads a reduced grayscale decode, which for JPEG costs a fraction of
+        a full one; images too small for that to leave detail for the
+        thumbnail are read whole. The size of a reduced read is scaled back,
+        so it is exact to within ``SIGNATURE_REDUCTION - 1`` pixels. File
+        signatures only compare with each other, not with ``signature``.
+        """
+        small = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_4)
+        if small is None:
+            return None
+        if min(small.shape) < 4 * THUMBNAIL_SIDE:
+            image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                return None
+            thumbnail = ImageProcessor.thumbnail(image, THUMBNAIL_SIDE)
+            return image.shape[:2], perceptual_hash(thumbnail), thumbnail
+        thumbnail = ImageProcessor.thumbnail(small, THUMBNAIL_SIDE)
+        size = (small.shape[0] * SIGNATURE_REDUCTION, small.shape[1] * SIGNATURE_REDUCTION)
+        return size, perceptual_hash(thumbnail), thumbnail
+
+    def find(self, signature: Tuple[Tuple[int, ...], int, np.ndarray]) -> Optional[Any]:
+        """Value stored for the closest near-duplicate, or ``None``."""
+        size, code, thumbnail = signature
+        self.lookups += 1
+        bucket = self._buckets.get(size)
+        if bucket is None:
+            return None
+        n = len(bucket.values)
+        distances = _popcount(bucket.hashes[:n] ^ np.uint64(code))
+        candidates = np.flatnonzero(distances <= self.max_distance)
+        for index in candidates[np.argsort(distances[candidates], kind="stable")].tolist():
+            delta = cv2.absdiff(bucket.thumbnails[index], thumbnail).max()
+            if delta <= self.max_pixel_delta:
+                self.hits += 1
+                self.skipped_pixels += int(size[0]) * int(size[1])
+                return bucket.values[index]
+        return None
+
+    def add(self, signature: Tuple[Tuple[int, ...], int, np.ndarray], value: Any) -> None:
+        size, code, thumbnail = signature
+        self._buckets.setdefault(size, _Bucket()).add(code, thumbnail, value)
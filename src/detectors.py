@@ -1,20 +1,26 @@
 import cv2
 import numpy as np
-from typing import Optional
+from typing import Optional, Sequence
+from .geometry import APPROX_EPSILON_FACTOR, ContourBatch, bounding_boxes
 
 class ShapeDetector:
     """Logic for identifying geometric shapes from contours."""
 
+    # Labels indexed by the codes returned from classify_batch
+    SHAPE_LABELS = np.array(["Triangle", "Square", "Rectangle", "Pentagon", "Circle"])
+
     @staticmethod
     def identify_shape(contour: np.ndarray) -> str:
         """
         Approximates the contour to a polygon and identifies the shape
         based on the number of vertices.
         """
-        perimeter = cv2.arcLength(contour, True)
-        # Approximation accuracy: 2% of perimeter is a standard heuristic
-        approx = cv2.approxPolyDP(contour, 0.04 * perimeter, True)
-        
+        approx = ShapeDetector.get_contour_approx(contour)
+        return ShapeDetector.classify_polygon(approx)
+
+    @staticmethod
+    def classify_polygon(approx: np.ndarray) -> str:
+        """Identifies the shape of an already approximated polygon."""
         num_vertices = len(approx)
         
         if num_vertices == 3:
@@ -33,9 +39,42 @@ class ShapeDetector:
         else:
             # If many vertices, assume it's a circle (or close to it)
             return "Circle"
+
+    @staticmethod
+    def classify_batch(vertex_counts: np.ndarray, aspect_ratios: np.ndarray) -> np.ndarray:
+        """
+        Vectorized ``classify_polygon`` over vertex counts and the aspect
+        ratios (w / h) of the approximated polygons' bounding boxes.
+        Returns indices into ``SHAPE_LABELS``.
+        """
+        vertex_counts = np.asarray(vertex_counts)
+        aspect_ratios = np.asarray(aspect_ratios, dtype=np.float64)
+        square = (aspect_ratios >= 0.95) & (aspect_ratios <= 1.05)
+        return np.select(
+            [vertex_counts == 3, (vertex_counts == 4) & square, vertex_counts == 4, vertex_counts == 5],
+            [0, 1, 2, 3],
+            default=4
+        ).astype(np.int16)
+
+    @staticmethod
+    def polygon_codes(approx_contours: Sequence[np.ndarray]) -> np.ndarray:
+        """Classifies many approximated polygons into ``SHAPE_LABELS`` indices."""
+        if not len(approx_contours):
+            return np.empty(0, dtype=np.int16)
+        batch = ContourBatch.from_contours(approx_contours)
+        bbox = bounding_boxes(batch)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            aspect_ratios = bbox[:, 2] / bbox[:, 3]
+        return ShapeDetector.classify_batch(batch.counts, aspect_ratios)
+
+    @staticmethod
+    def classify_polygons(approx_contours: Sequence[np.ndarray]) -> np.ndarray:
+        """Classifies many approximated polygons in one vectorized pass."""
+        return ShapeDetector.SHAPE_LABELS[ShapeDetector.polygon_codes(approx_contours)]
     
     @staticmethod
     def get_contour_approx(contour: np.ndarray) -> np.ndarray:
         """Returns the approximated polygon for a contour."""
         perimeter = cv2.arcLength(contour, True)
-        return cv2.approxPolyDP(contour, 0.04 * perimeter, True)
+        # Approximation accuracy: 4% of perimeter is a standard heuristic
+        return cv2.approxPolyDP(contour, APPROX_EPSILON_FACTOR * perimeter, True)
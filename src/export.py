@@ -0,0 +1,229 @@
+import base64
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import IO, List, Optional, Union
+
+import numpy as np
+
+from .codec import encode_contours
+from .models import ShapeResultSet
+
+EXPORT_FORMATS = ("jsonl", "csv", "parquet")
+SCALAR_COLUMNS = (
+    "source", "shape_type", "area", "perimeter",
+    "centroid_x", "centroid_y", "bbox_x", "bbox_y", "bbox_w", "bbox_h",
+)
+
+class ResultExporter(ABC):
+    """
+    Streams shape rows to a file while a run is in progress.
+
+    Result sets passed to ``write`` are buffered as-is (columnar, no
+    per-shape objects) and flushed once ``chunk_rows`` shapes are pending,
+    so memory is bounded by the chunk size rather than by the run. Each
+    row is one shape tagged with its ``source`` (e.g. the image path);
+    contour points are included with ``include_contours``, and with
+    ``compact_contours`` as ``codec`` payloads instead of point lists.
+    """
+
+    extension = ""
+
+    def __init__(
+        self,
+        target: Union[str, IO],
+        include_contours: bool = False,
+        chunk_rows: int = 10000,
+        compact_contours: bool = False
+    ):
+        if chunk_rows < 1:
+            raise ValueError("chunk_rows must be at least 1")
+        self.include_contours = include_contours
+        self.compact_contours = compact_contours
+        self.chunk_rows = chunk_rows
+        self.rows_written = 0
+        self._pending: List[ShapeResultSet] = []
+        self._sources: List[str] = []
+        self._pending_rows = 0
+        self._owns_file = isinstance(target, str)
+        self._file = self._open(target) if self._owns_file else target
+
+    def _open(self, path: str) -> IO:
+        return open(path, "w", newline="", encoding="utf-8")
+
+    def __enter__(self) -> "ResultExporter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, shapes: ShapeResultSet, source: str = "") -> None:
+        if not len(shapes):
+            return
+        self._pending.append(shapes)
+        self._sources.append(source)
+        self._pending_rows += len(shapes)
+        if self._pending_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            chunk = ShapeResultSet.concat(self._pending)
+            sources = np.repeat(np.array(self._sources, dtype=object), [len(s) for s in self._pending])
+            # A single oversized set is still serialized chunk_rows at a time
+            for start in range(0, len(chunk), self.chunk_rows):
+                part = slice(start, start + self.chunk_rows)
+                self._write_chunk(chunk.take(part), sources[part])
+            self.rows_written += len(chunk)
+            self._pending, self._sources, self._pending_rows = [], [], 0
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self.flush()
+        self._finish()
+        if self._owns_file:
+            self._file.close()
+        self._file = None
+
+    @abstractmethod
+    def _write_chunk(self, chunk: ShapeResultSet, sources: np.ndarray) -> None:
+        """Serializes one chunk of at most ``chunk_rows`` shapes."""
+
+    def _finish(self) -> None:
+        pass
+
+    @staticmethod
+    def _columns(chunk: ShapeResultSet, sources: np.ndarray) -> dict:
+        return {
+            "source": sources,
+            "shape_type": chunk.shape_types,
+            "area": chunk.area,
+            "perimeter": chunk.perimeter,
+            "centroid_x": chunk.centroid[:, 0],
+            "centroid_y": chunk.centroid[:, 1],
+            "bbox_x": chunk.bbox[:, 0],
+            "bbox_y": chunk.bbox[:, 1],
+            "bbox_w": chunk.bbox[:, 2],
+            "bbox_h": chunk.bbox[:, 3],
+        }
+
+    @staticmethod
+    def _point_lists(batch) -> List[list]:
+        """Per-contour [[x, y], ...] lists from a packed batch."""
+        points = batch.points.tolist()
+        offsets = batch.offsets.tolist()
+        return [points[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def _text_contours(self, batch) -> list:
+        """Contour column for text formats: point lists, or base64 payloads when compact."""
+        if self.compact_contours:
+            return [base64.b64encode(p).decode("ascii") for p in encode_contours(batch).payloads()]
+        return self._point_lists(batch)
+
+class JSONLExporter(ResultExporter):
+    """One JSON object per shape and line."""
+
+    extension = ".jsonl"
+
+    def _write_chunk(self, chunk: ShapeResultSet, sources: np.ndarray) -> None:
+        columns = {name: values.tolist() for name, values in self._columns(chunk, sources).items()}
+        if self.include_contours:
+            columns["contour"] = self._text_contours(chunk.contours)
+            columns["approx_contour"] = self._text_contours(chunk.approx)
+        names = list(columns)
+        self._file.writelines(
+            json.dumps(dict(zip(names, row))) + "\n" for row in zip(*columns.values())
+        )
+
+class CSVExporter(ResultExporter):
+    """Flat CSV with a header row; contour columns hold JSON point lists or base64 payloads."""
+
+    extension = ".csv"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._writer = csv.writer(self._file)
+        header = list(SCALAR_COLUMNS)
+        if self.include_contours:
+            header += ["contour", "approx_contour"]
+        self._writer.writerow(header)
+
+    def _write_chunk(self, chunk: ShapeResultSet, sources: np.ndarray) -> None:
+        columns = [values.tolist() for values in self._columns(chunk, sources).values()]
+        if self.include_contours:
+            for batch in (chunk.contours, chunk.approx):
+                values = self._text_contours(batch)
+                columns.append(values if self.compact_contours else [json.dumps(p, separators=(",", ":")) for p in values])
+        self._writer.writerows(zip(*columns))
+
+class ParquetExporter(ResultExporter):
+    """
+    Columnar Parquet file with one row group per flushed chunk. Contours
+    are stored as Arrow ``list<int32>`` columns of interleaved x, y values
+    built straight from the packed point buffers, or as ``binary`` codec
+    payloads when compact. Requires ``pyarrow``.
+    """
+
+    extension = ".parquet"
+
+    def __init__(self, *args, **kwargs):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from exc
+        super().__init__(*args, **kwargs)
+        self._writer = None
+
+    def _open(self, path: str) -> IO:
+        return open(path, "wb")
+
+    def _write_chunk(self, chunk: ShapeResultSet, sources: np.ndarray) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        shape_types = pa.DictionaryArray.from_arrays(
+            pa.array(chunk.shape_codes.astype(np.int32)), pa.array(list(chunk.labels), pa.string())
+        )
+        arrays = {
+            name: shape_types if name == "shape_type" else pa.array(values)
+            for name, values in self._columns(chunk, sources).items()
+        }
+        if self.include_contours:
+            for name, batch in (("contour", chunk.contours), ("approx_contour", chunk.approx)):
+                if self.compact_contours:
+                    arrays[name] = pa.array(encode_contours(batch).payloads(), pa.binary())
+                    continue
+                arrays[name] = pa.ListArray.from_arrays(
+                    pa.array((batch.offsets * 2).astype(np.int32)),
+                    pa.array(batch.points.reshape(-1).astype(np.int32))
+                )
+        table = pa.table(arrays)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._file, table.schema)
+        self._writer.write_table(table)
+
+    def _finish(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+EXPORTERS = {"jsonl": JSONLExporter, "csv": CSVExporter, "parquet": ParquetExporter}
+
+def open_exporter(
+    path: str,
+    fmt: Optional[str] = None,
+    include_contours: bool = False,
+    chunk_rows: int = 10000,
+    compact_contours: bool = False
+) -> ResultExporter:
+    """Opens an exporter, inferring the format from the file extension if not given."""
+    if fmt is None:
+        fmt = os.path.splitext(path)[1].lower().lstrip(".")
+        fmt = {"json": "jsonl", "ndjson": "jsonl", "pq": "parquet"}.get(fmt, fmt)
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Unsupported export format '{fmt}'; use one of {EXPORT_FORMATS}")
+    return EXPORTERS[fmt](
+        path, include_contours=include_contours, chunk_rows=chunk_rows, compact_contours=compact_contours
+    )
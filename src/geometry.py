@@ -0,0 +1,399 @@
+import cv2
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+# Polygon approximation tolerance as a fraction of the perimeter
+APPROX_EPSILON_FACTOR = 0.04
+
+# (x0, y0, x1, y1), half-open
+Box = Tuple[int, int, int, int]
+
+@dataclass
+class ContourBatch:
+    """
+    Many contours packed into one flat point buffer.
+
+    Contour ``i`` occupies ``points[offsets[i]:offsets[i + 1]]``.
+    """
+    points: np.ndarray   # (P, 2) int32
+    offsets: np.ndarray  # (n + 1,) int64
+
+    @classmethod
+    def from_contours(cls, contours: Sequence[np.ndarray]) -> "ContourBatch":
+        counts = np.fromiter(map(len, contours), dtype=np.int64, count=len(contours))
+        offsets = np.zeros(len(contours) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        if offsets[-1]:
+            # findContours output is already (N, 1, 2) int32, so one concatenate packs it
+            points = np.concatenate(contours).reshape(-1, 2).astype(np.int32, copy=False)
+        else:
+            points = np.empty((0, 2), dtype=np.int32)
+        return cls(points=points, offsets=offsets)
+
+    @classmethod
+    def concat(cls, batches: Sequence["ContourBatch"]) -> "ContourBatch":
+        """Joins batches end to end."""
+        if not batches:
+            return cls.from_contours([])
+        starts = np.cumsum([0] + [len(b.points) for b in batches[:-1]])
+        offsets = np.concatenate(
+            [np.zeros(1, dtype=np.int64)] + [b.offsets[1:] + s for b, s in zip(batches, starts)]
+        )
+        points = np.concatenate([b.points for b in batches])
+        return cls(points=points.astype(np.int32, copy=False), offsets=offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def counts(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def contour(self, index: int) -> np.ndarray:
+        """View of one contour in OpenCV's (N, 1, 2) layout."""
+        return self.points[self.offsets[index]:self.offsets[index + 1]].reshape(-1, 1, 2)
+
+    def contours(self) -> List[np.ndarray]:
+        """Per-contour views in OpenCV's (N, 1, 2) layout."""
+        return [self.contour(i) for i in range(len(self))]
+
+    def take(self, indices: np.ndarray) -> "ContourBatch":
+        """
+        New batch holding the selected contours in the given order.
+
+        A contiguous ascending range is returned as a view of this buffer;
+        any other selection gathers the points in one vectorized copy.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        counts = self.counts[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        if len(indices) and np.array_equal(indices, np.arange(indices[0], indices[0] + len(indices))):
+            start = self.offsets[indices[0]]
+            return ContourBatch(points=self.points[start:start + offsets[-1]], offsets=offsets)
+
+        gather = np.arange(offsets[-1], dtype=np.int64)
+        gather += np.repeat(self.offsets[:-1][indices] - offsets[:-1], counts)
+        return ContourBatch(points=self.points[gather], offsets=offsets)
+
+    def successor(self, values: np.ndarray) -> np.ndarray:
+        """Per-point values shifted by one, wrapping around within each contour."""
+        shifted = np.empty_like(values)
+        shifted[:-1] = values[1:]
+        nonempty = self.counts > 0
+        shifted[self.offsets[1:][nonempty] - 1] = values[self.offsets[:-1][nonempty]]
+        return shifted
+
+@dataclass
+class ContourFeatures:
+    """Per-contour geometry, one row per contour of a ``ContourBatch``."""
+    area: np.ndarray       # (n,) float64, unsigned like cv2.contourArea
+    perimeter: np.ndarray  # (n,) float64, closed like cv2.arcLength(c, True)
+    centroid: np.ndarray   # (n, 2) int64, truncated like int(m10 / m00)
+    bbox: np.ndarray       # (n, 4) int64 as (x, y, w, h) like cv2.boundingRect
+
+def _segment_reduce(ufunc: np.ufunc, values: np.ndarray, batch: ContourBatch, empty=0) -> np.ndarray:
+    """Applies ``ufunc.reduceat`` per contour, tolerating empty contours."""
+    counts = batch.counts
+    if counts.all():
+        return ufunc.reduceat(values, batch.offsets[:-1], axis=0)
+    out = np.full((len(batch),) + values.shape[1:], empty, dtype=values.dtype)
+    nonempty = counts > 0
+    if nonempty.any():
+        out[nonempty] = ufunc.reduceat(values, batch.offsets[:-1][nonempty], axis=0)
+    return out
+
+def bounding_boxes(batch: ContourBatch) -> np.ndarray:
+    """Upright (x, y, w, h) boxes of every contour, like ``cv2.boundingRect``."""
+    bbox = np.zeros((len(batch), 4), dtype=np.int64)
+    for axis in (0, 1):
+        coords = np.ascontiguousarray(batch.points[:, axis])
+        lo = _segment_reduce(np.minimum, coords, batch)
+        hi = _segment_reduce(np.maximum, coords, batch)
+        bbox[:, axis] = lo
+        bbox[:, axis + 2] = np.where(batch.counts > 0, hi - lo + 1, 0)
+    return bbox
+
+def contour_areas(batch: ContourBatch) -> np.ndarray:
+    """Unsigned shoelace area of every contour, like ``cv2.contourArea``."""
+    x = batch.points[:, 0].astype(np.float64)
+    y = batch.points[:, 1].astype(np.float64)
+    cross = x * batch.successor(y)
+    cross -= batch.successor(x) * y
+    return np.abs(_segment_reduce(np.add, cross, batch) * 0.5)
+
+def _area_moments(batch: ContourBatch) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unsigned area and truncated centroid of every contour, from the same
+    Green's theorem sums as ``cv2.moments``; with integer points every sum
+    is exact in float64.
+    """
+    x = batch.points[:, 0].astype(np.float64)
+    y = batch.points[:, 1].astype(np.float64)
+    x1 = batch.successor(x)
+    y1 = batch.successor(y)
+
+    # Shoelace terms; buffers are reused in place to keep memory traffic low
+    cross = x * y1
+    tmp = x1 * y
+    cross -= tmp
+    a00 = _segment_reduce(np.add, cross, batch)
+    np.add(x, x1, out=tmp)
+    tmp *= cross
+    a10 = _segment_reduce(np.add, tmp, batch)
+    np.add(y, y1, out=tmp)
+    tmp *= cross
+    a01 = _segment_reduce(np.add, tmp, batch)
+
+    m00 = a00 * 0.5
+    centroid = np.zeros((len(batch), 2), dtype=np.int64)
+    valid = m00 != 0
+    centroid[valid, 0] = ((a10[valid] / 6.0) / m00[valid]).astype(np.int64)
+    centroid[valid, 1] = ((a01[valid] / 6.0) / m00[valid]).astype(np.int64)
+    return np.abs(m00), centroid
+
+def contour_centroids(batch: ContourBatch) -> np.ndarray:
+    """(x, y) centroid of every contour, truncated like ``int(m10 / m00)``; (0, 0) when the area is zero."""
+    return _area_moments(batch)[1]
+
+def contour_perimeters(batch: ContourBatch) -> np.ndarray:
+    """Closed perimeter of every contour, like ``cv2.arcLength(c, True)``."""
+    x = batch.points[:, 0].astype(np.float64)
+    y = batch.points[:, 1].astype(np.float64)
+    # Edge lengths including the wrap-around segment
+    dx = batch.successor(x)
+    dy = batch.successor(y)
+    dx -= x
+    dy -= y
+    dx *= dx
+    dy *= dy
+    dx += dy
+    return _segment_reduce(np.add, np.sqrt(dx, out=dx), batch)
+
+def measure_contours(batch: ContourBatch) -> ContourFeatures:
+    """
+    Area, perimeter, centroid and bounding box for every contour in a few
+    vectorized passes over the packed point buffer.
+    """
+    area, centroid = _area_moments(batch)
+    return ContourFeatures(
+        area=area,
+        perimeter=contour_perimeters(batch),
+        centroid=centroid,
+        bbox=bounding_boxes(batch)
+    )
+
+def contour_blocks(batch: ContourBatch, points_per_block: int) -> List[Tuple[int, int]]:
+    """
+    Splits the batch into consecutive ``[start, end)`` contour ranges of
+    about ``points_per_block`` points each; a single longer contour gets
+    a range of its own.
+    """
+    if not len(batch):
+        return []
+    bounds = np.searchsorted(
+        batch.offsets, np.arange(0, batch.offsets[-1], max(1, points_per_block)), side="right"
+    ) - 1
+    bounds = np.unique(np.concatenate(([0], bounds, [len(batch)])))
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+# Points per block in hu_moments; small blocks keep its many temporaries cache-resident
+HU_BLOCK_POINTS = 1 << 18
+
+def hu_moments(batch: ContourBatch) -> np.ndarray:
+    """
+    The seven Hu invariants of every contour, like ``cv2.HuMoments`` of
+    ``cv2.moments(contour)``, from the raw moments up to third order
+    accumulated per edge with Green's theorem. Degenerate contours
+    (zero area) get all zeros.
+
+    Points are taken relative to each contour's first point: the
+    invariants do not depend on the origin, and small coordinates keep
+    the third-order sums and their central corrections precise.
+    """
+    if len(batch.points) <= HU_BLOCK_POINTS:
+        return _hu_block(batch)
+    return np.concatenate([
+        _hu_block(batch.take(np.arange(start, end)))
+        for start, end in contour_blocks(batch, HU_BLOCK_POINTS)
+    ])
+
+def _hu_block(batch: ContourBatch) -> np.ndarray:
+    hu = np.zeros((len(batch), 7), dtype=np.float64)
+    if not len(batch.points):
+        return hu
+    first = batch.points[np.minimum(batch.offsets[:-1], len(batch.points) - 1)]
+    local = batch.points - np.repeat(first, batch.counts, axis=0)
+    x0 = local[:, 0].astype(np.float64)
+    y0 = local[:, 1].astype(np.float64)
+    x1 = batch.successor(x0)
+    y1 = batch.successor(y0)
+    cross = x0 * y1
+    cross -= x1 * y0
+
+    # Per-edge terms in shared sums: sx = x0 + x1, px = x0 * x1, likewise for y
+    sx, sy = x0 + x1, y0 + y1
+    px, py = x0 * x1, y0 * y1
+    xy = x0 * y0
+    x2y = xy * x0
+    xy2 = xy * y0
+    xy += batch.successor(xy)
+    x2y += batch.successor(x2y)
+    xy2 += batch.successor(xy2)
+    sx2, sy2 = sx * sx, sy * sy
+
+    def edge_sum(terms: np.ndarray) -> np.ndarray:
+        terms *= cross
+        return _segment_reduce(np.add, terms, batch)
+
+    a00 = _segment_reduce(np.add, cross, batch)
+    a10 = edge_sum(sx.copy())
+    a01 = edge_sum(sy.copy())
+    a20 = edge_sum(sx2 - px)
+    a02 = edge_sum(sy2 - py)
+    a11 = edge_sum(sx * sy + xy)
+    a30 = edge_sum(sx * (sx2 - 2 * px))
+    a03 = edge_sum(sy * (sy2 - 2 * py))
+    a21 = edge_sum(sx2 * sy + 2 * x2y)
+    a12 = edge_sum(sy2 * sx + 2 * xy2)
+
+    valid = a00 != 0
+    if not valid.any():
+        return hu
+    # Raw moments, oriented so that m00 is positive as in cv2.moments
+    sign = np.sign(a00[valid])
+    m00 = a00[valid] * sign / 2
+    m10, m01 = a10[valid] * sign / 6, a01[valid] * sign / 6
+    m20, m02, m11 = a20[valid] * sign / 12, a02[valid] * sign / 12, a11[valid] * sign / 24
+    m30, m03 = a30[valid] * sign / 20, a03[valid] * sign / 20
+    m21, m12 = a21[valid] * sign / 60, a12[valid] * sign / 60
+
+    # Central moments, then scale-normalized ones
+    cx, cy = m10 / m00, m01 / m00
+    mu20 = m20 - cx * m10
+    mu02 = m02 - cy * m01
+    mu11 = m11 - cx * m01
+    mu30 = m30 - cx * (3 * mu20 + cx * m10)
+    mu03 = m03 - cy * (3 * mu02 + cy * m01)
+    mu21 = m21 - cx * (2 * mu11 + cx * m01) - cy * mu20
+    mu12 = m12 - cy * (2 * mu11 + cy * m10) - cx * mu02
+    s2 = 1.0 / (m00 * m00)
+    s3 = s2 / np.sqrt(m00)
+    n20, n02, n11 = mu20 * s2, mu02 * s2, mu11 * s2
+    n30, n03, n21, n12 = mu30 * s3, mu03 * s3, mu21 * s3, mu12 * s3
+
+    t0, t1 = n30 + n12, n21 + n03
+    q0, q1, q2 = n20 - n02, n30 - 3 * n12, 3 * n21 - n03
+    hu[valid] = np.column_stack((
+        n20 + n02,
+        q0 * q0 + 4 * n11 * n11,
+        q1 * q1 + q2 * q2,
+        t0 * t0 + t1 * t1,
+        q1 * t0 * (t0 * t0 - 3 * t1 * t1) + q2 * t1 * (3 * t0 * t0 - t1 * t1),
+        q0 * (t0 * t0 - t1 * t1) + 4 * n11 * t0 * t1,
+        q2 * t0 * (t0 * t0 - 3 * t1 * t1) - q1 * t1 * (3 * t0 * t0 - t1 * t1),
+    ))
+    return hu
+
+def approximate_contours(
+    batch: ContourBatch,
+    perimeters: np.ndarray,
+    indices: Optional[Sequence[int]] = None,
+    factor: float = APPROX_EPSILON_FACTOR
+) -> List[np.ndarray]:
+    """
+    Polygon approximation of the selected contours, reusing the perimeters
+    already measured instead of recomputing ``arcLength``.
+    """
+    if indices is None:
+        indices = range(len(batch))
+    return [
+        cv2.approxPolyDP(batch.contour(i), factor * float(perimeters[i]), True)
+        for i in indices
+    ]
+
+def boxes_inside(bbox: np.ndarray, zone: Box) -> np.ndarray:
+    """Mask of (x, y, w, h) boxes lying fully within a zone."""
+    x0, y0, x1, y1 = zone
+    return (
+        (bbox[:, 0] >= x0) & (bbox[:, 1] >= y0)
+        & (bbox[:, 0] + bbox[:, 2] <= x1) & (bbox[:, 1] + bbox[:, 3] <= y1)
+    )
+
+def boxes_intersect(bbox: np.ndarray, zone: Box) -> np.ndarray:
+    """Mask of (x, y, w, h) boxes overlapping a zone."""
+    x0, y0, x1, y1 = zone
+    return (
+        (bbox[:, 0] < x1) & (bbox[:, 1] < y1)
+        & (bbox[:, 0] + bbox[:, 2] > x0) & (bbox[:, 1] + bbox[:, 3] > y0)
+    )
+
+def pad_box(box: Box, amount: int, height: int, width: int) -> Box:
+    """Box grown by ``amount`` on every side, clipped to the image."""
+    x0, y0, x1, y1 = box
+    return (max(0, x0 - amount), max(0, y0 - amount), min(width, x1 + amount), min(height, y1 + amount))
+
+def clean_zone(region: Box, margin: int, height: int, width: int) -> Box:
+    """
+    Region shrunk by ``margin`` on every side that is not the image border:
+    the part of a crop where blur and edge detection see the same pixels
+    as a whole-image run.
+    """
+    x0, y0, x1, y1 = region
+    return (
+        x0 + margin if x0 > 0 else 0,
+        y0 + margin if y0 > 0 else 0,
+        x1 - margin if x1 < width else width,
+        y1 - margin if y1 < height else height,
+    )
+
+def merge_boxes(bbox: np.ndarray, margin: int) -> List[Box]:
+    """
+    Unions (x, y, w, h) boxes that overlap once grown by ``margin``, in
+    order of each group's first box.
+
+    Sweeps the boxes by left edge: a box can only touch earlier ones whose
+    left edge lies within the widest box of it, and of those only the ones
+    whose right edge it has not passed yet. Overlapping pairs are joined
+    in a union-find forest.
+    """
+    n = len(bbox)
+    if n == 0:
+        return []
+    x0, y0 = bbox[:, 0] - margin, bbox[:, 1] - margin
+    x1, y1 = bbox[:, 0] + bbox[:, 2] + margin, bbox[:, 1] + bbox[:, 3] + margin
+
+    order = np.argsort(x0, kind="stable")
+    sx0, sx1, sy0, sy1 = x0[order], x1[order], y0[order], y1[order]
+    starts = np.searchsorted(sx0, sx0 - int((x1 - x0).max()), side="right")
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i in range(1, n):
+        lo = int(starts[i])
+        if lo == i:
+            continue
+        touching = (sx1[lo:i] > sx0[i]) & (sy0[lo:i] < sy1[i]) & (sy0[i] < sy1[lo:i])
+        for j in np.flatnonzero(touching).tolist():
+            a, b = find(int(order[lo + j])), find(int(order[i]))
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+    # Every root is its group's lowest index, so sorting roots keeps the first-box order
+    roots = np.array([find(i) for i in range(n)])
+    firsts, group = np.unique(roots, return_inverse=True)
+    extents = np.empty((len(firsts), 4), dtype=np.int64)
+    extents[:, :2] = np.iinfo(np.int64).max
+    extents[:, 2:] = np.iinfo(np.int64).min
+    np.minimum.at(extents[:, 0], group, bbox[:, 0])
+    np.minimum.at(extents[:, 1], group, bbox[:, 1])
+    np.maximum.at(extents[:, 2], group, bbox[:, 0] + bbox[:, 2])
+    np.maximum.at(extents[:, 3], group, bbox[:, 1] + bbox[:, 3])
+    return [tuple(box) for box in extents.tolist()]
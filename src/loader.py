@@ -0,0 +1,59 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .cache import StageCache, content_hash
+
+# Downscale factors OpenCV can apply while decoding (JPEG scales the DCT directly)
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+def decode_image(data: bytes, reduce: int = 1) -> np.ndarray:
+    """
+    Decodes encoded image bytes straight into a BGR array, optionally
+    downscaled by ``reduce`` (1, 2, 4 or 8) during decoding. EXIF
+    orientation is applied by OpenCV.
+    """
+    if reduce not in REDUCED_DECODE_FLAGS:
+        raise ValueError(f"reduce must be one of {sorted(REDUCED_DECODE_FLAGS)}")
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), REDUCED_DECODE_FLAGS[reduce])
+    if image is None:
+        raise ValueError("Unable to decode image")
+    return image
+
+def reduction_for(shape: Tuple[int, ...], max_width: int) -> int:
+    """Smallest supported decode reduction that fits ``max_width``, capped at 8."""
+    for reduce in sorted(REDUCED_DECODE_FLAGS):
+        if shape[1] / reduce <= max_width:
+            return reduce
+    return max(REDUCED_DECODE_FLAGS)
+
+class ImageLoader:
+    """
+    Decodes uploads once and keeps the results in a byte-bounded LRU keyed
+    by the content hash of the encoded bytes, so reruns on the same file
+    skip decoding entirely.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, max_entries: int = 16, cache: Optional[StageCache] = None):
+        self.cache = cache or StageCache(max_entries=max_entries, max_bytes=max_bytes)
+
+    def load(self, data: bytes, reduce: int = 1, key: Optional[str] = None) -> Tuple[str, np.ndarray]:
+        """
+        Returns ``(content_hash, bgr_image)``. Pass ``key`` when the hash of
+        ``data`` is already known. The image is shared with the cache, so it
+        is returned read-only.
+        """
+        key = key or content_hash(data)
+
+        def decode():
+            image = decode_image(data, reduce)
+            image.setflags(write=False)
+            return image
+
+        return key, self.cache.get_or_compute(("decoded", key, reduce), decode)
@@ -1,6 +1,9 @@
-from dataclasses import dataclass
-from typing import Tuple, List, Optional
+import base64
+from dataclasses import dataclass, field, replace
+from typing import Tuple, List, Optional, Dict, Any, Callable, Iterator, Sequence, Union
 import numpy as np
+from .codec import LazyContourBatch, encode_contour, encode_contours
+from .geometry import ContourBatch, bounding_boxes
 
 @dataclass
 class ShapeInfo:
@@ -12,6 +15,333 @@ class ShapeInfo:
     contour: np.ndarray
     approx_contour: np.ndarray
 
+    def to_dict(self, include_contours: bool = False, compact: bool = False) -> Dict[str, Any]:
+        """
+        Plain-Python representation suitable for JSON serialization. With
+        ``compact`` contours are base64 strings of ``codec.encode_contour``
+        bytes instead of point lists.
+        """
+        data = {
+            "shape_type": self.shape_type,
+            "area": float(self.area),
+            "perimeter": float(self.perimeter),
+            "centroid": [int(self.centroid[0]), int(self.centroid[1])],
+        }
+        if include_contours and compact:
+            data["contour"] = base64.b64encode(encode_contour(self.contour)).decode("ascii")
+            data["approx_contour"] = base64.b64encode(encode_contour(self.approx_contour)).decode("ascii")
+        elif include_contours:
+            data["contour"] = self.contour.reshape(-1, 2).tolist()
+            data["approx_contour"] = self.approx_contour.reshape(-1, 2).tolist()
+        return data
+
+@dataclass
+class PipelineStats:
+    """Wall time per stage (ms) and element counts for one analysis run."""
+    pixels: int = 0
+    contours_found: int = 0
+    contours_kept: int = 0
+    cache_hits: int = 0
+    # Stages served from the stage cache never run and are absent here
+    stages_ms: Dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    def record(self, stage: str, elapsed_ms: float) -> None:
+        self.stages_ms[stage] = self.stages_ms.get(stage, 0.0) + elapsed_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pixels": self.pixels,
+            "contours_found": self.contours_found,
+            "contours_kept": self.contours_kept,
+            "cache_hits": self.cache_hits,
+            "stages_ms": dict(self.stages_ms),
+            "total_ms": self.total_ms,
+        }
+
+# Columns of a ShapeResultSet that can be measured lazily; see LazyShapeResultSet
+RESULT_COLUMNS = ("shape_codes", "area", "perimeter", "centroid", "bbox", "contours", "approx")
+
+@dataclass
+class ShapeResultSet:
+    """
+    Columnar (struct-of-arrays) collection of detected shapes.
+
+    Scalar fields live in contiguous typed arrays and all contour points in
+    one packed buffer per kind, so large result sets cost a handful of
+    arrays instead of one object per shape. Integer indexing and iteration
+    yield ``ShapeInfo`` views; slices, masks and index arrays yield new sets.
+    """
+    labels: Tuple[str, ...]
+    shape_codes: np.ndarray  # (n,) int16 index into labels
+    area: np.ndarray         # (n,) float64
+    perimeter: np.ndarray    # (n,) float64
+    centroid: np.ndarray     # (n, 2) int32
+    bbox: np.ndarray         # (n, 4) int32 as (x, y, w, h)
+    contours: ContourBatch
+    approx: ContourBatch
+    # Set by an instrumented ImageAnalyzer; derived sets do not carry it
+    stats: Optional[PipelineStats] = None
+
+    @classmethod
+    def empty(cls, labels: Sequence[str] = ()) -> "ShapeResultSet":
+        no_points = ContourBatch.from_contours([])
+        return cls(
+            labels=tuple(labels),
+            shape_codes=np.empty(0, dtype=np.int16),
+            area=np.empty(0, dtype=np.float64),
+            perimeter=np.empty(0, dtype=np.float64),
+            centroid=np.empty((0, 2), dtype=np.int32),
+            bbox=np.empty((0, 4), dtype=np.int32),
+            contours=no_points,
+            approx=no_points
+        )
+
+    @classmethod
+    def from_shapes(cls, shapes: Sequence[ShapeInfo]) -> "ShapeResultSet":
+        """Packs a list of ``ShapeInfo`` objects into columns."""
+        contours = ContourBatch.from_contours([s.contour for s in shapes])
+        labels = tuple(dict.fromkeys(s.shape_type for s in shapes))
+        code_of = {label: i for i, label in enumerate(labels)}
+        return cls(
+            labels=labels,
+            shape_codes=np.array([code_of[s.shape_type] for s in shapes], dtype=np.int16),
+            area=np.array([s.area for s in shapes], dtype=np.float64),
+            perimeter=np.array([s.perimeter for s in shapes], dtype=np.float64),
+            centroid=np.array([s.centroid for s in shapes], dtype=np.int32).reshape(-1, 2),
+            bbox=bounding_boxes(contours).astype(np.int32),
+            contours=contours,
+            approx=ContourBatch.from_contours([s.approx_contour for s in shapes])
+        )
+
+    def __len__(self) -> int:
+        return len(self.area)
+
+    def __iter__(self) -> Iterator[ShapeInfo]:
+        for i in range(len(self)):
+            yield self._view(i)
+
+    def __getitem__(self, key: Union[int, slice, np.ndarray, Sequence[int]]):
+        if isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("shape index out of range")
+            return self._view(index)
+        return self.take(key)
+
+    def _view(self, index: int) -> ShapeInfo:
+        return ShapeInfo(
+            shape_type=self.labels[self.shape_codes[index]],
+            area=float(self.area[index]),
+            perimeter=float(self.perimeter[index]),
+            centroid=(int(self.centroid[index, 0]), int(self.centroid[index, 1])),
+            contour=self.contours.contour(index),
+            approx_contour=self.approx.contour(index)
+        )
+
+    def _indices(self, selection: Union[slice, np.ndarray, Sequence[int]]) -> np.ndarray:
+        if isinstance(selection, slice):
+            return np.arange(len(self))[selection]
+        selection = np.asarray(selection)
+        if selection.dtype == bool:
+            if len(selection) != len(self):
+                raise IndexError("boolean mask length does not match result set")
+            return np.flatnonzero(selection)
+        return selection.astype(np.int64, copy=False)
+
+    def take(self, selection: Union[slice, np.ndarray, Sequence[int]]) -> "ShapeResultSet":
+        """Subset by slice, boolean mask or index array, without per-shape objects."""
+        indices = self._indices(selection)
+        return ShapeResultSet(
+            labels=self.labels,
+            shape_codes=self.shape_codes[indices],
+            area=self.area[indices],
+            perimeter=self.perimeter[indices],
+            centroid=self.centroid[indices],
+            bbox=self.bbox[indices],
+            contours=self.contours.take(indices),
+            approx=self.approx.take(indices)
+        )
+
+    def with_columns(self, **changes: Any) -> "ShapeResultSet":
+        """Copy with some columns (or ``labels``) replaced; lazy sets stay lazy."""
+        return replace(self, **changes)
+
+    def translate(self, dx: int, dy: int) -> "ShapeResultSet":
+        """Copy with every coordinate shifted by an integer offset."""
+        offset = np.array([dx, dy], dtype=np.int32)
+        return ShapeResultSet(
+            labels=self.labels,
+            shape_codes=self.shape_codes,
+            area=self.area,
+            perimeter=self.perimeter,
+            centroid=self.centroid + offset,
+            bbox=self.bbox + np.array([dx, dy, 0, 0], dtype=np.int32),
+            contours=ContourBatch(self.contours.points + offset, self.contours.offsets),
+            approx=ContourBatch(self.approx.points + offset, self.approx.offsets)
+        )
+
+    def scale(self, factor: int) -> "ShapeResultSet":
+        """
+        Copy mapped from a level downscaled by ``factor`` back to full
+        resolution: coordinates and perimeter scale linearly, area quadratically.
+        """
+        return ShapeResultSet(
+            labels=self.labels,
+            shape_codes=self.shape_codes,
+            area=self.area * factor ** 2,
+            perimeter=self.perimeter * factor,
+            centroid=self.centroid * np.int32(factor),
+            bbox=self.bbox * np.int32(factor),
+            contours=ContourBatch(self.contours.points * np.int32(factor), self.contours.offsets),
+            approx=ContourBatch(self.approx.points * np.int32(factor), self.approx.offsets)
+        )
+
+    @staticmethod
+    def concat(sets: Sequence["ShapeResultSet"]) -> "ShapeResultSet":
+        """Stacks result sets, merging their label tables."""
+        sets = list(sets)
+        if not sets:
+            return ShapeResultSet.empty()
+        labels = tuple(dict.fromkeys(label for rs in sets for label in rs.labels))
+        code_of = {label: i for i, label in enumerate(labels)}
+        codes = []
+        for rs in sets:
+            remap = np.array([code_of[label] for label in rs.labels], dtype=np.int16)
+            codes.append(remap[rs.shape_codes] if len(rs.labels) else rs.shape_codes)
+        return ShapeResultSet(
+            labels=labels,
+            shape_codes=np.concatenate(codes),
+            area=np.concatenate([rs.area for rs in sets]),
+            perimeter=np.concatenate([rs.perimeter for rs in sets]),
+            centroid=np.concatenate([rs.centroid for rs in sets]),
+            bbox=np.concatenate([rs.bbox for rs in sets]),
+            contours=ContourBatch.concat([rs.contours for rs in sets]),
+            approx=ContourBatch.concat([rs.approx for rs in sets])
+        )
+
+    def filter(self, mask: np.ndarray) -> "ShapeResultSet":
+        """Alias of boolean indexing, e.g. ``results.filter(results.area > 500)``."""
+        return self.take(np.asarray(mask, dtype=bool))
+
+    @property
+    def shape_types(self) -> np.ndarray:
+        """Shape label of every row."""
+        return np.array(self.labels, dtype=object)[self.shape_codes]
+
+    def to_list(self) -> List[ShapeInfo]:
+        return list(self)
+
+    def to_records(self, include_contours: bool = False, compact: bool = False) -> List[Dict[str, Any]]:
+        """Plain-Python rows suitable for JSON serialization; see ``ShapeInfo.to_dict``."""
+        records = [shape.to_dict(include_contours and not compact) for shape in self]
+        if include_contours and compact:
+            # Encoded once per batch rather than once per shape
+            for name, batch in (("contour", self.contours), ("approx_contour", self.approx)):
+                for record, payload in zip(records, encode_contours(batch).payloads()):
+                    record[name] = base64.b64encode(payload).decode("ascii")
+        return records
+
+    def compress(self) -> "ShapeResultSet":
+        """
+        Same results with both contour batches held in the compact codec
+        form. Single contours are decoded on access; the point buffers are
+        only inflated when something draws or measures the whole batch.
+        """
+        return self.with_columns(
+            contours=LazyContourBatch(encode_contours(self.contours)),
+            approx=LazyContourBatch(encode_contours(self.approx))
+        )
+
+    def to_dataframe(self):
+        """
+        pandas DataFrame over the scalar columns. The numeric columns and the
+        categorical codes share memory with this set; contours are not included.
+        """
+        import pandas as pd
+
+        return pd.DataFrame({
+            "shape_type": pd.Categorical.from_codes(self.shape_codes, self.labels, validate=False),
+            "area": self.area,
+            "perimeter": self.perimeter,
+            "centroid_x": self.centroid[:, 0],
+            "centroid_y": self.centroid[:, 1],
+        }, copy=False)
+
+def _detached(name: str, indices: np.ndarray) -> Any:
+    raise ValueError(f"Result column '{name}' was not measured before the set was pickled")
+
+def _lazy_column(name: str) -> property:
+    def get(self):
+        value = self._columns.get(name)
+        if value is None:
+            value = self._columns[name] = self.resolve(name, self.indices)
+        return value
+
+    def set(self, value):
+        self._columns[name] = value
+
+    return property(get, set)
+
+class LazyShapeResultSet(ShapeResultSet):
+    """
+    ``ShapeResultSet`` whose columns are measured on first access.
+
+    ``resolve(name, indices)`` computes column ``name`` for the given rows
+    of the source (e.g. a ``ContourTable``), which the set keeps alive.
+    Columns passed in ``columns`` are used as is. Subsets stay lazy;
+    anything that reads every column (iteration, ``translate``, export)
+    measures whatever is still missing. Pickled copies (e.g. returned from
+    batch workers) carry only the columns measured so far.
+    """
+
+    shape_codes = _lazy_column("shape_codes")
+    area = _lazy_column("area")
+    perimeter = _lazy_column("perimeter")
+    centroid = _lazy_column("centroid")
+    bbox = _lazy_column("bbox")
+    contours = _lazy_column("contours")
+    approx = _lazy_column("approx")
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        indices: np.ndarray,
+        resolve: Callable[[str, np.ndarray], Any],
+        columns: Optional[Dict[str, Any]] = None
+    ):
+        self.labels = tuple(labels)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.resolve = resolve
+        self._columns: Dict[str, Any] = dict(columns or {})
+        self.stats = None
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The source stays behind, e.g. a ContourTable and its thread pool
+        return dict(self.__dict__, resolve=_detached)
+
+    @property
+    def resolved(self) -> Tuple[str, ...]:
+        """Names of the columns measured so far."""
+        return tuple(name for name in RESULT_COLUMNS if name in self._columns)
+
+    def take(self, selection: Union[slice, np.ndarray, Sequence[int]]) -> "LazyShapeResultSet":
+        indices = self._indices(selection)
+        columns = {
+            name: value.take(indices) if isinstance(value, ContourBatch) else value[indices]
+            for name, value in self._columns.items()
+        }
+        return LazyShapeResultSet(self.labels, self.indices[indices], self.resolve, columns)
+
+    def with_columns(self, **changes: Any) -> "LazyShapeResultSet":
+        labels = changes.pop("labels", self.labels)
+        return LazyShapeResultSet(labels, self.indices, self.resolve, dict(self._columns, **changes))
+
 @dataclass
 class ProcessingConfig:
     """Configuration for image processing pipeline."""
@@ -20,3 +350,45 @@ class ProcessingConfig:
     min_area: float = 100.0
     max_area: float = 50000.0
     gaussian_kernel: int = 5
+    # Contour extraction: "canny" edges, a global "otsu" or "adaptive"
+    # threshold, or "components" (thresholded like "otsu", with components
+    # outside the area range dropped from their stats before tracing)
+    backend: str = "canny"
+    # Objects "bright" or "dark" against the background, or "auto" for the
+    # minority side of Otsu's threshold; threshold backends only
+    foreground: str = "auto"
+    # Fixed global threshold for "otsu" / "components"; None lets Otsu choose
+    threshold: Optional[int] = None
+    # Neighbourhood size (odd, px) and required difference from its mean for "adaptive"
+    adaptive_block: int = 51
+    adaptive_offset: float = 10.0
+    # Threads for the per-contour stages of one image; 0 means one per core
+    threads: int = 1
+    # Passed to cv2.setNumThreads when set; 0 turns OpenCV's own threading off
+    opencv_threads: Optional[int] = None
+    # Result columns (see RESULT_COLUMNS) to measure up front; the rest are
+    # measured on first access. None measures everything eagerly.
+    fields: Optional[Tuple[str, ...]] = None
+
+@dataclass
+class BatchResult:
+    """Outcome of analyzing a single image as part of a batch run."""
+    path: str
+    shapes: ShapeResultSet = field(default_factory=ShapeResultSet.empty)
+    error: Optional[str] = None
+    # Read back from a ResultCache instead of analyzed
+    cached: bool = False
+    # Path of the earlier near-duplicate image whose results were reused
+    duplicate_of: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+@dataclass
+class FrameResult:
+    """Analysis of one video frame, with track ids aligned to ``shapes``."""
+    index: int
+    timestamp: float
+    shapes: ShapeResultSet
+    track_ids: np.ndarray
@@ -0,0 +1,238 @@
+import json
+import os
+import time
+import zipfile
+from dataclasses import asdict
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import content_hash
+from .codec import EncodedContours, LazyContourBatch, encode_contours
+from .geometry import ContourBatch
+from .models import ProcessingConfig, ShapeResultSet
+from .templates import TemplateLibrary
+
+# Bump whenever a change to detection, measurement or classification alters
+# results; entries written under any other version are never read again
+ALGORITHM_VERSION = "1"
+
+# Config fields that change how fast results are produced, not what they are
+PERFORMANCE_FIELDS = ("threads", "opencv_threads", "fields")
+
+# Writers that died mid-write leave temporary files; older ones are swept
+STALE_TEMP_SECONDS = 3600
+
+def default_cache_dir() -> str:
+    """``$SHAPE_ANALYZER_CACHE``, else ``~/.cache/shape-analyzer``."""
+    return os.environ.get(
+        "SHAPE_ANALYZER_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "shape-analyzer")
+    )
+
+def config_hash(config: ProcessingConfig) -> str:
+    """Digest of the config fields that affect results, independent of field order."""
+    fields = {k: v for k, v in asdict(config).items() if k not in PERFORMANCE_FIELDS}
+    return content_hash(json.dumps(fields, sort_keys=True).encode())
+
+class ResultCache:
+    """
+    Content-addressed on-disk store of analysis results, shared by every
+    process pointed at the same directory.
+
+    Entries live under ``<directory>/v<version>/`` as ``.npz`` files named
+    by a digest of the image hash, the config hash and (when templates
+    relabel shapes) the template library's fingerprint. Contours are kept
+    in the compact codec form and decoded lazily on load.
+
+    Writers publish complete files with an atomic ``os.replace``, so
+    readers in other processes see an entry either whole or not at all.
+    Reads bump the file's mtime, and once the directory grows past
+    ``max_bytes`` the least recently used entries are deleted, stale
+    versions first. Any unreadable or vanished entry is a miss.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = 1 << 30,
+        version: str = ALGORITHM_VERSION
+    ):
+        self.root = directory or default_cache_dir()
+        self.directory = os.path.join(self.root, f"v{version}")
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        # Estimated directory size; None until the first scan
+        self._nbytes: Optional[int] = None
+
+    def key(
+        self,
+        image_key: str,
+        config: ProcessingConfig,
+        templates: Optional[TemplateLibrary] = None,
+        kind: str = "analyze"
+    ) -> str:
+        """
+        Entry name for ``image_key`` (a content hash of the image or its
+        encoded file) analyzed with ``config``. ``kind`` separates results
+        of different pipelines on the same inputs, e.g. preview refinement.
+        """
+        parts = [kind, image_key, config_hash(config)]
+        if templates is not None and len(templates):
+            parts.append(templates.fingerprint())
+        return content_hash("/".join(parts).encode())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".npz")
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str) -> Optional[ShapeResultSet]:
+        """The stored results for ``key``, or ``None``."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                results = self._unpack(data)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # Truncated or foreign file: drop it and recompute
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted by another process in the meantime
+        self.hits += 1
+        return results
+
+    def put(self, key: str, results: ShapeResultSet) -> None:
+        import tempfile
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp = tempfile.mkstemp(prefix=".tmp-", suffix=".npz", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(fh, **self._pack(results))
+            size = os.path.getsize(temp)
+            try:
+                # Overwriting an entry replaces its bytes rather than adding to them
+                size -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(temp, path)
+        except BaseException:
+            self._remove(temp)
+            raise
+        if self._nbytes is None:
+            self._nbytes = sum(size for _, size, _ in self._entries())
+        else:
+            self._nbytes += size
+        if self._nbytes > self.max_bytes:
+            self.evict()
+
+    def get_or_compute(self, key: str, compute: Callable[[], ShapeResultSet]) -> ShapeResultSet:
+        results = self.get(key)
+        if results is None:
+            results = compute()
+            self.put(key, results)
+        return results
+
+    def evict(self, target: Optional[int] = None) -> int:
+        """
+        Deletes least recently used entries until the cache holds at most
+        ``target`` bytes (default: 90% of ``max_bytes``, so eviction does
+        not rerun on every write). Returns the number of bytes freed.
+        """
+        target = int(self.max_bytes * 0.9) if target is None else target
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        # Other versions are unreachable and go first, then oldest access first
+        current = self.directory + os.sep
+        entries.sort(key=lambda e: (e[0].startswith(current), e[2]))
+        for path, size, _ in entries:
+            if total - freed <= target:
+                break
+            if self._remove(path):
+                freed += size
+        self._nbytes = total - freed
+        return freed
+
+    def clear(self) -> None:
+        for path, _, _ in self._entries():
+            self._remove(path)
+        self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes currently on disk, including entries of other versions."""
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self) -> List[Tuple[str, int, float]]:
+        """``(path, size, mtime)`` of every entry; sweeps abandoned temp files."""
+        entries = []
+        now = time.time()
+        try:
+            versions = [e.path for e in os.scandir(self.root) if e.is_dir() and e.name.startswith("v")]
+        except FileNotFoundError:
+            return entries
+        for base, _, names in (walked for version in versions for walked in os.walk(version)):
+            for name in names:
+                if not name.endswith(".npz"):
+                    continue
+                path = os.path.join(base, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if name.startswith(".tmp-"):
+                    if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                        self._remove(path)
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _pack(results: ShapeResultSet) -> dict:
+        arrays = {
+            "labels": np.array(results.labels, dtype=str),
+            "shape_codes": results.shape_codes,
+            "area": results.area,
+            "perimeter": results.perimeter,
+            "centroid": results.centroid,
+            "bbox": results.bbox,
+        }
+        for name in ("contours", "approx"):
+            batch = getattr(results, name)
+            encoded = batch.encoded if isinstance(batch, LazyContourBatch) else encode_contours(batch)
+            arrays[name] = np.frombuffer(encoded.to_bytes(), dtype=np.uint8)
+        return arrays
+
+    @staticmethod
+    def _unpack(data) -> ShapeResultSet:
+        def contours(name: str) -> ContourBatch:
+            return LazyContourBatch(EncodedContours.from_bytes(data[name].tobytes()))
+
+        return ShapeResultSet(
+            labels=tuple(data["labels"].tolist()),
+            shape_codes=data["shape_codes"],
+            area=data["area"],
+            perimeter=data["perimeter"],
+            centroid=data["centroid"],
+            bbox=data["bbox"],
+            contours=contours("contours"),
+            approx=contours("approx")
+        )
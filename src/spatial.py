@@ -0,0 +1,179 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .models import ShapeResultSet
+
+# Shapes whose boxes would cover more grid cells than this are kept in a
+# short side list instead, so one huge shape cannot bloat the grid
+MAX_CELLS_PER_SHAPE = 64
+
+class _CellTable:
+    """CSR mapping from grid cell to the shape indices registered in it."""
+
+    def __init__(self, cells: np.ndarray, shapes: np.ndarray, n_cells: int):
+        order = np.argsort(cells, kind="stable")
+        self.shapes = shapes[order]
+        self.offsets = np.zeros(n_cells + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=n_cells), out=self.offsets[1:])
+
+    def lookup(self, cells: np.ndarray) -> np.ndarray:
+        """Shape indices registered in any of the given cells (may repeat)."""
+        if len(cells) == 1:
+            c = int(cells[0])
+            return self.shapes[self.offsets[c]:self.offsets[c + 1]]
+        starts, ends = self.offsets[cells], self.offsets[cells + 1]
+        counts = ends - starts
+        # Concatenated ranges [starts[i], ends[i]) without a Python loop
+        first = np.cumsum(counts) - counts
+        return self.shapes[np.arange(counts.sum()) + np.repeat(starts - first, counts)]
+
+class ShapeIndex:
+    """
+    Uniform-grid spatial index over a ``ShapeResultSet``.
+
+    Bounding boxes are registered in every grid cell they overlap and
+    centroids in the cell they fall in, so point, rectangle and nearest
+    neighbour queries only inspect a few cells instead of scanning all
+    shapes. The cell size defaults to the median box side. All queries
+    return indices into the indexed result set.
+    """
+
+    def __init__(self, results: ShapeResultSet, cell_size: Optional[int] = None):
+        self.results = results
+        bbox = results.bbox.astype(np.int64)
+        n = len(bbox)
+        if cell_size is None:
+            cell_size = int(np.median(np.maximum(bbox[:, 2], bbox[:, 3]))) if n else 64
+        self.cell_size = max(1, cell_size)
+
+        x0, y0 = bbox[:, 0], bbox[:, 1]
+        x1, y1 = x0 + bbox[:, 2], y0 + bbox[:, 3]
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.centroids = results.centroid.astype(np.int64)
+
+        extent_x = int(max(x1.max(initial=0), self.centroids[:, 0].max(initial=0))) + 1
+        extent_y = int(max(y1.max(initial=0), self.centroids[:, 1].max(initial=0))) + 1
+        self.origin = (
+            int(min(x0.min(initial=0), self.centroids[:, 0].min(initial=0))),
+            int(min(y0.min(initial=0), self.centroids[:, 1].min(initial=0))),
+        )
+        self.cols = (extent_x - self.origin[0]) // self.cell_size + 1
+        self.rows = (extent_y - self.origin[1]) // self.cell_size + 1
+
+        # Box table: every (cell, shape) pair, expanded without a Python loop
+        cx0, cy0 = self._cell_x(x0), self._cell_y(y0)
+        cx1, cy1 = self._cell_x(np.maximum(x1 - 1, x0)), self._cell_y(np.maximum(y1 - 1, y0))
+        spans_x, spans_y = cx1 - cx0 + 1, cy1 - cy0 + 1
+        covered = spans_x * spans_y
+        large = covered > MAX_CELLS_PER_SHAPE
+        self.large = np.flatnonzero(large)
+
+        small = np.flatnonzero(~large)
+        counts = covered[small]
+        owner = np.repeat(small, counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell_x = cx0[owner] + local % spans_x[owner]
+        cell_y = cy0[owner] + local // spans_x[owner]
+        self._boxes = _CellTable(cell_y * self.cols + cell_x, owner, self.rows * self.cols)
+
+        centroid_cells = self._cell_y(self.centroids[:, 1]) * self.cols + self._cell_x(self.centroids[:, 0])
+        self._points = _CellTable(centroid_cells, np.arange(n), self.rows * self.cols)
+
+    def __len__(self) -> int:
+        return len(self.results)
+
+    def _cell_x(self, x):
+        return np.clip((x - self.origin[0]) // self.cell_size, 0, self.cols - 1)
+
+    def _cell_y(self, y):
+        return np.clip((y - self.origin[1]) // self.cell_size, 0, self.rows - 1)
+
+    def _cells_in(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """Cell ids overlapping the half-open rectangle."""
+        cx0, cx1 = int(self._cell_x(x0)), int(self._cell_x(max(x1 - 1, x0)))
+        cy0, cy1 = int(self._cell_y(y0)), int(self._cell_y(max(y1 - 1, y0)))
+        return (np.arange(cy0, cy1 + 1)[:, None] * self.cols + np.arange(cx0, cx1 + 1)[None, :]).ravel()
+
+    def _box_candidates(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        found = self._boxes.lookup(self._cells_in(x0, y0, x1, y1))
+        return np.unique(np.concatenate((found, self.large)))
+
+    def at(self, x: int, y: int, exact: bool = True) -> np.ndarray:
+        """
+        Shapes containing the pixel (x, y), smallest first. With
+        ``exact=False`` only bounding boxes are tested.
+        """
+        candidates = self._box_candidates(x, y, x + 1, y + 1)
+        hit = candidates[
+            (self.x0[candidates] <= x) & (x < self.x1[candidates])
+            & (self.y0[candidates] <= y) & (y < self.y1[candidates])
+        ]
+        if exact:
+            point = (float(x), float(y))
+            hit = hit[[
+                cv2.pointPolygonTest(self.results.contours.contour(int(i)), point, False) >= 0
+                for i in hit
+            ]] if len(hit) else hit
+        return hit[np.argsort(self.results.area[hit], kind="stable")]
+
+    def in_rect(self, x0: int, y0: int, x1: int, y1: int, fully_inside: bool = False) -> np.ndarray:
+        """Shapes whose boxes intersect (or lie fully inside) the half-open rectangle."""
+        candidates = self._box_candidates(x0, y0, x1, y1)
+        cx0, cy0 = self.x0[candidates], self.y0[candidates]
+        cx1, cy1 = self.x1[candidates], self.y1[candidates]
+        if fully_inside:
+            mask = (cx0 >= x0) & (cy0 >= y0) & (cx1 <= x1) & (cy1 <= y1)
+        else:
+            mask = (cx0 < x1) & (cy0 < y1) & (cx1 > x0) & (cy1 > y0)
+        return candidates[mask]
+
+    def nearest(self, x: float, y: float, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        ``(indices, distances)`` of the ``k`` centroids closest to (x, y),
+        nearest first. Rings of cells are searched outwards until no
+        unvisited cell can hold anything closer.
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        gx = int(self._cell_x(int(np.floor(x))))
+        gy = int(self._cell_y(int(np.floor(y))))
+        found = []
+        n_found = 0
+        radius = 0
+        while True:
+            found.append(self._points.lookup(self._ring(gx, gy, radius)))
+            n_found += len(found[-1])
+            covers_grid = gx - radius <= 0 and gy - radius <= 0 and gx + radius >= self.cols - 1 and gy + radius >= self.rows - 1
+            if n_found >= k or covers_grid:
+                candidates = np.concatenate(found)
+                dist = np.hypot(self.centroids[candidates, 0] - x, self.centroids[candidates, 1] - y)
+                order = np.argsort(dist, kind="stable")[:k]
+                # Distance from the query to the nearest cell not searched yet
+                c = self.cell_size
+                reach = min(
+                    x - (self.origin[0] + (gx - radius) * c) if gx - radius > 0 else np.inf,
+                    self.origin[0] + (gx + radius + 1) * c - x if gx + radius < self.cols - 1 else np.inf,
+                    y - (self.origin[1] + (gy - radius) * c) if gy - radius > 0 else np.inf,
+                    self.origin[1] + (gy + radius + 1) * c - y if gy + radius < self.rows - 1 else np.inf,
+                )
+                if covers_grid or (len(order) == k and dist[order[-1]] <= reach):
+                    return candidates[order], dist[order]
+            radius += 1
+
+    def _ring(self, gx: int, gy: int, radius: int) -> np.ndarray:
+        """Cell ids at Chebyshev distance ``radius`` from (gx, gy), clipped to the grid."""
+        if radius == 0:
+            return np.array([gy * self.cols + gx])
+        xs = np.arange(max(gx - radius, 0), min(gx + radius, self.cols - 1) + 1)
+        ys = np.arange(max(gy - radius + 1, 0), min(gy + radius - 1, self.rows - 1) + 1)
+        parts = []
+        for row in (gy - radius, gy + radius):
+            if 0 <= row < self.rows:
+                parts.append(row * self.cols + xs)
+        for col in (gx - radius, gx + radius):
+            if 0 <= col < self.cols:
+                parts.append(ys * self.cols + col)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
@@ -0,0 +1,230 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .models import ProcessingConfig, ShapeResultSet
+from .analyzer import ImageAnalyzer
+from .geometry import Box, boxes_inside, boxes_intersect, clean_zone, merge_boxes, pad_box
+
+def open_image_source(path: str):
+    """
+    Opens an image for tiled reading. ``.npy`` files are memory-mapped so
+    tiles are paged in lazily; other formats are decoded fully by OpenCV.
+    """
+    if path.lower().endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        raise IOError(f"Unable to decode image: {path}")
+    return image
+
+
+class _Found:
+    """Unfiltered candidate contours of one analyzed region."""
+
+    def __init__(self, table, indices: np.ndarray, offset: Tuple[int, int]):
+        self.table = table
+        self.indices = indices
+        self.offset = offset
+
+    @property
+    def bbox(self) -> np.ndarray:
+        return self.table.bbox[self.indices] + np.array([self.offset[0], self.offset[1], 0, 0])
+
+    @property
+    def areas(self) -> np.ndarray:
+        return self.table.areas[self.indices]
+
+    def contour(self, i: int) -> np.ndarray:
+        """Contour ``i`` of this candidate list, in full-image coordinates."""
+        return self.table.batch.contour(int(self.indices[i])) + np.array(self.offset, dtype=np.int32)
+
+    def subset(self, mask: np.ndarray) -> "_Found":
+        return _Found(self.table, self.indices[mask], self.offset)
+
+    def shapes(self, mask: np.ndarray) -> ShapeResultSet:
+        return self.table.shapes(self.indices[mask]).translate(*self.offset)
+
+
+class TiledAnalyzer:
+    """
+    Runs the analysis pipeline over overlapping tiles of a large image.
+
+    Each tile is read lazily from the source (a NumPy array, ``np.memmap``
+    or any array-like supporting 2D slicing), so peak memory is bounded by
+    ``workers`` times the padded tile size rather than by the image size.
+
+    A contour is accepted from a tile when it lies inside that tile's
+    *clean zone*, the padded region minus a margin wide enough that blur
+    and edge detection see exactly the same pixels as a whole-image run,
+    and its bounding box starts in the tile's core. Contours reaching into
+    the margin cross a seam: their boxes are merged and re-analyzed from
+    the source in a region grown until they are whole. Finally, contours
+    enclosed by a seam-crossing contour are dropped, as whole-image
+    external retrieval would never report them. Area, perimeter and
+    centroid therefore match a whole-image run.
+    """
+
+    def __init__(
+        self,
+        config: ProcessingConfig,
+        tile_size: int = 2048,
+        overlap: int = 64,
+        workers: Optional[int] = None,
+    ):
+        self.config = config
+        self.tile_size = tile_size
+        analyzer = ImageAnalyzer(config)
+        self.margin = analyzer.margin
+        # Tiles must agree on any global threshold, so it cannot be chosen per tile
+        self.region_config = analyzer.region_config()
+        self.overlap = max(overlap, 2 * self.margin)
+        self.workers = workers or os.cpu_count() or 1
+        if tile_size <= 2 * self.margin:
+            raise ValueError("tile_size is too small for the blur kernel")
+
+    def analyze(self, source: Union[np.ndarray, str]) -> ShapeResultSet:
+        """Analyzes the whole source; results are in full-image coordinates."""
+        if isinstance(source, str):
+            source = open_image_source(source)
+        height, width = source.shape[:2]
+        tiles = self._plan(height, width)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            tile_results = list(pool.map(lambda t: self._analyze_tile(source, t), tiles))
+            seeds = [cut for _, cut in tile_results if len(cut)]
+            groups = merge_boxes(np.concatenate(seeds), self.margin) if seeds else []
+            seam_found = list(pool.map(lambda g: self._analyze_seam(source, g), groups))
+
+        found = [f for f, _ in tile_results] + self._dedupe(seam_found)
+        external = self._external_masks(found)
+        return ShapeResultSet.concat([
+            f.shapes(keep & self._area_ok(f.areas)) for f, keep in zip(found, external)
+        ])
+
+    # -- geometry helpers -------------------------------------------------
+
+    def _plan(self, height: int, width: int) -> List[Tuple[Box, Box]]:
+        """Core and padded region of every tile, row-major."""
+        tiles = []
+        for y0 in range(0, height, self.tile_size):
+            for x0 in range(0, width, self.tile_size):
+                core = (x0, y0, min(x0 + self.tile_size, width), min(y0 + self.tile_size, height))
+                tiles.append((core, pad_box(core, self.overlap, height, width)))
+        return tiles
+
+    def _clean_in_owner(self, bbox: np.ndarray, height: int, width: int) -> np.ndarray:
+        """Whether each box would have been accepted by the tile owning its top-left corner."""
+        ts, m = self.tile_size, self.margin
+        cx0 = (bbox[:, 0] // ts) * ts
+        cy0 = (bbox[:, 1] // ts) * ts
+        rx0 = np.maximum(0, cx0 - self.overlap)
+        ry0 = np.maximum(0, cy0 - self.overlap)
+        rx1 = np.minimum(width, cx0 + ts + self.overlap)
+        ry1 = np.minimum(height, cy0 + ts + self.overlap)
+        zx0 = np.where(rx0 > 0, rx0 + m, 0)
+        zy0 = np.where(ry0 > 0, ry0 + m, 0)
+        zx1 = np.where(rx1 < width, rx1 - m, width)
+        zy1 = np.where(ry1 < height, ry1 - m, height)
+        return (
+            (bbox[:, 0] >= zx0) & (bbox[:, 1] >= zy0)
+            & (bbox[:, 0] + bbox[:, 2] <= zx1) & (bbox[:, 1] + bbox[:, 3] <= zy1)
+        )
+
+    # -- analysis ---------------------------------------------------------
+
+    def _read(self, source, region: Box) -> np.ndarray:
+        x0, y0, x1, y1 = region
+        return np.ascontiguousarray(source[y0:y1, x0:x1])
+
+    def _analyze_tile(self, source, tile: Tuple[Box, Box]) -> Tuple[_Found, np.ndarray]:
+        core, region = tile
+        height, width = source.shape[:2]
+        table = ImageAnalyzer(self.region_config).extract(self._read(source, region))
+        bbox = table.bbox + np.array([region[0], region[1], 0, 0])
+
+        clean = boxes_inside(bbox, clean_zone(region, self.margin, height, width))
+        owned = (
+            (bbox[:, 0] >= core[0]) & (bbox[:, 0] < core[2])
+            & (bbox[:, 1] >= core[1]) & (bbox[:, 1] < core[3])
+        )
+        found = _Found(table, np.flatnonzero(clean & owned), (region[0], region[1]))
+        return found, bbox[~clean]
+
+    def _analyze_seam(self, source, group: Box) -> _Found:
+        height, width = source.shape[:2]
+        region = pad_box(group, self.overlap, height, width)
+        while True:
+            table = ImageAnalyzer(self.region_config).extract(self._read(source, region))
+            bbox = table.bbox + np.array([region[0], region[1], 0, 0])
+            relevant = boxes_intersect(bbox, group)
+            cut = relevant & ~boxes_inside(bbox, clean_zone(region, self.margin, height, width))
+            if not cut.any():
+                break
+            # Grow the region until every contour touching the seam is whole
+            grown = (
+                min(region[0], int(bbox[cut, 0].min())), min(region[1], int(bbox[cut, 1].min())),
+                max(region[2], int((bbox[cut, 0] + bbox[cut, 2]).max())),
+                max(region[3], int((bbox[cut, 1] + bbox[cut, 3]).max())),
+            )
+            region = pad_box(grown, self.overlap, height, width)
+
+        keep = relevant & ~self._clean_in_owner(bbox, height, width)
+        return _Found(table, np.flatnonzero(keep), (region[0], region[1]))
+
+    def _area_ok(self, areas: np.ndarray) -> np.ndarray:
+        return (areas >= self.config.min_area) & (areas <= self.config.max_area)
+
+    @staticmethod
+    def _dedupe(seam_found: List[_Found]) -> List[_Found]:
+        """Drops contours found by more than one seam group."""
+        seen = set()
+        unique = []
+        for found in seam_found:
+            counts = found.table.batch.counts[found.indices]
+            keep = []
+            for box, area, count in zip(map(tuple, found.bbox), found.areas, counts):
+                key = box + (float(area), int(count))
+                keep.append(key not in seen)
+                seen.add(key)
+            unique.append(found.subset(np.array(keep, dtype=bool)))
+        return unique
+
+    def _external_masks(self, found: List[_Found]) -> List[np.ndarray]:
+        """
+        Marks contours that are not enclosed by another candidate.
+
+        A tile can only report a nested contour as external when its
+        encloser was cut by that tile, so only enclosers spanning more
+        than one tile core need to be checked.
+        """
+        sizes = [len(f.indices) for f in found]
+        if not sum(sizes):
+            return [np.ones(0, dtype=bool) for _ in found]
+        bbox = np.concatenate([f.bbox for f in found])
+        owner = np.repeat(np.arange(len(found)), sizes)
+        local = np.concatenate([np.arange(n) for n in sizes])
+        x0, y0 = bbox[:, 0], bbox[:, 1]
+        x1, y1 = x0 + bbox[:, 2], y0 + bbox[:, 3]
+
+        ts = self.tile_size
+        spans = ((x0 // ts) != ((x1 - 1) // ts)) | ((y0 // ts) != ((y1 - 1) // ts))
+        outers = np.flatnonzero(spans & (bbox[:, 2] >= 3) & (bbox[:, 3] >= 3))
+
+        external = np.ones(len(bbox), dtype=bool)
+        for i in outers:
+            inner = np.flatnonzero(
+                (x0 >= x0[i]) & (y0 >= y0[i]) & (x1 <= x1[i]) & (y1 <= y1[i]) & external
+            )
+            inner = inner[inner != i]
+            if not len(inner):
+                continue
+            outer_cnt = found[owner[i]].contour(local[i])
+            for j in inner:
+                point = found[owner[j]].contour(local[j])[0, 0]
+                if cv2.pointPolygonTest(outer_cnt, (float(point[0]), float(point[1])), False) > 0:
+                    external[j] = False
+        return np.split(external, np.cumsum(sizes)[:-1])
@@ -0,0 +1,78 @@
+import numpy as np
+from typing import Dict
+
+class CentroidTracker:
+    """
+    Associates detections across frames by centroid proximity.
+
+    Each detection is matched greedily to the nearest live track within
+    ``max_distance`` pixels; unmatched detections start new tracks, and a
+    track is dropped after ``max_missed`` consecutive frames without a match.
+    """
+
+    def __init__(self, max_distance: float = 50.0, max_missed: int = 5):
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.next_id = 0
+        self._centroids = np.empty((0, 2), dtype=np.float64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._missed = np.empty(0, dtype=np.int64)
+
+    @property
+    def active_tracks(self) -> Dict[int, tuple]:
+        """Live track ids mapped to their last known centroid."""
+        return {int(i): tuple(c) for i, c in zip(self._ids, self._centroids)}
+
+    def reset(self) -> None:
+        self.__init__(self.max_distance, self.max_missed)
+
+    def update(self, centroids: np.ndarray) -> np.ndarray:
+        """
+        Assigns a track id to every centroid of the current frame.
+
+        Returns an int64 array aligned with ``centroids``.
+        """
+        centroids = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+        n_tracks, n_dets = len(self._ids), len(centroids)
+        assigned = np.full(n_dets, -1, dtype=np.int64)
+        track_matched = np.zeros(n_tracks, dtype=bool)
+
+        if n_tracks and n_dets:
+            # All pairwise distances, then closest pairs first
+            diff = self._centroids[:, None, :] - centroids[None, :, :]
+            dist = np.sqrt((diff ** 2).sum(axis=2))
+            order = np.argsort(dist, axis=None, kind="stable")
+            rows, cols = np.unravel_index(order, dist.shape)
+            within = dist[rows, cols] <= self.max_distance
+            remaining = min(n_tracks, n_dets)
+            for t, d in zip(rows[within], cols[within]):
+                if track_matched[t] or assigned[d] >= 0:
+                    continue
+                track_matched[t] = True
+                assigned[d] = t
+                remaining -= 1
+                if not remaining:
+                    break
+
+        # Matched tracks move to their detection
+        det_idx = np.flatnonzero(assigned >= 0)
+        track_idx = assigned[det_idx]
+        self._centroids[track_idx] = centroids[det_idx]
+        self._missed[track_idx] = 0
+        ids = np.empty(n_dets, dtype=np.int64)
+        ids[det_idx] = self._ids[track_idx]
+
+        # Unmatched tracks age out
+        self._missed[~track_matched] += 1
+        alive = self._missed <= self.max_missed
+
+        # Unmatched detections open new tracks
+        new_idx = np.flatnonzero(assigned < 0)
+        new_ids = np.arange(self.next_id, self.next_id + len(new_idx), dtype=np.int64)
+        self.next_id += len(new_idx)
+        ids[new_idx] = new_ids
+
+        self._centroids = np.concatenate([self._centroids[alive], centroids[new_idx]])
+        self._ids = np.concatenate([self._ids[alive], new_ids])
+        self._missed = np.concatenate([self._missed[alive], np.zeros(len(new_idx), dtype=np.int64)])
+        return ids
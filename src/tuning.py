@@ -0,0 +1,208 @@
+from dataclasses import dataclass, replace
+from typing import Callable, Iterable, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .models import ProcessingConfig
+from .processors import ImageProcessor
+from .geometry import ContourBatch, contour_areas
+
+DEFAULT_THRESHOLDS = tuple(range(10, 256, 20))
+SCORING_METHODS = ("count", "stability")
+
+@dataclass
+class TuningResult:
+    """Outcome of a Canny threshold sweep."""
+    config: ProcessingConfig
+    thresholds1: np.ndarray
+    thresholds2: np.ndarray
+    counts: np.ndarray  # (len(thresholds1), len(thresholds2)) in-range shapes, -1 where t1 > t2
+    scores: np.ndarray  # same layout, NaN where the pair was not evaluated
+
+class CannyTuner:
+    """
+    Sweeps Canny threshold pairs over a grid and picks the best one.
+
+    Grayscale, blur, Sobel gradients and non-maximum suppression are
+    computed once per image; every lower threshold (a row of the grid) then
+    costs one labeling and one contour trace of its candidate edges, which
+    answer all upper thresholds at once. On noisy photos low rows have many
+    candidates, so a default 13 x 13 sweep costs roughly 10-20 analysis
+    runs, not the ~60 that a Canny call per pair would.
+
+    Scoring methods:
+      - ``count``: the pair yielding the most shapes within the area range.
+      - ``stability``: favours pairs whose shape count barely changes across
+        neighbouring pairs, scaled by that count, so the pick sits on a
+        plateau rather than on a noisy spike.
+    """
+
+    def __init__(
+        self,
+        config: ProcessingConfig,
+        thresholds1: Sequence[int] = DEFAULT_THRESHOLDS,
+        thresholds2: Sequence[int] = DEFAULT_THRESHOLDS,
+        score: str = "stability"
+    ):
+        if score not in SCORING_METHODS:
+            raise ValueError(f"score must be one of {SCORING_METHODS}")
+        self.config = config
+        self.thresholds1 = np.asarray(thresholds1, dtype=np.int64)
+        self.thresholds2 = np.asarray(thresholds2, dtype=np.int64)
+        self.score = score
+        self.processor = ImageProcessor()
+
+    def sweep_counts(
+        self,
+        image: np.ndarray,
+        progress: Optional[Callable[[float], None]] = None
+    ) -> np.ndarray:
+        """
+        In-range shape count for every threshold pair on one image.
+
+        Canny keeps the gradient maxima above t1 that are 8-connected to one
+        above t2, so each connected component of a row's candidates (the
+        maxima above t1) survives exactly the t2 below its peak magnitude. The candidates'
+        contour tree is traced once; for a given t2 an outer contour counts
+        when its component survives and no surviving component encloses it,
+        as RETR_EXTERNAL would see it. ``progress`` is called with the
+        fraction of rows done after each row, and may raise to abort.
+        """
+        gray = self.processor.to_grayscale(image)
+        blur = self.processor.apply_blur(gray, self.config.gaussian_kernel)
+        dx, dy = self.processor.compute_gradients(blur)
+        # Which pixels survive non-maximum suppression does not depend on the thresholds, so
+        # one pass at the lowest t1 finds the candidates of every row, with Canny's L1 magnitude
+        lowest = int(self.thresholds1.min()) if len(self.thresholds1) else 0
+        maxima = np.flatnonzero(self.processor.detect_edges_from_gradients(dx, dy, lowest, lowest))
+        maxima_magnitude = np.abs(dx.ravel()[maxima], dtype=np.int32) + np.abs(dy.ravel()[maxima], dtype=np.int32)
+
+        counts = np.full((len(self.thresholds1), len(self.thresholds2)), -1, dtype=np.int64)
+        for i, t1 in enumerate(self.thresholds1):
+            columns = np.flatnonzero(self.thresholds2 >= t1)
+            if len(columns):
+                row = maxima_magnitude > t1
+                counts[i, columns] = self._row_counts(
+                    gray.shape, maxima[row], maxima_magnitude[row], self.thresholds2[columns]
+                )
+            if progress is not None:
+                progress((i + 1) / len(self.thresholds1))
+        return counts
+
+    def _row_counts(
+        self,
+        shape: Tuple[int, int],
+        pixels: np.ndarray,
+        pixel_magnitude: np.ndarray,
+        thresholds2: np.ndarray
+    ) -> np.ndarray:
+        """
+        In-range shape counts for one lower threshold and every upper one,
+        given the flat indices and magnitudes of its candidate pixels.
+        """
+        if not len(pixels):
+            return np.zeros(len(thresholds2), dtype=np.int64)
+        candidates = np.zeros(shape, dtype=np.uint8)
+        candidates.ravel()[pixels] = 255
+        n, labels, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(
+            candidates, 8, cv2.CV_32S, cv2.CCL_GRANA
+        )
+        pixel_labels = labels.ravel()[pixels]
+        peaks = np.zeros(n, dtype=np.int32)
+        np.maximum.at(peaks, pixel_labels, pixel_magnitude)
+
+        # A component whose box cannot hold min_area never counts, and can only enclose smaller
+        # ones that cannot either; one that survives no t2 never counts or hides anything.
+        # Neither needs tracing.
+        w, h = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+        keep = ((w - 1) * (h - 1) >= self.config.min_area) & (peaks > thresholds2.min())
+        keep[0] = False  # background
+        if not keep.any():
+            return np.zeros(len(thresholds2), dtype=np.int64)
+        candidates.ravel()[pixels[~keep[pixel_labels]]] = 0
+        contours, hierarchy = cv2.findContours(candidates, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return np.zeros(len(thresholds2), dtype=np.int64)
+        parent = hierarchy[0, :, 3]
+        depth = np.zeros(len(parent), dtype=np.int64)
+        up = parent.copy()
+        while (up >= 0).any():
+            depth += up >= 0
+            up = np.where(up >= 0, parent[up], -1)
+        # Outer borders sit at even depths; the one enclosing a component is two levels up, past a hole
+        outer = np.flatnonzero(depth % 2 == 0)
+        position = np.full(len(parent), -1, dtype=np.int64)
+        position[outer] = np.arange(len(outer))
+        grandparent = np.where(parent[outer] >= 0, parent[np.maximum(parent[outer], 0)], -1)
+        enclosing = np.where(grandparent >= 0, position[np.maximum(grandparent, 0)], -1)
+
+        starts = np.array([contours[k][0, 0] for k in outer.tolist()])
+        component_peaks = peaks[labels[starts[:, 1], starts[:, 0]]]
+        areas = contour_areas(ContourBatch.from_contours([contours[k] for k in outer.tolist()]))
+        in_range = (areas >= self.config.min_area) & (areas <= self.config.max_area)
+
+        survives = component_peaks[None, :] > thresholds2[:, None]
+        hidden = np.zeros_like(survives)
+        up = enclosing.copy()
+        while (up >= 0).any():
+            has = up >= 0
+            hidden[:, has] |= survives[:, up[has]]
+            up = np.where(has, enclosing[np.maximum(up, 0)], -1)
+        return np.count_nonzero(survives & ~hidden & in_range[None, :], axis=1)
+
+    def tune(
+        self,
+        image: np.ndarray,
+        progress: Optional[Callable[[float], None]] = None
+    ) -> TuningResult:
+        """Picks the best threshold pair for a single image."""
+        return self._result(self.sweep_counts(image, progress))
+
+    def tune_many(self, images: Iterable[np.ndarray]) -> TuningResult:
+        """Picks one threshold pair for a set of images, e.g. a batch sample."""
+        total = None
+        for image in images:
+            counts = self.sweep_counts(image)
+            total = counts if total is None else np.where(counts < 0, -1, total + counts)
+        if total is None:
+            raise ValueError("tune_many needs at least one image")
+        return self._result(total)
+
+    def _result(self, counts: np.ndarray) -> TuningResult:
+        scores = self._score(counts)
+        if np.all(np.isnan(scores)):
+            raise ValueError("no valid threshold pair (need thresholds1 <= thresholds2)")
+        i, j = np.unravel_index(np.nanargmax(scores), scores.shape)
+        best = replace(
+            self.config,
+            canny_threshold1=int(self.thresholds1[i]),
+            canny_threshold2=int(self.thresholds2[j])
+        )
+        return TuningResult(
+            config=best,
+            thresholds1=self.thresholds1,
+            thresholds2=self.thresholds2,
+            counts=counts,
+            scores=scores
+        )
+
+    def _score(self, counts: np.ndarray) -> np.ndarray:
+        valid = counts >= 0
+        values = np.where(valid, counts, 0).astype(np.float64)
+        if self.score == "count":
+            return np.where(valid, values, np.nan)
+
+        # Mean absolute change in count towards the valid 4-neighbours
+        padded = np.pad(values, 1)
+        padded_valid = np.pad(valid, 1)
+        change = np.zeros_like(values)
+        neighbours = np.zeros_like(values)
+        rows, cols = values.shape
+        for di, dj in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            other = padded[1 + di:1 + di + rows, 1 + dj:1 + dj + cols]
+            other_valid = padded_valid[1 + di:1 + di + rows, 1 + dj:1 + dj + cols]
+            change += np.where(other_valid, np.abs(values - other), 0.0)
+            neighbours += other_valid
+        variation = change / np.maximum(neighbours, 1) / np.maximum(values, 1)
+        return np.where(valid, values * np.clip(1.0 - variation, 0.0, None), np.nan)
@@ -0,0 +1,135 @@
+import queue
+import threading
+from typing import Iterator, Optional, Union
+
+import cv2
+
+from .models import FrameResult, ProcessingConfig
+from .analyzer import ImageAnalyzer
+from .buffers import BufferPool
+from .tracking import CentroidTracker
+
+# Marks the end of the decoded frame stream
+_END = object()
+
+
+def _decode_frames(
+    capture: cv2.VideoCapture,
+    frames: "queue.Queue",
+    stop: threading.Event,
+    frame_step: int,
+    target_fps: Optional[float],
+) -> None:
+    """
+    Producer thread: decodes the frames selected for analysis into a
+    bounded queue. Skipped frames are only grabbed, never decoded.
+
+    Frames are decoded into a ring of reused arrays. A slot comes round
+    again only after the queue's ``maxsize`` later frames were queued and
+    the consumer took the next one, by which time it is done with this one.
+    """
+    fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+    interval = 1.0 / target_fps if target_fps else 0.0
+    next_due = 0.0
+    index = -1
+    # Queued frames, plus the one being analyzed and the one waiting to be queued
+    ring = [None] * (frames.maxsize + 2)
+    decoded = 0
+    try:
+        while not stop.is_set():
+            if not capture.grab():
+                break
+            index += 1
+            timestamp = index / fps if fps > 0 else capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+            if index % frame_step:
+                continue
+            if interval:
+                if timestamp + 1e-9 < next_due:
+                    continue
+                next_due += interval * max(1, int((timestamp - next_due) / interval) + 1)
+
+            slot = decoded % len(ring)
+            ok, frame = capture.retrieve(ring[slot])
+            if not ok:
+                break
+            ring[slot] = frame
+            decoded += 1
+            # Blocks while the analyzer is behind, bounding memory to `prefetch` frames
+            while not stop.is_set():
+                try:
+                    frames.put((index, timestamp, frame), timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+    finally:
+        capture.release()
+        frames.put(_END)
+
+
+def analyze_video(
+    source: Union[str, int],
+    config: ProcessingConfig,
+    frame_step: int = 1,
+    prefetch: int = 8,
+    target_fps: Optional[float] = None,
+    tracker: Optional[CentroidTracker] = None,
+) -> Iterator[FrameResult]:
+    """
+    Streams per-frame analysis results for a video file or capture device.
+
+    Decoding runs on a background thread that keeps up to ``prefetch``
+    frames ready, overlapping with analysis on the calling thread. Every
+    ``frame_step``-th frame is considered; with ``target_fps`` set, frames
+    are further sampled to at most that many per second of video time.
+    Shapes keep stable track ids across frames via ``tracker``.
+    """
+    if frame_step < 1:
+        raise ValueError("frame_step must be at least 1")
+    if prefetch < 1:
+        raise ValueError("prefetch must be at least 1")
+    if target_fps is not None and target_fps <= 0:
+        raise ValueError("target_fps must be positive")
+
+    capture = cv2.VideoCapture(source)
+    started = False
+    try:
+        if not capture.isOpened():
+            raise IOError(f"Unable to open video source: {source}")
+
+        analyzer = ImageAnalyzer(config, buffers=BufferPool())
+        tracker = tracker or CentroidTracker()
+        frames: "queue.Queue" = queue.Queue(maxsize=prefetch)
+        stop = threading.Event()
+        decoder = threading.Thread(
+            target=_decode_frames,
+            args=(capture, frames, stop, frame_step, target_fps),
+            name="video-decoder",
+            daemon=True
+        )
+        decoder.start()
+        started = True
+    finally:
+        # Once running, the decoder owns the capture and releases it when done
+        if not started:
+            capture.release()
+
+    try:
+        while True:
+            item = frames.get()
+            if item is _END:
+                break
+            index, timestamp, frame = item
+            shapes = analyzer.analyze(frame)
+            track_ids = tracker.update(shapes.centroid)
+            yield FrameResult(index=index, timestamp=timestamp, shapes=shapes, track_ids=track_ids)
+    finally:
+        # Also runs when the consumer stops iterating early; draining lets a
+        # producer blocked on a full queue observe the stop flag and exit
+        stop.set()
+        while decoder.is_alive():
+            try:
+                frames.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        decoder.join()
@@ -0,0 +1,227 @@
+import pickle
+import numpy as np
+import cv2
+import pytest
+from src.analyzer import ImageAnalyzer
+from src.cache import StageCache
+from src.models import ProcessingConfig
+
+class TestInstrumentation:
+
+    @staticmethod
+    def _scene() -> np.ndarray:
+        image = np.zeros((240, 320, 3), dtype=np.uint8)
+        cv2.rectangle(image, (20, 20), (80, 80), (255, 255, 255), -1)
+        cv2.rectangle(image, (120, 120), (130, 125), (255, 255, 255), -1)
+        return image
+
+    def test_disabled_by_default(self):
+        assert ImageAnalyzer(ProcessingConfig()).analyze(self._scene()).stats is None
+
+    def test_stats_and_hooks(self):
+        seen = []
+        results = ImageAnalyzer(ProcessingConfig(), hooks=[seen.append]).analyze(self._scene())
+        stats = results.stats
+        assert seen == [stats]
+        assert set(stats.stages_ms) == {"grayscale", "blur", "canny", "find_contours", "measure", "classify"}
+        assert stats.pixels == 240 * 320
+        assert (stats.contours_found, stats.contours_kept) == (2, 1)
+        assert stats.total_ms >= sum(stats.stages_ms.values()) * 0.99
+
+    def test_cached_stages_are_not_timed(self):
+        cache = StageCache()
+        image = self._scene()
+        ImageAnalyzer(ProcessingConfig(), cache=cache, instrument=True).analyze(image)
+        stats = ImageAnalyzer(ProcessingConfig(min_area=1.0), cache=cache, instrument=True).analyze(image).stats
+        assert set(stats.stages_ms) == {"classify"}
+        assert stats.cache_hits == 1
+        assert stats.contours_kept == 2
+
+class TestMultiResolution:
+
+    def test_preview_and_refine_keep_stats_and_result_cache(self, tmp_path):
+        from benchmarks.scenes import generate_scene
+        from src.result_cache import ResultCache
+        image = generate_scene(2400, 1600, 12, seed=4).image
+        seen = []
+        store = ResultCache(str(tmp_path))
+        analyzer = ImageAnalyzer(ProcessingConfig(max_area=1e6), hooks=[seen.append], result_cache=store)
+
+        preview = analyzer.preview(image, max_side=1024)
+        assert seen == [preview.stats] and "pyramid" in preview.stats.stages_ms
+        assert preview.stats.pixels == 600 * 400
+
+        refined = analyzer.refine(image, preview)
+        assert seen[-1] is refined.stats and {"canny", "classify"} <= set(refined.stats.stages_ms)
+        assert refined.stats.contours_kept == len(refined) and refined.stats.pixels > 0
+
+        again = analyzer.preview(image, max_side=1024)
+        assert "result_cache" in again.stats.stages_ms
+        assert np.array_equal(again.area, preview.area)
+
+    def test_preview_then_refine_matches_full_resolution(self):
+        from benchmarks.scenes import generate_scene
+        scene = generate_scene(2400, 1600, 12, noise=0.03, seed=4)
+        analyzer = ImageAnalyzer(ProcessingConfig(max_area=1e6))
+        assert analyzer.pyramid_levels(scene.image.shape, 1024) == 2
+
+        preview = analyzer.preview(scene.image, max_side=1024)
+        full = analyzer.analyze(scene.image)
+        assert len(preview) == len(full)
+        # Rescaled measurements land close to the full-resolution ones
+        order = np.lexsort(full.centroid.T)
+        preview_order = np.lexsort(preview.centroid.T)
+        assert np.allclose(preview.area[preview_order], full.area[order], rtol=0.1)
+        assert np.abs(preview.centroid[preview_order] - full.centroid[order]).max() <= 4
+
+        refined = analyzer.refine(scene.image, preview)
+        refined_order = np.lexsort(refined.centroid.T)
+        assert np.array_equal(refined.area[refined_order], full.area[order])
+        assert np.array_equal(refined.shape_types[refined_order], full.shape_types[order])
+
+class TestThreading:
+
+    def test_threaded_run_matches_single_thread(self, monkeypatch):
+        import src.analyzer as analyzer_module
+        from benchmarks.scenes import generate_scene
+        # Force the pool even on a small scene
+        monkeypatch.setattr(analyzer_module, "PARALLEL_MIN_POINTS", 0)
+        scene = generate_scene(1200, 900, 60, noise=0.05, seed=5)
+
+        single = ImageAnalyzer(ProcessingConfig(max_area=1e6)).analyze(scene.image)
+        threaded = ImageAnalyzer(ProcessingConfig(max_area=1e6, threads=4)).analyze(scene.image)
+        assert len(threaded) == len(single)
+        assert np.array_equal(threaded.area, single.area)
+        assert np.array_equal(threaded.shape_codes, single.shape_codes)
+        assert np.array_equal(threaded.approx.points, single.approx.points)
+        assert np.array_equal(threaded.approx.offsets, single.approx.offsets)
+
+    def test_opencv_thread_count(self):
+        before = cv2.getNumThreads()
+        try:
+            ImageAnalyzer(ProcessingConfig(opencv_threads=1))
+            assert cv2.getNumThreads() == 1
+        finally:
+            cv2.setNumThreads(before)
+
+class TestLazyFields:
+
+    @staticmethod
+    def _scene() -> np.ndarray:
+        from benchmarks.scenes import generate_scene
+        image = generate_scene(800, 600, 30, noise=0.05, seed=6).image.copy()
+        # Speckles leave many tiny contours for the pre-filter to reject
+        image[np.random.default_rng(6).random(image.shape[:2]) < 0.002] = 120
+        return image
+
+    def test_undeclared_fields_are_measured_on_access(self, monkeypatch):
+        import src.analyzer as analyzer_module
+        from src.models import LazyShapeResultSet
+        calls = []
+        approximate = analyzer_module.approximate_contours
+        monkeypatch.setattr(
+            analyzer_module, "approximate_contours",
+            lambda *args: calls.append(1) or approximate(*args)
+        )
+        image = self._scene()
+        lazy = ImageAnalyzer(ProcessingConfig(gaussian_kernel=1, fields=("centroid",))).analyze(image)
+        assert isinstance(lazy, LazyShapeResultSet)
+        assert lazy.resolved == ("area", "centroid")
+        assert not calls
+
+        large = lazy.area > np.median(lazy.area)
+        subset = lazy[large]
+        assert subset.resolved == ("area", "centroid") and not calls
+        copy = pickle.loads(pickle.dumps(subset))
+        assert np.array_equal(copy.centroid, subset.centroid)
+        with pytest.raises(ValueError):
+            copy.perimeter
+        eager = ImageAnalyzer(ProcessingConfig(gaussian_kernel=1)).analyze(image)
+        assert np.array_equal(lazy.shape_types, eager.shape_types)
+        assert calls
+        assert np.array_equal(lazy.perimeter, eager.perimeter)
+        assert np.array_equal(lazy.bbox, eager.bbox)
+        assert np.array_equal(lazy.approx.points, eager.approx.points)
+        assert lazy.to_records() == eager.to_records()
+        assert np.array_equal(subset.perimeter, eager.perimeter[large])
+
+    def test_prefilter_matches_full_area_filter(self):
+        from src.geometry import measure_contours
+        analyzer = ImageAnalyzer(ProcessingConfig(gaussian_kernel=1))
+        table = analyzer.extract(self._scene())
+        features = measure_contours(table.batch)
+        for low, high in ((100.0, 5e4), (0.0, 1e9), (2.0, 40.0)):
+            expected = np.flatnonzero((features.area >= low) & (features.area <= high))
+            assert np.array_equal(table.candidates(low, high), expected)
+        assert np.array_equal(table.features.perimeter, features.perimeter)
+        assert np.array_equal(table.features.centroid, features.centroid)
+
+    def test_unknown_field(self):
+        with pytest.raises(ValueError):
+            ImageAnalyzer(ProcessingConfig(fields=("colour",)))
+
+class TestExtractionBackends:
+
+    def test_every_backend_detects_the_scene(self):
+        from benchmarks.scenes import generate_scene, score_detections
+        scene = generate_scene(640, 480, 24, noise=0.03, seed=2)
+        for backend in ("canny", "otsu", "adaptive", "components"):
+            results = ImageAnalyzer(ProcessingConfig(max_area=1e6, backend=backend)).analyze(scene.image)
+            assert score_detections(scene, results) == (1.0, 1.0), backend
+
+    def test_components_match_thresholded_contours(self):
+        from benchmarks.scenes import generate_scene
+        scene = generate_scene(640, 480, 12, seed=1, clutter=3000)
+        otsu = ImageAnalyzer(ProcessingConfig(max_area=1e6, backend="otsu")).analyze(scene.image)
+        components = ImageAnalyzer(ProcessingConfig(max_area=1e6, backend="components")).analyze(scene.image)
+        assert len(components) == 12
+        assert np.array_equal(components.area, otsu.area)
+        assert np.array_equal(components.contours.points, otsu.contours.points)
+
+    def test_dark_objects_on_light_background(self):
+        from benchmarks.scenes import generate_scene, score_detections
+        scene = generate_scene(640, 480, 12, seed=3)
+        scene.image = 255 - scene.image
+        for backend in ("otsu", "adaptive", "components"):
+            results = ImageAnalyzer(ProcessingConfig(max_area=1e6, backend=backend)).analyze(scene.image)
+            assert score_detections(scene, results) == (1.0, 1.0), backend
+
+    def test_refine_resolves_global_threshold_once(self):
+        from benchmarks.scenes import generate_scene
+        scene = generate_scene(2400, 1600, 12, noise=0.03, seed=4)
+        analyzer = ImageAnalyzer(ProcessingConfig(max_area=1e6, backend="components"))
+        full = analyzer.analyze(scene.image)
+        refined = analyzer.refine(scene.image, analyzer.preview(scene.image, max_side=1024))
+        assert np.array_equal(np.sort(refined.area), np.sort(full.area))
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            ImageAnalyzer(ProcessingConfig(backend="watershed"))
+        with pytest.raises(ValueError):
+            ImageAnalyzer(ProcessingConfig(foreground="grey"))
+
+class TestBufferPool:
+
+    def test_same_size_frames_reuse_buffers(self):
+        from benchmarks.scenes import generate_scene
+        from src.buffers import BufferPool
+        frames = [generate_scene(320, 240, 6, noise=0.05, seed=i).image for i in range(3)]
+        for backend in ("canny", "adaptive", "components"):
+            config = ProcessingConfig(backend=backend)
+            pool = BufferPool()
+            pooled = ImageAnalyzer(config, buffers=pool)
+            plain = ImageAnalyzer(config)
+            kept = [pooled.analyze(frame) for frame in frames]
+            allocated = pool.allocations
+            kept += [pooled.analyze(frame) for frame in frames]
+            assert pool.allocations == allocated  # nothing reallocated after the first frame
+            # Earlier results do not alias buffers overwritten by later frames
+            for results, frame in zip(kept, frames * 2):
+                expected = plain.analyze(frame)
+                assert np.array_equal(results.area, expected.area)
+                assert np.array_equal(results.contours.points, expected.contours.points)
+
+    def test_stage_cache_takes_precedence(self):
+        from src.buffers import BufferPool
+        analyzer = ImageAnalyzer(ProcessingConfig(), cache=StageCache(), buffers=BufferPool())
+        assert analyzer.buffers is None
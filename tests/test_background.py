@@ -0,0 +1,76 @@
+import threading
+import time
+import pytest
+from src.background import BackgroundRunner, Cancelled
+
+class TestBackgroundRunner:
+
+    def test_rapid_submissions_only_run_the_last(self):
+        runner = BackgroundRunner(debounce=0.05)
+        ran = []
+        for value in range(5):
+            runner.submit(value, lambda token, value=value: ran.append(value) or value * 10)
+        assert runner.wait(timeout=5)
+        status = runner.status()
+        assert ran == [4]
+        assert (status.done_key, status.result, status.busy) == (4, 40, False)
+
+    def test_superseded_job_is_cancelled_and_never_published(self):
+        runner = BackgroundRunner(debounce=0.0)
+        started, outcome = threading.Event(), []
+
+        def slow(token):
+            started.set()
+            try:
+                while True:
+                    token.report(0.5, "working", partial="half")
+                    time.sleep(0.005)
+            except Cancelled:
+                outcome.append("cancelled")
+                raise
+
+        runner.submit("old", slow)
+        assert started.wait(timeout=5)
+        assert runner.status().partial == "half"
+        runner.submit("new", lambda token: "fresh")
+        assert runner.status().partial is None
+        assert runner.wait(timeout=5)
+        assert outcome == ["cancelled"]
+        status = runner.status()
+        assert (status.done_key, status.result, status.partial) == ("new", "fresh", None)
+
+    def test_resubmitting_the_current_key_is_a_noop(self):
+        runner = BackgroundRunner(debounce=0.0)
+        calls = []
+        runner.submit("k", lambda token: calls.append(1))
+        runner.wait(timeout=5)
+        runner.submit("k", lambda token: calls.append(2))
+        runner.wait(timeout=5)
+        assert calls == [1]
+
+    def test_errors_are_reported(self):
+        runner = BackgroundRunner(debounce=0.0)
+
+        def broken(token):
+            raise ValueError("bad input")
+
+        runner.submit("k", broken)
+        assert runner.wait(timeout=5)
+        assert isinstance(runner.status().error, ValueError)
+
+    def test_refine_checkpoints_can_cancel(self):
+        from benchmarks.scenes import generate_scene
+        from src.analyzer import ImageAnalyzer
+        from src.models import ProcessingConfig
+        scene = generate_scene(1200, 800, 6, seed=1)
+        analyzer = ImageAnalyzer(ProcessingConfig(max_area=1e6))
+        preview = analyzer.preview(scene.image, max_side=600)
+        seen = []
+        analyzer.refine(scene.image, preview, progress=seen.append)
+        assert seen and seen[0] == 0.0 and all(0 <= f < 1 for f in seen)
+
+        def cancel(done):
+            raise Cancelled()
+
+        with pytest.raises(Cancelled):
+            analyzer.refine(scene.image, preview, progress=cancel)
@@ -0,0 +1,104 @@
+import numpy as np
+import cv2
+import src.batch as batch
+from src.batch import analyze_batch, collect_images
+from src.dedup import DuplicateIndex
+from src.models import ProcessingConfig
+
+class TestBatch:
+
+    @staticmethod
+    def _write_scene(path, sides: int) -> None:
+        """Draws one filled regular polygon on a blank canvas."""
+        image = np.zeros((200, 200, 3), dtype=np.uint8)
+        angles = 2 * np.pi * np.arange(sides) / sides
+        points = np.stack([100 + 60 * np.cos(angles), 100 + 60 * np.sin(angles)], axis=1)
+        cv2.fillPoly(image, [points.astype(np.int32)], (255, 255, 255))
+        cv2.imwrite(str(path), image)
+
+    def test_collect_images_filters_extensions(self, tmp_path):
+        self._write_scene(tmp_path / "a.png", 3)
+        (tmp_path / "notes.txt").write_text("not an image")
+        assert collect_images(str(tmp_path)) == [str(tmp_path / "a.png")]
+        assert collect_images(str(tmp_path / "*.png")) == [str(tmp_path / "a.png")]
+
+    def test_analyze_batch_over_pool(self, tmp_path):
+        for i, sides in enumerate([3, 4, 5]):
+            self._write_scene(tmp_path / f"img{i}.png", sides)
+        (tmp_path / "broken.png").write_bytes(b"not really a png")
+
+        paths = collect_images(str(tmp_path))
+        results = list(analyze_batch(paths, ProcessingConfig(), workers=2, chunk_size=2))
+
+        assert sorted(r.path for r in results) == paths
+        by_name = {r.path.rsplit("/", 1)[-1]: r for r in results}
+        assert not by_name["broken.png"].ok
+        assert by_name["img0.png"].shapes[0].shape_type == "Triangle"
+        assert by_name["img2.png"].shapes[0].shape_type == "Pentagon"
+
+    def test_inline_matches_pool(self, tmp_path):
+        self._write_scene(tmp_path / "img.png", 4)
+        paths = collect_images(str(tmp_path))
+        inline = list(analyze_batch(paths, ProcessingConfig(), workers=1))
+        pooled = list(analyze_batch(paths, ProcessingConfig(), workers=2))
+        assert [s.area for s in inline[0].shapes] == [s.area for s in pooled[0].shapes]
+
+    def test_near_duplicates_reuse_results(self, tmp_path):
+        self._write_scene(tmp_path / "a.png", 4)
+        image = cv2.imread(str(tmp_path / "a.png"))
+        cv2.imwrite(str(tmp_path / "b.jpg"), image, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        self._write_scene(tmp_path / "c.png", 3)
+        paths = collect_images(str(tmp_path))
+
+        index = DuplicateIndex()
+        results = {r.path: r for r in analyze_batch(paths, ProcessingConfig(), workers=1, duplicates=index)}
+        assert results[str(tmp_path / "b.jpg")].duplicate_of == str(tmp_path / "a.png")
+        assert results[str(tmp_path / "b.jpg")].shapes.area.tolist() == results[str(tmp_path / "a.png")].shapes.area.tolist()
+        assert results[str(tmp_path / "c.png")].duplicate_of is None
+        assert (index.lookups, index.hits, len(index)) == (3, 1, 2)
+
+        pooled = list(analyze_batch(paths, ProcessingConfig(), workers=2, chunk_size=3, duplicates=DuplicateIndex()))
+        assert sum(r.duplicate_of is not None for r in pooled) == 1
+
+    def test_pooled_duplicates_do_not_depend_on_chunking(self, tmp_path):
+        for name, sides in [("a", 4), ("c", 3), ("e", 5)]:
+            self._write_scene(tmp_path / f"{name}.png", sides)
+            image = cv2.imread(str(tmp_path / f"{name}.png"))
+            cv2.imwrite(str(tmp_path / f"{name}2.jpg"), image, [cv2.IMWRITE_JPEG_QUALITY, 70])
+            cv2.imwrite(str(tmp_path / f"{name}3.jpg"), image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        (tmp_path / "z.png").write_bytes(b"junk")
+        paths = collect_images(str(tmp_path))
+
+        def run(**kwargs):
+            index = DuplicateIndex()
+            results = list(analyze_batch(paths, ProcessingConfig(), duplicates=index, **kwargs))
+            assert sorted(r.path for r in results) == paths
+            return {r.path: r.duplicate_of for r in results}, (index.lookups, index.hits, len(index))
+
+        inline = run(workers=1)
+        assert sum(original is not None for original in inline[0].values()) == 6
+        assert run(workers=2, chunk_size=1) == inline
+        assert run(workers=2, chunk_size=3) == inline
+
+    def test_reuse_is_bounded_to_recent_originals(self, tmp_path, monkeypatch):
+        self._write_scene(tmp_path / "a.png", 4)
+        self._write_scene(tmp_path / "b.png", 3)
+        image = cv2.imread(str(tmp_path / "a.png"))
+        cv2.imwrite(str(tmp_path / "c.jpg"), image, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        paths = collect_images(str(tmp_path))
+        monkeypatch.setattr(batch, "DUPLICATE_RESULTS_KEPT", 1)
+
+        # b.png pushed a.png out of the kept results, so c.jpg is analyzed again
+        for workers in (1, 2):
+            results = {r.path: r for r in analyze_batch(paths, ProcessingConfig(), workers=workers, duplicates=DuplicateIndex())}
+            assert results[str(tmp_path / "c.jpg")].duplicate_of is None
+            assert len(results[str(tmp_path / "c.jpg")].shapes) == 1
+
+    def test_copies_of_a_failed_original_are_analyzed(self):
+        tracker = batch._ReuseTracker(DuplicateIndex(), keep=4)
+        signature = DuplicateIndex.signature(np.zeros((64, 64, 3), dtype=np.uint8))
+        assert tracker.original_of("a", signature) is None
+        assert tracker.original_of("b", signature) == "a"
+        assert tracker.follow("b", "a") == []  # a is still running
+        assert tracker.finished(batch.BatchResult(path="a", error="boom")) == ([], ["b"])
+        assert tracker.original_of("c", signature) is None
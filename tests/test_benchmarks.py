@@ -0,0 +1,54 @@
+import copy
+from benchmarks.run import BenchmarkCase, STAGES, compare_to_baseline, pick_backend, run_benchmarks
+from benchmarks.scenes import generate_scene, score_detections
+from benchmarks.startup import ALLOWED_PACKAGES, CORE_MODULES, HEADLESS_ENTRY_POINTS, check_startup, probe
+from src.analyzer import ImageAnalyzer
+from src.models import ProcessingConfig
+
+class TestBenchmarks:
+
+    def test_scene_ground_truth_is_detected(self):
+        scene = generate_scene(640, 480, 24, seed=2)
+        results = ImageAnalyzer(ProcessingConfig(max_area=1e6)).analyze(scene.image)
+        assert len(scene.shapes) == 24
+        assert score_detections(scene, results) == (1.0, 1.0)
+
+    def test_noise_is_reproducible(self):
+        a = generate_scene(200, 200, 4, noise=0.1, seed=5)
+        b = generate_scene(200, 200, 4, noise=0.1, seed=5)
+        assert (a.image == b.image).all()
+
+    def test_regression_gate(self):
+        results = run_benchmarks([BenchmarkCase(320, 240, 6, 0.0)], ProcessingConfig(), repeat=1)
+        assert set(next(iter(results["cases"].values()))["stages_ms"]) == set(STAGES)
+
+        baseline = copy.deepcopy(results)
+        for case in baseline["cases"].values():
+            case["stages_ms"]["canny"] = 10.0
+            case["end_to_end_ms"] = 100.0
+        slower = copy.deepcopy(baseline)
+        for case in slower["cases"].values():
+            case["stages_ms"]["canny"] = 20.0
+            case["end_to_end_ms"] = 100.5
+
+        regressions = compare_to_baseline(slower, baseline, tolerance=0.25, min_delta_ms=1.0)
+        assert len(regressions) == 1 and "canny" in regressions[0]
+        assert compare_to_baseline(baseline, baseline) == []
+
+    def test_pick_backend(self):
+        cases = [BenchmarkCase(320, 240, 6, 0.0, clutter=300)]
+        assert cases[0].name == "320x240_s6_n0_c300"
+        choice = pick_backend(cases, ProcessingConfig(max_area=1e6), repeat=1, backends=("otsu", "components"))
+        assert choice["selected"] in ("otsu", "components")
+        assert all(entry["eligible"] for entry in choice["backends"].values())
+
+        strict = pick_backend(cases, ProcessingConfig(min_area=1e6, max_area=1e7), repeat=1, backends=("otsu",))
+        assert strict["selected"] is None
+
+    def test_headless_imports_stay_slim(self):
+        report = probe(CORE_MODULES + HEADLESS_ENTRY_POINTS)
+        assert set(report["packages"]) <= set(ALLOWED_PACKAGES)
+
+        slow = dict(report, import_ms=5000.0, unexpected_packages=["pandas"])
+        problems = check_startup(slow, max_import_ms=1000.0)
+        assert len(problems) == 2 and "pandas" in problems[0]
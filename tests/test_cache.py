@@ -0,0 +1,61 @@
+import numpy as np
+import cv2
+from src.analyzer import ContourTable, ImageAnalyzer
+from src.cache import StageCache, content_hash
+from src.models import ProcessingConfig
+
+class TestStageCache:
+
+    @staticmethod
+    def _scene() -> np.ndarray:
+        image = np.zeros((300, 300, 3), dtype=np.uint8)
+        cv2.rectangle(image, (20, 20), (80, 80), (255, 255, 255), -1)
+        cv2.rectangle(image, (120, 120), (280, 200), (255, 255, 255), -1)
+        return image
+
+    def test_lru_eviction(self):
+        cache = StageCache(max_entries=2)
+        cache.get_or_compute("a", lambda: 1)
+        cache.get_or_compute("b", lambda: 2)
+        cache.get_or_compute("a", lambda: 0)
+        cache.get_or_compute("c", lambda: 3)
+        assert "a" in cache and "c" in cache and "b" not in cache
+        assert (cache.hits, cache.misses) == (1, 3)
+
+    def test_content_hash_depends_on_shape(self):
+        data = np.zeros(12, dtype=np.uint8)
+        assert content_hash(data) != content_hash(data.reshape(3, 4))
+        assert content_hash(data) == content_hash(data.copy())
+
+    def test_area_change_only_refilters(self):
+        image = self._scene()
+        cache = StageCache()
+        ImageAnalyzer(ProcessingConfig(), cache=cache).analyze(image)
+        misses = cache.misses
+
+        config = ProcessingConfig(min_area=5000.0)
+        cached = ImageAnalyzer(config, cache=cache).analyze(image)
+        assert cache.misses == misses
+        fresh = ImageAnalyzer(config).analyze(image)
+        assert [s.area for s in cached] == [s.area for s in fresh]
+
+    def test_canny_change_reuses_blur(self):
+        image = self._scene()
+        cache = StageCache()
+        ImageAnalyzer(ProcessingConfig(), cache=cache).analyze(image)
+        hits = cache.hits
+
+        ImageAnalyzer(ProcessingConfig(canny_threshold1=10), cache=cache).analyze(image)
+        # Contour stage misses, the blur stage is served from cache
+        assert cache.hits == hits + 1
+
+    def test_contour_tables_count_toward_max_bytes(self):
+        cache = StageCache()
+        ImageAnalyzer(ProcessingConfig(), cache=cache).analyze(self._scene())
+        (key, table), = [(key, value) for key, value in cache._entries.items() if isinstance(value, ContourTable)]
+        polygons = lambda: sum(approx.nbytes for approx in table._approx if approx is not None)
+        assert cache._sizes[key] == table.nbytes - polygons() > table.batch.points.nbytes
+
+        # Refiltering only fills measurement columns that were already counted
+        table.select(0.0, float("inf"))
+        assert cache._sizes[key] == table.nbytes - polygons()
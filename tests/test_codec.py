@@ -0,0 +1,61 @@
+import base64
+import numpy as np
+import cv2
+import pytest
+from src.analyzer import ImageAnalyzer
+from src.codec import EncodedContours, LazyContourBatch, decode_contour, encode_contour
+from src.geometry import ContourBatch
+from src.models import ProcessingConfig
+
+class TestContourCodec:
+
+    @staticmethod
+    def _results():
+        image = np.zeros((300, 400, 3), dtype=np.uint8)
+        cv2.rectangle(image, (10, 10), (60, 60), (255, 255, 255), -1)
+        cv2.circle(image, (300, 200), 60, (255, 255, 255), -1)
+        cv2.ellipse(image, (150, 200), (70, 40), 30, 0, 360, (255, 255, 255), -1)
+        return ImageAnalyzer(ProcessingConfig()).analyze(image)
+
+    def test_round_trip_is_lossless(self):
+        rng = np.random.default_rng(0)
+        contours = [rng.integers(-2**31, 2**31 - 1, (n, 1, 2)).astype(np.int32) for n in (3, 0, 1, 7)]
+        contours.append(np.array([[[0, 0]], [[9, 0]], [[9, 9]], [[9, 9]], [[-4, 22]]], dtype=np.int32))
+        batch = ContourBatch.from_contours(contours)
+        encoded = EncodedContours.encode(batch)
+
+        assert np.array_equal(encoded.decode().points, batch.points)
+        assert np.array_equal(EncodedContours.from_bytes(encoded.to_bytes()).decode().points, batch.points)
+        subset = encoded.take([4, 1, 0])
+        assert np.array_equal(subset.decode().points, batch.take(np.array([4, 1, 0])).points)
+        for i, contour in enumerate(contours):
+            assert np.array_equal(encoded.contour(i), contour)
+            assert np.array_equal(decode_contour(encode_contour(contour)), contour)
+            assert np.array_equal(decode_contour(encoded.payloads()[i]), contour)
+        with pytest.raises(ValueError):
+            EncodedContours.from_bytes(encoded.to_bytes()[:-1])
+
+    def test_traced_contours_shrink(self):
+        results = self._results()
+        encoded = EncodedContours.encode(results.contours)
+        assert results.contours.points.nbytes / encoded.data.nbytes >= 4
+        assert np.array_equal(encoded.decode().points, results.contours.points)
+
+    def test_compressed_result_set_decodes_lazily(self):
+        results = self._results()
+        compact = results.compress()
+        assert isinstance(compact.contours, LazyContourBatch)
+
+        # Per-shape access and selection stay encoded
+        assert np.array_equal(compact[1].contour, results[1].contour)
+        subset = compact.filter(compact.area > 3000)
+        assert isinstance(subset.contours, LazyContourBatch) and not subset.contours.inflated
+        assert not compact.contours.inflated
+
+        # Whole-batch consumers inflate once
+        assert np.array_equal(compact.approx.points, results.approx.points)
+        assert compact.approx.inflated
+
+        records = results.to_records(include_contours=True, compact=True)
+        assert np.array_equal(decode_contour(base64.b64decode(records[2]["contour"])), results[2].contour)
+        assert records[0]["contour"] == results[0].to_dict(True, compact=True)["contour"]
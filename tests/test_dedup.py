@@ -0,0 +1,67 @@
+import numpy as np
+import cv2
+import pytest
+from benchmarks.scenes import generate_scene
+from src.dedup import DuplicateIndex, perceptual_hash
+
+class TestDuplicateIndex:
+
+    @staticmethod
+    def _recompressed(image: np.ndarray, quality: int) -> np.ndarray:
+        _, data = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+    def test_near_duplicates_match(self):
+        image = generate_scene(1280, 960, 30, noise=0.03, seed=1).image
+        index = DuplicateIndex()
+        index.add(index.signature(image), "first")
+
+        noisy = np.clip(image + np.random.default_rng(0).normal(0, 3, image.shape), 0, 255).astype(np.uint8)
+        for variant in (image.copy(), self._recompressed(image, 40), noisy):
+            assert index.find(index.signature(variant)) == "first"
+        assert (index.lookups, index.hits, index.skipped_pixels) == (3, 3, 3 * 1280 * 960)
+
+    def test_changed_content_does_not_match(self):
+        scene = generate_scene(1280, 960, 30, seed=1)
+        index = DuplicateIndex()
+        index.add(index.signature(scene.image), "first")
+
+        moved = scene.image.copy()
+        cv2.fillPoly(moved, [scene.shapes[3].contour + [[25, 0]]], (255, 255, 255))
+        other = generate_scene(1280, 960, 30, seed=2).image
+        resized = cv2.resize(scene.image, (640, 480), interpolation=cv2.INTER_AREA)
+        for variant in (moved, other, resized):
+            assert index.find(index.signature(variant)) is None
+        assert index.hits == 0
+
+    def test_hash_distance_tracks_similarity(self):
+        scene = generate_scene(640, 480, 12, seed=3).image
+        base = perceptual_hash(DuplicateIndex.signature(scene)[2])
+        recompressed = perceptual_hash(DuplicateIndex.signature(self._recompressed(scene, 50))[2])
+        different = perceptual_hash(DuplicateIndex.signature(generate_scene(640, 480, 12, seed=4).image)[2])
+        assert bin(base ^ recompressed).count("1") <= 4
+        assert bin(base ^ different).count("1") > 10
+
+    def test_file_signatures(self, tmp_path):
+        scene = generate_scene(1280, 960, 30, seed=1)
+        cv2.imwrite(str(tmp_path / "a.png"), scene.image)
+        cv2.imwrite(str(tmp_path / "b.jpg"), scene.image, [cv2.IMWRITE_JPEG_QUALITY, 60])
+        moved = scene.image.copy()
+        cv2.fillPoly(moved, [scene.shapes[3].contour + [[25, 0]]], (255, 255, 255))
+        cv2.imwrite(str(tmp_path / "c.png"), moved)
+        cv2.imwrite(str(tmp_path / "small.png"), cv2.resize(scene.image, (300, 200)))
+        (tmp_path / "junk.png").write_bytes(b"junk")
+
+        index = DuplicateIndex()
+        signature = index.read_signature(str(tmp_path / "a.png"))
+        assert signature[0] == (960, 1280)
+        index.add(signature, "a")
+        assert index.find(index.read_signature(str(tmp_path / "b.jpg"))) == "a"
+        assert index.find(index.read_signature(str(tmp_path / "c.png"))) is None
+        # Too small for a reduced read: read whole, with its exact size
+        assert index.read_signature(str(tmp_path / "small.png"))[0] == (200, 300)
+        assert index.read_signature(str(tmp_path / "junk.png")) is None
+
+    def test_invalid_distance(self):
+        with pytest.raises(ValueError):
+            DuplicateIndex(max_distance=65)
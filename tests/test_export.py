@@ -0,0 +1,83 @@
+import base64
+import csv
+import json
+import numpy as np
+import cv2
+import pytest
+from src.analyzer import ImageAnalyzer
+from src.codec import decode_contour
+from src.export import CSVExporter, JSONLExporter, ResultExporter, open_exporter
+from src.models import ProcessingConfig
+
+class TestExporters:
+
+    @staticmethod
+    def _results():
+        image = np.zeros((300, 400, 3), dtype=np.uint8)
+        cv2.rectangle(image, (20, 20), (120, 120), (255, 255, 255), -1)
+        cv2.circle(image, (250, 150), 50, (255, 255, 255), -1)
+        cv2.fillPoly(image, [np.array([[150, 280], [250, 280], [250, 200]], np.int32)], (255, 255, 255))
+        return ImageAnalyzer(ProcessingConfig()).analyze(image)
+
+    def test_jsonl_streams_in_chunks(self, tmp_path):
+        results = self._results()
+        path = tmp_path / "shapes.jsonl"
+        with JSONLExporter(str(path), include_contours=True, chunk_rows=2) as exporter:
+            exporter.write(results, "a.png")
+            # Two rows per chunk: everything but the last odd row is on disk already
+            assert exporter.rows_written == len(results) - len(results) % 2
+            exporter.write(results, "b.png")
+        rows = [json.loads(line) for line in path.read_text().splitlines()]
+
+        assert len(rows) == 2 * len(results)
+        assert [r["source"] for r in rows] == ["a.png"] * len(results) + ["b.png"] * len(results)
+        assert [r["shape_type"] for r in rows[:len(results)]] == list(results.shape_types)
+        assert rows[0]["area"] == pytest.approx(results.area[0])
+        assert rows[0]["contour"] == results.contours.contour(0).reshape(-1, 2).tolist()
+
+    def test_csv_matches_result_set(self, tmp_path):
+        results = self._results()
+        path = tmp_path / "shapes.csv"
+        with open_exporter(str(path)) as exporter:
+            assert isinstance(exporter, CSVExporter)
+            exporter.write(results, "a.png")
+        with open(path, newline="") as fh:
+            rows = list(csv.DictReader(fh))
+
+        assert len(rows) == len(results)
+        assert "contour" not in rows[0]
+        assert [int(r["centroid_x"]) for r in rows] == results.centroid[:, 0].tolist()
+        assert [int(r["bbox_w"]) for r in rows] == results.bbox[:, 2].tolist()
+
+    def test_compact_contours(self, tmp_path):
+        results = self._results()
+        path = tmp_path / "shapes.csv"
+        with open_exporter(str(path), include_contours=True, compact_contours=True) as exporter:
+            exporter.write(results.compress(), "a.png")
+        with open(path, newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        for i, row in enumerate(rows):
+            assert np.array_equal(decode_contour(base64.b64decode(row["contour"])), results[i].contour)
+
+    def test_parquet_row_groups(self, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        results = self._results()
+        path = tmp_path / "shapes.parquet"
+        with open_exporter(str(path), include_contours=True, chunk_rows=2) as exporter:
+            exporter.write(results, "a.png")
+        table = pq.read_table(str(path))
+
+        assert table.num_rows == len(results)
+        assert table.column("shape_type").to_pylist() == list(results.shape_types)
+        assert table.column("contour")[0].as_py() == results.contours.contour(0).reshape(-1).tolist()
+
+    def test_rejects_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            open_exporter(str(tmp_path / "shapes.xlsx"))
+
+    def test_incomplete_exporter_fails_at_construction(self, tmp_path):
+        class Unfinished(ResultExporter):
+            pass
+        with pytest.raises(TypeError):
+            Unfinished(str(tmp_path / "shapes.out"))
+        assert not (tmp_path / "shapes.out").exists()
@@ -0,0 +1,96 @@
+import numpy as np
+import cv2
+from src.detectors import ShapeDetector
+import src.geometry as geometry
+from src.geometry import ContourBatch, approximate_contours, hu_moments, measure_contours
+
+class TestGeometry:
+
+    @staticmethod
+    def _random_contours(count: int = 50, seed: int = 0):
+        """Traces external contours of random filled blobs."""
+        rng = np.random.default_rng(seed)
+        image = np.zeros((400, 400), dtype=np.uint8)
+        for _ in range(count):
+            center = tuple(int(v) for v in rng.integers(0, 400, 2))
+            cv2.circle(image, center, int(rng.integers(1, 30)), 255, -1)
+        contours, _ = cv2.findContours(image, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+        return contours
+
+    def test_matches_opencv_per_contour(self):
+        contours = self._random_contours()
+        features = measure_contours(ContourBatch.from_contours(contours))
+
+        for i, cnt in enumerate(contours):
+            M = cv2.moments(cnt)
+            expected = (int(M['m10'] / M['m00']), int(M['m01'] / M['m00'])) if M['m00'] != 0 else (0, 0)
+            assert features.area[i] == cv2.contourArea(cnt)
+            assert np.isclose(features.perimeter[i], cv2.arcLength(cnt, True))
+            assert tuple(features.centroid[i]) == expected
+            assert tuple(features.bbox[i]) == cv2.boundingRect(cnt)
+
+    def test_degenerate_and_empty_contours(self):
+        contours = [
+            np.array([[[5, 5]]], dtype=np.int32),
+            np.empty((0, 1, 2), dtype=np.int32),
+            np.array([[[0, 0]], [[10, 0]]], dtype=np.int32),
+        ]
+        features = measure_contours(ContourBatch.from_contours(contours))
+        assert features.area.tolist() == [0.0, 0.0, 0.0]
+        assert features.perimeter.tolist() == [0.0, 0.0, 20.0]
+        assert features.centroid.tolist() == [[0, 0], [0, 0], [0, 0]]
+        assert features.bbox[0].tolist() == [5, 5, 1, 1]
+
+    def test_batch_classification_matches_detector(self):
+        contours = self._random_contours(seed=1)
+        batch = ContourBatch.from_contours(contours)
+        approx = approximate_contours(batch, measure_contours(batch).perimeter)
+        labels = ShapeDetector.classify_polygons(approx)
+        assert list(labels) == [ShapeDetector.identify_shape(c) for c in contours]
+
+    def test_hu_moments_match_opencv(self, monkeypatch):
+        contours = list(self._random_contours(seed=2)) + [np.empty((0, 1, 2), dtype=np.int32)]
+        batch = ContourBatch.from_contours(contours)
+        expected = np.array([
+            cv2.HuMoments(cv2.moments(c)).ravel() if len(c) else np.zeros(7) for c in contours
+        ])
+        assert np.allclose(hu_moments(batch), expected, rtol=1e-6, atol=1e-12)
+
+        # Blocked evaluation gives identical results
+        monkeypatch.setattr(geometry, "HU_BLOCK_POINTS", 16)
+        assert np.allclose(hu_moments(batch), expected, rtol=1e-6, atol=1e-12)
+
+    def test_merge_boxes_matches_pairwise_grouping(self):
+        rng = np.random.default_rng(3)
+        n, margin = 4000, 2
+        bbox = np.column_stack([
+            rng.integers(0, 4000, n), rng.integers(0, 4000, n), rng.integers(1, 40, n), rng.integers(1, 40, n)
+        ])
+        x0, y0 = bbox[:, 0] - margin, bbox[:, 1] - margin
+        x1, y1 = bbox[:, 0] + bbox[:, 2] + margin, bbox[:, 1] + bbox[:, 3] + margin
+        pairs = np.argwhere(
+            (x0[:, None] < x1[None, :]) & (x0[None, :] < x1[:, None])
+            & (y0[:, None] < y1[None, :]) & (y0[None, :] < y1[:, None])
+        )
+        # Reference grouping: propagate the lowest index over overlapping pairs until stable
+        label = list(range(n))
+        changed = True
+        while changed:
+            changed = False
+            for a, b in pairs.tolist():
+                low = min(label[a], label[b])
+                if label[a] != low or label[b] != low:
+                    label[a] = label[b] = low
+                    changed = True
+        expected = []
+        for first in sorted(set(label)):
+            members = bbox[np.array(label) == first]
+            expected.append((
+                int(members[:, 0].min()), int(members[:, 1].min()),
+                int((members[:, 0] + members[:, 2]).max()), int((members[:, 1] + members[:, 3]).max()),
+            ))
+
+        groups = geometry.merge_boxes(bbox, margin)
+        assert len(groups) < n
+        assert groups == expected
+        assert geometry.merge_boxes(bbox[:0], margin) == []
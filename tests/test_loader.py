@@ -0,0 +1,47 @@
+import numpy as np
+import cv2
+import pytest
+from src.cache import StageCache
+from src.loader import ImageLoader, decode_image, reduction_for
+
+class TestImageLoader:
+
+    @staticmethod
+    def _png(height=64, width=96) -> bytes:
+        image = np.zeros((height, width, 3), dtype=np.uint8)
+        image[..., 0] = 255  # blue in BGR
+        return cv2.imencode(".png", image)[1].tobytes()
+
+    def test_decodes_to_bgr(self):
+        image = decode_image(self._png())
+        assert image.shape == (64, 96, 3)
+        assert (image[..., 0] == 255).all() and (image[..., 2] == 0).all()
+        assert decode_image(self._png(), reduce=4).shape == (16, 24, 3)
+        with pytest.raises(ValueError):
+            decode_image(b"not an image")
+        with pytest.raises(ValueError):
+            decode_image(self._png(), reduce=3)
+
+    def test_reduction_for(self):
+        assert reduction_for((3000, 4000, 3), 1600) == 4
+        assert reduction_for((300, 400, 3), 1600) == 1
+        assert reduction_for((3000, 40000, 3), 1600) == 8
+
+    def test_cache_is_keyed_and_byte_bounded(self):
+        loader = ImageLoader(max_bytes=64 * 96 * 3 * 2)
+        data = self._png()
+        key, first = loader.load(data)
+        assert loader.load(data)[1] is first
+        assert not first.flags.writeable
+        assert loader.cache.hits == 1
+
+        loader.load(data, reduce=2, key=key)
+        loader.load(self._png(64, 97))
+        # The oldest full-size decode no longer fits the byte budget
+        assert ("decoded", key, 1) not in loader.cache
+        assert loader.cache.nbytes <= loader.cache.max_bytes
+
+    def test_stage_cache_keeps_newest_oversized_entry(self):
+        cache = StageCache(max_bytes=10)
+        cache.get_or_compute("a", lambda: np.zeros(100, dtype=np.uint8))
+        assert "a" in cache and cache.nbytes == 100
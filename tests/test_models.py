@@ -0,0 +1,57 @@
+import pickle
+import numpy as np
+import cv2
+from src.analyzer import ImageAnalyzer
+from src.models import ProcessingConfig, ShapeResultSet
+
+class TestShapeResultSet:
+
+    @staticmethod
+    def _results() -> ShapeResultSet:
+        image = np.zeros((300, 400, 3), dtype=np.uint8)
+        cv2.rectangle(image, (10, 10), (60, 60), (255, 255, 255), -1)
+        cv2.rectangle(image, (100, 20), (220, 80), (255, 255, 255), -1)
+        cv2.circle(image, (300, 200), 50, (255, 255, 255), -1)
+        return ImageAnalyzer(ProcessingConfig()).analyze(image)
+
+    def test_views_match_columns(self):
+        results = self._results()
+        assert len(results) == 3
+        for i, shape in enumerate(results):
+            assert shape.area == results.area[i]
+            assert shape.shape_type == results.shape_types[i]
+            assert np.shares_memory(shape.contour, results.contours.points)
+        assert sorted(results.shape_types) == ["Circle", "Rectangle", "Square"]
+
+    def test_slicing_and_filtering(self):
+        results = self._results()
+        large = results.filter(results.area > 5000)
+        assert sorted(large.shape_types) == ["Circle", "Rectangle"]
+
+        reordered = results[[2, 0]]
+        assert reordered[0].area == results[2].area
+        assert np.array_equal(reordered[1].contour, results[0].contour)
+        assert np.array_equal(reordered[0].approx_contour, results[2].approx_contour)
+
+        tail = results[1:]
+        assert len(tail) == 2 and np.shares_memory(tail.contours.points, results.contours.points)
+        assert results[-1].area == results.area[2]
+
+    def test_dataframe_is_zero_copy(self):
+        results = self._results()
+        df = results.to_dataframe()
+        assert list(df["shape_type"]) == list(results.shape_types)
+        assert np.shares_memory(df["area"].to_numpy(), results.area)
+
+    def test_from_shapes_round_trip(self):
+        results = self._results()
+        packed = ShapeResultSet.from_shapes(results.to_list())
+        assert list(packed.shape_types) == list(results.shape_types)
+        assert np.array_equal(packed.bbox, results.bbox)
+        assert np.array_equal(packed.contours.points, results.contours.points)
+        assert len(pickle.loads(pickle.dumps(packed))) == 3
+
+    def test_empty(self):
+        empty = ShapeResultSet.empty()
+        assert len(empty) == 0 and not empty
+        assert len(empty.to_dataframe()) == 0
@@ -0,0 +1,111 @@
+import os
+import numpy as np
+import cv2
+from src.analyzer import ImageAnalyzer
+from src.batch import analyze_batch, collect_images
+from src.models import ProcessingConfig
+from src.result_cache import ResultCache
+from src.templates import TemplateLibrary
+
+class TestResultCache:
+
+    @staticmethod
+    def _scene(offset: int = 0) -> np.ndarray:
+        image = np.zeros((300, 400, 3), dtype=np.uint8)
+        cv2.rectangle(image, (20 + offset, 20), (120 + offset, 120), (255, 255, 255), -1)
+        cv2.circle(image, (250, 150), 50, (255, 255, 255), -1)
+        return image
+
+    def test_repeat_analysis_is_a_lookup(self, tmp_path):
+        image = self._scene()
+        first = ImageAnalyzer(ProcessingConfig(), result_cache=ResultCache(str(tmp_path))).analyze(image)
+
+        store = ResultCache(str(tmp_path))
+        seen = []
+        again = ImageAnalyzer(ProcessingConfig(threads=4), result_cache=store, hooks=[seen.append]).analyze(image)
+        assert (store.hits, store.misses) == (1, 0)
+        assert list(seen[0].stages_ms) == ["result_cache"]
+        assert again.labels == first.labels
+        assert np.array_equal(again.shape_codes, first.shape_codes)
+        assert np.array_equal(again.area, first.area)
+        assert np.array_equal(again.bbox, first.bbox)
+        assert np.array_equal(again.contours.points, first.contours.points)
+        assert np.array_equal(again.approx.offsets, first.approx.offsets)
+
+    def test_key_covers_results_not_performance(self, tmp_path):
+        store = ResultCache(str(tmp_path))
+        base = store.key("img", ProcessingConfig())
+        assert store.key("img", ProcessingConfig(threads=8, fields=("area",))) == base
+        assert store.key("img", ProcessingConfig(min_area=50.0)) != base
+        assert store.key("other", ProcessingConfig()) != base
+        assert store.key("img", ProcessingConfig(), kind="refined") != base
+
+        library = TemplateLibrary()
+        library.add("square", np.array([[[0, 0]], [[40, 0]], [[40, 40]], [[0, 40]]], dtype=np.int32))
+        with_templates = store.key("img", ProcessingConfig(), library)
+        assert with_templates != base
+        library.max_distance = 1.0
+        assert store.key("img", ProcessingConfig(), library) != with_templates
+
+    def test_version_bump_invalidates(self, tmp_path):
+        image = self._scene()
+        ImageAnalyzer(ProcessingConfig(), result_cache=ResultCache(str(tmp_path), version="1")).analyze(image)
+        store = ResultCache(str(tmp_path), version="2")
+        ImageAnalyzer(ProcessingConfig(), result_cache=store).analyze(image)
+        assert (store.hits, store.misses) == (0, 1)
+
+        # Unreachable entries of the old version are evicted first
+        store.evict(target=store.nbytes - 1)
+        assert not any(files for _, _, files in os.walk(tmp_path / "v1"))
+        assert any(files for _, _, files in os.walk(tmp_path / "v2"))
+
+    def test_lru_eviction(self, tmp_path):
+        store = ResultCache(str(tmp_path))
+        analyzer = ImageAnalyzer(ProcessingConfig(), result_cache=store)
+        keys = [f"img{i}" for i in range(4)]
+        for i, key in enumerate(keys[:3]):
+            analyzer.analyze(self._scene(10 * i), image_key=key)
+            # mtime granularity can be coarse; space the accesses out explicitly
+            path = store._path(store.key(key, analyzer.config))
+            os.utime(path, (1000 + i, 1000 + i))
+        assert analyzer.cached(keys[0]) is not None  # now the most recently used
+
+        entry_size = store.nbytes // 3
+        store.max_bytes = int(entry_size * 3.5)
+        analyzer.analyze(self._scene(30), image_key=keys[3])
+        assert [analyzer.cached(key) is not None for key in keys] == [True, False, True, True]
+
+    def test_overwrite_does_not_grow_the_running_total(self, tmp_path):
+        store = ResultCache(str(tmp_path))
+        results = ImageAnalyzer(ProcessingConfig()).analyze(self._scene())
+        store.put("img", results)
+        store.max_bytes = store.nbytes + 1
+        for _ in range(3):
+            store.put("img", results)
+        assert store._nbytes == store.nbytes
+        assert store.get("img") is not None
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        store = ResultCache(str(tmp_path))
+        analyzer = ImageAnalyzer(ProcessingConfig(), result_cache=store)
+        analyzer.analyze(self._scene(), image_key="img")
+        path = store._path(store.key("img", analyzer.config))
+        with open(path, "r+b") as fh:
+            fh.truncate(100)
+        assert analyzer.cached("img") is None
+        assert not os.path.exists(path)
+
+    def test_batch_runs_share_results(self, tmp_path):
+        images = tmp_path / "images"
+        images.mkdir()
+        for i in range(3):
+            cv2.imwrite(str(images / f"img{i}.png"), self._scene(10 * i))
+        paths = collect_images(str(images))
+        store = ResultCache(str(tmp_path / "cache"))
+
+        first = {r.path: r for r in analyze_batch(paths, ProcessingConfig(), workers=2, result_cache=store)}
+        second = {r.path: r for r in analyze_batch(paths, ProcessingConfig(), workers=1, result_cache=store)}
+        assert not any(r.cached for r in first.values())
+        assert all(r.cached for r in second.values())
+        for path in paths:
+            assert np.array_equal(second[path].shapes.area, first[path].shapes.area)
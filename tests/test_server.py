@@ -0,0 +1,153 @@
+import asyncio
+import base64
+import http.client
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from app.server import AnalysisServer
+from src.models import ProcessingConfig
+
+class TestAnalysisServer:
+
+    @staticmethod
+    def _png() -> bytes:
+        image = np.zeros((200, 200, 3), dtype=np.uint8)
+        cv2.rectangle(image, (40, 40), (140, 140), (255, 255, 255), -1)
+        return cv2.imencode(".png", image)[1].tobytes()
+
+    @staticmethod
+    def _serve(server: AnalysisServer):
+        loop = asyncio.new_event_loop()
+        listener = loop.run_until_complete(server.start("127.0.0.1", 0))
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        async def shutdown():
+            listener.close()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        def stop():
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            server.close()
+        return listener.sockets[0].getsockname()[1], stop
+
+    @staticmethod
+    def _request(port, method, path, body=None):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.request(method, path, body=body)
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        conn.close()
+        return response.status, payload
+
+    def test_analyze_and_batch(self):
+        server = AnalysisServer(ProcessingConfig(), executor=ThreadPoolExecutor(2))
+        port, stop = self._serve(server)
+        try:
+            status, payload = self._request(port, "POST", "/analyze?include_contours=1", self._png())
+            assert status == 200 and payload["count"] == 1
+            assert payload["shapes"][0]["shape_type"] == "Square"
+            assert "contour" in payload["shapes"][0]
+            status, payload = self._request(port, "POST", "/analyze?include_contours=1&compact=1", self._png())
+            assert isinstance(payload["shapes"][0]["contour"], str)
+
+            body = json.dumps({"images": [base64.b64encode(self._png()).decode(), base64.b64encode(b"junk").decode()]})
+            status, payload = self._request(port, "POST", "/batch?min_area=20000", body)
+            assert status == 200
+            first, second = payload["results"]
+            assert first["count"] == 0 and "error" in second and second["status"] == 400
+
+            status, payload = self._request(port, "POST", "/analyze", b"junk")
+            assert status == 400 and "error" in payload
+
+            assert self._request(port, "GET", "/nope")[0] == 404
+            assert self._request(port, "POST", "/analyze?canny1=x", self._png())[0] == 400
+        finally:
+            stop()
+
+    def test_backpressure_and_timeout(self, monkeypatch):
+        import app.server as server_module
+
+        def slow(data, config, include_contours, compact=False):
+            time.sleep(0.5)
+            return {"count": 0}
+        monkeypatch.setattr(server_module, "_analyze_encoded", slow)
+
+        server = AnalysisServer(ProcessingConfig(), max_pending=1, timeout=0.2, executor=ThreadPoolExecutor(2))
+        port, stop = self._serve(server)
+        try:
+            results = []
+            first = threading.Thread(target=lambda: results.append(self._request(port, "POST", "/analyze", b"x")))
+            first.start()
+            time.sleep(0.05)
+            assert self._request(port, "POST", "/analyze", b"x")[0] == 503
+            first.join()
+            assert results[0][0] == 504
+        finally:
+            stop()
+
+    def test_timed_out_job_keeps_its_slot(self, monkeypatch):
+        import app.server as server_module
+
+        def slow(data, config, include_contours, compact=False):
+            time.sleep(0.6)
+            return {"count": 0}
+        monkeypatch.setattr(server_module, "_analyze_encoded", slow)
+
+        server = AnalysisServer(ProcessingConfig(), max_pending=1, timeout=0.1, executor=ThreadPoolExecutor(2))
+        port, stop = self._serve(server)
+        try:
+            assert self._request(port, "POST", "/analyze", b"x")[0] == 504
+            # The worker is still busy with the timed-out image
+            assert self._request(port, "POST", "/analyze", b"x")[0] == 503
+            time.sleep(0.7)
+            assert server.pending == 0
+        finally:
+            stop()
+
+    def test_negative_content_length(self):
+        server = AnalysisServer(ProcessingConfig(), executor=ThreadPoolExecutor(1))
+        port, stop = self._serve(server)
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=10) as conn:
+                conn.sendall(b"POST /analyze HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+                assert conn.recv(4096).split(b" ")[1] == b"400"
+        finally:
+            stop()
+
+    def test_batch_larger_than_limit(self):
+        server = AnalysisServer(ProcessingConfig(), max_pending=2, executor=ThreadPoolExecutor(1))
+        port, stop = self._serve(server)
+        try:
+            body = json.dumps({"images": [base64.b64encode(self._png()).decode()] * 3})
+            status, payload = self._request(port, "POST", "/batch", body)
+            assert status == 413 and "2" in payload["error"]
+        finally:
+            stop()
+
+    def test_unexpected_error_answers_500(self, monkeypatch):
+        import app.server as server_module
+
+        def broken(data, config, include_contours, compact=False):
+            raise RuntimeError("pool is gone")
+        monkeypatch.setattr(server_module, "_analyze_encoded", broken)
+
+        server = AnalysisServer(ProcessingConfig(), executor=ThreadPoolExecutor(1))
+        port, stop = self._serve(server)
+        try:
+            assert self._request(port, "POST", "/analyze", b"x") == (500, {"error": "Internal server error"})
+            assert self._request(port, "GET", "/health")[0] == 200
+        finally:
+            stop()
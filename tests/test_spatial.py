@@ -0,0 +1,69 @@
+import numpy as np
+import cv2
+from src.analyzer import ImageAnalyzer
+from src.models import ProcessingConfig
+from src.spatial import ShapeIndex
+
+class TestShapeIndex:
+
+    @staticmethod
+    def _results():
+        image = np.zeros((400, 600, 3), dtype=np.uint8)
+        cv2.rectangle(image, (20, 20), (120, 120), (255, 255, 255), -1)
+        cv2.circle(image, (300, 200), 60, (255, 255, 255), -1)
+        cv2.rectangle(image, (450, 300), (580, 360), (255, 255, 255), -1)
+        # Triangle whose box covers (200, 330) but whose interior does not
+        cv2.fillPoly(image, [np.array([[150, 380], [250, 380], [250, 300]], np.int32)], (255, 255, 255))
+        return ImageAnalyzer(ProcessingConfig()).analyze(image)
+
+    def test_queries_match_linear_scan(self):
+        results = self._results()
+        index = ShapeIndex(results, cell_size=50)
+        circle = int(np.flatnonzero(results.shape_types == "Circle")[0])
+        triangle = int(np.flatnonzero(results.shape_types == "Triangle")[0])
+
+        assert index.at(300, 200).tolist() == [circle]
+        assert index.at(5, 390).tolist() == []
+        assert triangle in index.at(170, 310, exact=False).tolist()
+        assert triangle not in index.at(170, 310).tolist()
+
+        inside = index.in_rect(0, 0, 400, 300, fully_inside=True)
+        assert sorted(results.shape_types[inside]) == ["Circle", "Square"]
+        assert len(index.in_rect(0, 0, 600, 400)) == len(results)
+
+        nearest, distance = index.nearest(590, 390, k=2)
+        expected = np.argsort(np.hypot(*(results.centroid - [590, 390]).T))[:2]
+        assert nearest.tolist() == expected.tolist()
+        assert np.all(np.diff(distance) >= 0)
+
+    def test_random_boxes_against_brute_force(self):
+        from src.geometry import ContourBatch, measure_contours
+        from src.models import ShapeResultSet
+
+        rng = np.random.default_rng(1)
+        x, y = rng.integers(0, 2000, (2, 3000))
+        w, h = rng.integers(2, 80, (2, 3000))
+        w[:3] = h[:3] = 1500  # oversized boxes go to the side list
+        contours = [
+            np.array([[a, b], [a + c, b], [a + c, b + d], [a, b + d]], np.int32).reshape(-1, 1, 2)
+            for a, b, c, d in zip(x, y, w, h)
+        ]
+        batch = ContourBatch.from_contours(contours)
+        f = measure_contours(batch)
+        results = ShapeResultSet(
+            labels=("Rectangle",), shape_codes=np.zeros(len(batch), np.int16),
+            area=f.area, perimeter=f.perimeter, centroid=f.centroid.astype(np.int32),
+            bbox=f.bbox.astype(np.int32), contours=batch, approx=batch
+        )
+        index = ShapeIndex(results)
+        assert len(index.large) >= 3
+        bx0, by0 = f.bbox[:, 0], f.bbox[:, 1]
+        bx1, by1 = bx0 + f.bbox[:, 2], by0 + f.bbox[:, 3]
+        for qx, qy in rng.integers(-50, 2100, (50, 2)):
+            hits = (bx0 <= qx) & (qx < bx1) & (by0 <= qy) & (qy < by1)
+            assert set(index.at(qx, qy, exact=False)) == set(np.flatnonzero(hits))
+            overlap = (bx0 < qx + 90) & (by0 < qy + 60) & (bx1 > qx) & (by1 > qy)
+            assert set(index.in_rect(qx, qy, qx + 90, qy + 60)) == set(np.flatnonzero(overlap))
+            _, distance = index.nearest(qx + 0.5, qy, k=4)
+            brute = np.sort(np.hypot(f.centroid[:, 0] - qx - 0.5, f.centroid[:, 1] - qy))[:4]
+            assert np.allclose(distance, brute)
@@ -0,0 +1,70 @@
+import numpy as np
+import cv2
+import pytest
+from src.analyzer import ImageAnalyzer
+from src.models import ProcessingConfig
+from src.templates import TemplateLibrary
+
+def _star(points: int = 5, inner: float = 0.45) -> np.ndarray:
+    angles = np.arange(2 * points) * np.pi / points
+    radii = np.where(np.arange(2 * points) % 2 == 0, 1.0, inner)
+    return np.column_stack([radii * np.cos(angles), radii * np.sin(angles)])
+
+OUTLINES = {
+    "star": _star(),
+    "cross": np.array([[-1, -.3], [-.3, -.3], [-.3, -1], [.3, -1], [.3, -.3], [1, -.3],
+                       [1, .3], [.3, .3], [.3, 1], [-.3, 1], [-.3, .3], [-1, .3]]),
+    "ell": np.array([[0, 0], [.4, 0], [.4, 1.2], [1, 1.2], [1, 1.6], [0, 1.6]]) - [.4, .8],
+    "arrow": np.array([[0, -.2], [1, -.2], [1, -.5], [1.6, 0], [1, .5], [1, .2], [0, .2]]) - [.8, 0],
+}
+
+def _draw(image, outline, center, scale, angle):
+    c, s = np.cos(angle), np.sin(angle)
+    points = outline @ np.array([[c, s], [-s, c]]) * scale + center
+    cv2.fillPoly(image, [np.rint(points).astype(np.int32)], (255, 255, 255))
+
+class TestTemplateLibrary:
+
+    @staticmethod
+    def _library() -> TemplateLibrary:
+        library = TemplateLibrary()
+        for name, outline in OUTLINES.items():
+            image = np.zeros((400, 400), dtype=np.uint8)
+            _draw(image, outline, (200, 200), 100, 0.0)
+            # Dark part on a light background, as scanned references usually are
+            library.add_image(name, cv2.bitwise_not(image))
+        return library
+
+    def test_matches_rotated_and_scaled_shapes(self):
+        library = self._library()
+        image = np.zeros((500, 900, 3), dtype=np.uint8)
+        expected = {}
+        for i, name in enumerate(OUTLINES):
+            center = (110 + 220 * i, 250)
+            _draw(image, OUTLINES[name], center, 50 + 10 * i, 0.9 * (i + 1))
+            expected[center[0] // 220] = name
+
+        results = ImageAnalyzer(ProcessingConfig(), templates=library).analyze(image)
+        assert len(results) == len(OUTLINES)
+        for shape in results:
+            assert shape.shape_type == expected[shape.centroid[0] // 220]
+
+        indices, distances = library.match(results.contours, k=3)
+        assert indices.shape == (len(results), 3)
+        assert np.all(np.diff(distances, axis=1) >= 0)
+
+    def test_unmatched_shapes_keep_polygon_labels(self, tmp_path):
+        library = self._library()
+        image = np.zeros((300, 400, 3), dtype=np.uint8)
+        cv2.rectangle(image, (20, 100), (220, 160), (255, 255, 255), -1)
+        results = ImageAnalyzer(ProcessingConfig(), templates=library).analyze(image)
+        assert list(results.shape_types) == ["Rectangle"]
+
+        path = str(tmp_path / "library.npz")
+        library.save(path)
+        loaded = TemplateLibrary.load(path)
+        assert loaded.names == library.names
+        assert np.array_equal(loaded.descriptors, library.descriptors)
+
+        with pytest.raises(ValueError):
+            library.add("line", np.array([[[0, 0]], [[10, 0]]], dtype=np.int32))
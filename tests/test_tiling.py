@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import cv2
+from src.analyzer import ImageAnalyzer
+from src.models import ProcessingConfig
+from src.tiling import TiledAnalyzer
+
+class TestTiledAnalyzer:
+
+    @staticmethod
+    def _scene() -> np.ndarray:
+        """Shapes placed on and across the seams of a 200px tile grid."""
+        rng = np.random.default_rng(3)
+        image = np.zeros((620, 610, 3), dtype=np.uint8)
+        for _ in range(40):
+            x, y = (int(v) for v in rng.integers(0, 600, 2))
+            size = int(rng.integers(8, 45))
+            cv2.rectangle(image, (x, y), (x + size, y + int(rng.integers(8, 45))), (255, 255, 255), -1)
+        # Larger than the overlap, spanning four tiles
+        cv2.circle(image, (400, 400), 120, (200, 200, 200), 3)
+        return image
+
+    @staticmethod
+    def _summary(results):
+        return sorted(
+            (r.area, round(r.perimeter, 6), r.centroid, r.shape_type) for r in results
+        )
+
+    def test_matches_whole_image(self):
+        image = self._scene()
+        config = ProcessingConfig(min_area=50.0, max_area=1e6)
+        whole = ImageAnalyzer(config).analyze(image)
+        tiled = TiledAnalyzer(config, tile_size=200, overlap=16, workers=2).analyze(image)
+        assert len(whole) > 20
+        assert self._summary(tiled) == self._summary(whole)
+
+    def test_memory_mapped_source(self, tmp_path):
+        image = self._scene()
+        path = tmp_path / "scan.npy"
+        np.save(path, image)
+        config = ProcessingConfig()
+        tiled = TiledAnalyzer(config, tile_size=256).analyze(str(path))
+        assert self._summary(tiled) == self._summary(ImageAnalyzer(config).analyze(image))
+
+    def test_threshold_backends_need_fixed_polarity(self):
+        image = self._scene()
+        with pytest.raises(ValueError):
+            TiledAnalyzer(ProcessingConfig(backend="otsu"), tile_size=200)
+
+        config = ProcessingConfig(min_area=50.0, max_area=1e6, backend="components", foreground="bright", threshold=100)
+        whole = ImageAnalyzer(config).analyze(image)
+        tiled = TiledAnalyzer(config, tile_size=200, overlap=16).analyze(image)
+        assert len(whole) > 20
+        assert self._summary(tiled) == self._summary(whole)
@@ -0,0 +1,81 @@
+import numpy as np
+import cv2
+import pytest
+from src.analyzer import ImageAnalyzer
+from src.models import ProcessingConfig
+from src.processors import ImageProcessor
+from src.tuning import CannyTuner
+
+class TestCannyTuner:
+
+    @staticmethod
+    def _scene(seed: int = 0) -> np.ndarray:
+        """Low-contrast shapes over noise, so thresholds matter."""
+        rng = np.random.default_rng(seed)
+        image = (rng.random((240, 320, 3)) * 60).astype(np.uint8)
+        for i in range(6):
+            x, y = 20 + 50 * i, 40 + 25 * (i % 3)
+            cv2.rectangle(image, (x, y), (x + 35, y + 45), (140, 140, 140), -1)
+        return image
+
+    def test_gradient_path_matches_canny(self):
+        blur = ImageProcessor.apply_blur(ImageProcessor.to_grayscale(self._scene()), 5)
+        dx, dy = ImageProcessor.compute_gradients(blur)
+        for t1, t2 in [(10, 30), (50, 150)]:
+            expected = ImageProcessor.detect_edges(blur, t1, t2)
+            assert np.array_equal(ImageProcessor.detect_edges_from_gradients(dx, dy, t1, t2), expected)
+
+    def test_counts_match_full_pipeline(self):
+        image = self._scene()
+        config = ProcessingConfig()
+        tuner = CannyTuner(config, thresholds1=[30, 90], thresholds2=[60, 150])
+        counts = tuner.sweep_counts(image)
+        assert counts[1, 0] == -1
+        for i, t1 in enumerate(tuner.thresholds1):
+            for j, t2 in enumerate(tuner.thresholds2):
+                if t1 <= t2:
+                    pair = ProcessingConfig(canny_threshold1=int(t1), canny_threshold2=int(t2))
+                    assert counts[i, j] == len(ImageAnalyzer(pair).analyze(image))
+
+    def test_count_scoring_picks_maximum(self):
+        result = CannyTuner(ProcessingConfig(), score="count").tune(self._scene())
+        best = ImageAnalyzer(result.config).analyze(self._scene())
+        assert len(best) == result.counts.max() >= 6
+
+    def test_tune_many_and_validation(self):
+        result = CannyTuner(ProcessingConfig()).tune_many([self._scene(0), self._scene(1)])
+        assert result.config.canny_threshold1 <= result.config.canny_threshold2
+        with pytest.raises(ValueError):
+            CannyTuner(ProcessingConfig(), score="fastest")
+
+    def test_sweep_matches_canny_per_pair(self):
+        image = self._scene(2)
+        # Outlines around filled shapes: nesting decides what RETR_EXTERNAL sees
+        cv2.rectangle(image, (10, 150), (150, 230), (90, 90, 90), 2)
+        cv2.rectangle(image, (170, 150), (310, 230), (200, 200, 200), 2)
+        cv2.circle(image, (80, 190), 20, (220, 220, 220), -1)
+        cv2.circle(image, (240, 190), 20, (120, 120, 120), -1)
+        config = ProcessingConfig(min_area=50.0, max_area=6000.0)
+        processor = ImageProcessor()
+        dx, dy = processor.compute_gradients(
+            processor.apply_blur(processor.to_grayscale(image), config.gaussian_kernel)
+        )
+        tuner = CannyTuner(config)
+        counts = tuner.sweep_counts(image)
+        for i, t1 in enumerate(tuner.thresholds1):
+            for j, t2 in enumerate(tuner.thresholds2):
+                if t1 <= t2:
+                    edges = processor.detect_edges_from_gradients(dx, dy, int(t1), int(t2))
+                    areas = np.array([cv2.contourArea(c) for c in processor.get_contours(edges)])
+                    expected = np.count_nonzero((areas >= config.min_area) & (areas <= config.max_area))
+                    assert counts[i, j] == expected, (t1, t2)
+
+    def test_progress_reports_rows_and_can_abort(self):
+        done = []
+        CannyTuner(ProcessingConfig()).tune(self._scene(), progress=done.append)
+        assert len(done) == 13 and done[-1] == 1.0
+
+        def abort(fraction):
+            raise KeyboardInterrupt
+        with pytest.raises(KeyboardInterrupt):
+            CannyTuner(ProcessingConfig()).tune(self._scene(), progress=abort)
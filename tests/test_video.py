@@ -0,0 +1,80 @@
+import numpy as np
+import cv2
+import pytest
+from src.models import ProcessingConfig
+from src.tracking import CentroidTracker
+from src.video import analyze_video
+
+class TestCentroidTracker:
+
+    def test_ids_follow_nearest_centroid(self):
+        tracker = CentroidTracker(max_distance=20)
+        first = tracker.update([[10, 10], [100, 100]])
+        # Detections arrive in a different order and move slightly
+        second = tracker.update([[105, 98], [14, 12]])
+        assert list(second) == [first[1], first[0]]
+
+    def test_far_detection_starts_new_track(self):
+        tracker = CentroidTracker(max_distance=20)
+        first = tracker.update([[10, 10]])
+        second = tracker.update([[200, 200]])
+        assert second[0] != first[0]
+
+    def test_tracks_expire_after_missed_frames(self):
+        tracker = CentroidTracker(max_distance=20, max_missed=1)
+        first = tracker.update([[10, 10]])
+        tracker.update(np.empty((0, 2)))
+        tracker.update(np.empty((0, 2)))
+        assert tracker.update([[10, 10]])[0] != first[0]
+
+class TestAnalyzeVideo:
+
+    @staticmethod
+    def _write_video(path, frames: int = 12, fps: float = 10.0) -> None:
+        """A square sliding right a few pixels per frame."""
+        writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (200, 200))
+        if not writer.isOpened():
+            pytest.skip("No video encoder available")
+        for i in range(frames):
+            image = np.zeros((200, 200, 3), dtype=np.uint8)
+            cv2.rectangle(image, (20 + 4 * i, 60), (80 + 4 * i, 120), (255, 255, 255), -1)
+            writer.write(image)
+        writer.release()
+
+    def test_stable_track_and_frame_step(self, tmp_path):
+        path = tmp_path / "clip.avi"
+        self._write_video(path)
+
+        results = list(analyze_video(str(path), ProcessingConfig(), frame_step=2, prefetch=2))
+        assert [r.index for r in results] == [0, 2, 4, 6, 8, 10]
+        assert all(len(r.shapes) == 1 for r in results)
+        assert len({int(r.track_ids[0]) for r in results}) == 1
+
+    def test_target_fps_and_early_stop(self, tmp_path):
+        path = tmp_path / "clip.avi"
+        self._write_video(path)
+
+        results = list(analyze_video(str(path), ProcessingConfig(), target_fps=5))
+        assert [r.index for r in results] == [0, 2, 4, 6, 8, 10]
+
+        stream = analyze_video(str(path), ProcessingConfig(), prefetch=1)
+        assert next(stream).index == 0
+        stream.close()
+
+    def test_unopened_capture_is_released(self, monkeypatch):
+        released = []
+
+        class Closed:
+            def __init__(self, source):
+                pass
+
+            def isOpened(self):
+                return False
+
+            def release(self):
+                released.append(True)
+        monkeypatch.setattr(cv2, "VideoCapture", Closed)
+
+        with pytest.raises(IOError):
+            next(analyze_video("missing.avi", ProcessingConfig()))
+        assert released == [True]
@@ -0,0 +1,46 @@
+import numpy as np
+import cv2
+from app.ui.visuals import OverlayRenderer, draw_results
+from src.analyzer import ImageAnalyzer
+from src.models import ProcessingConfig
+
+class TestOverlayRenderer:
+
+    @staticmethod
+    def _scene():
+        image = np.zeros((600, 800, 3), dtype=np.uint8)
+        cv2.rectangle(image, (100, 100), (300, 300), (200, 200, 200), -1)
+        cv2.circle(image, (550, 350), 90, (200, 200, 200), -1)
+        return image, ImageAnalyzer(ProcessingConfig()).analyze(image)
+
+    def test_matches_per_shape_drawing(self):
+        image, results = self._scene()
+        expected = image.copy()
+        for shape in results:
+            cv2.drawContours(expected, [shape.approx_contour], -1, (0, 255, 0), 2)
+            cv2.circle(expected, shape.centroid, 5, (255, 0, 0), -1)
+        for shape in results:
+            label = f"{shape.shape_type} A:{int(shape.area)}"
+            origin = (shape.centroid[0] - 20, shape.centroid[1] - 20)
+            cv2.putText(expected, label, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3)
+            cv2.putText(expected, label, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+        output = draw_results(image, results)
+        assert np.array_equal(output, expected)
+        assert not np.shares_memory(output, image)
+        # Also accepts plain ShapeInfo lists
+        assert np.array_equal(draw_results(image, results.to_list()), expected)
+
+    def test_display_resolution_and_buffer_reuse(self):
+        image, results = self._scene()
+        renderer = OverlayRenderer(max_width=300, reuse_buffer=True)
+        assert renderer.display_factor(image.shape) == 3
+        first = renderer.render(image, results)
+        assert first.shape == (200, 266, 3)
+        assert renderer.render(image, results) is first
+
+        out = np.empty_like(first)
+        assert OverlayRenderer(max_width=300).render(image, results, out=out) is out
+        assert np.array_equal(out, first)
+        # Contours are drawn at the scaled positions
+        assert (out[30:105, 30:105] == (0, 255, 0)).all(axis=2).any()